@@ -0,0 +1,244 @@
+"""Pre-rendered sprite renderer for the robot eyes.
+
+``robot_eyes.draw_eye`` rasterises every circle of both eyes each frame. The
+result only depends on a handful of inputs, so this module renders the
+expensive parts once per geometry and composes frames from them:
+
+* ``sclera``: eye white, outline and shading rings over the black background.
+* ``sclera_relined``: the same with the outline drawn a second time, which is
+  what ``draw_eye`` produces whenever an eyelid is active.
+* ``lid_top`` / ``lid_bottom``: the eyelid colour with the outline drawn over
+  it; eyelid rows are copied straight out of these.
+* the iris/pupil/highlight stack as a premultiplied colour patch plus an
+  inverse-alpha mask recovered by rendering it over black and over white.
+
+A frame is then a patch copy, one small alpha blend for the iris and a few row
+copies for the eyelids. Output matches ``draw_eye`` exactly except for
+anti-aliased iris edge pixels, which differ by at most a few intensity
+levels. ``python eye_sprites.py`` prints the FPS of both renderers and the
+largest pixel difference.
+"""
+from __future__ import annotations
+
+import time
+
+import cv2
+import numpy as np
+
+WHITE = (240, 240, 245)
+OUTLINE = (60, 60, 80)
+RING = (220, 220, 230)
+LIMBAL = (80, 40, 30)
+IRIS = (220, 150, 80)
+PUPIL = (10, 10, 10)
+HIGHLIGHT = (255, 255, 255)
+LID_TOP = (30, 35, 50)
+LID_BOTTOM = (25, 30, 40)
+
+# emotion -> (upper lid baseline closure, lower lid baseline closure)
+EMOTION_LID_EXTRAS = {
+    "sleepy": (0.45, 0.0),  # half closed look
+    "angry": (0.20, 0.0),
+    "sad": (0.0, 0.20),
+    "surprised": (-0.15, -0.10),  # widen (negative closure)
+}
+
+PATCH_MARGIN = 6  # pixels around the outline for anti-aliasing and lid overhang
+
+
+def eyelid_rows(center_y: int, eye_radius: int, blink_amount: float, emotion: str):
+    """Return ``(active, top_rows, bottom_rows)`` for the eyelid rectangles.
+
+    Row ranges are inclusive ``(start, end)`` canvas rows or ``None``.
+    ``active`` mirrors the condition under which ``draw_eye`` redraws the
+    outline after the lids.
+    """
+    upper_extra, lower_extra = EMOTION_LID_EXTRAS.get(emotion, (0.0, 0.0))
+    effective_closure = np.clip(blink_amount + max(0.0, upper_extra), 0.0, 1.0)
+    if not (effective_closure > 0 or lower_extra != 0 or upper_extra < 0):
+        return False, None, None
+    frac = effective_closure
+    # Top eyelid: cover proportion up to full diameter
+    cover_h_top = int(frac * 2 * eye_radius)
+    y0 = center_y - eye_radius
+    y1 = min(center_y - eye_radius + cover_h_top, center_y + eye_radius)
+    top = (y0 - 2, y1) if y1 > y0 else None
+    # Bottom eyelid: small upward movement for realism (30% of top travel)
+    base_bottom_frac = frac * 0.3 + max(0.0, lower_extra)
+    base_bottom_frac = max(0.0, base_bottom_frac + (-lower_extra if lower_extra < 0 else 0))
+    cover_h_bottom = int(base_bottom_frac * 2 * eye_radius)
+    yb0 = center_y + eye_radius - cover_h_bottom
+    yb1 = center_y + eye_radius
+    bottom = (yb0, yb1 + 2) if yb0 < yb1 else None
+    return True, top, bottom
+
+
+def highlight_center(pupil_center, pupil_radius: int):
+    return (int(pupil_center[0] - pupil_radius*0.3), int(pupil_center[1] - pupil_radius*0.3))
+
+
+def draw_sclera(canvas, center, eye_radius: int):
+    cv2.circle(canvas, center, eye_radius, WHITE, -1, lineType=cv2.LINE_AA)
+    cv2.circle(canvas, center, eye_radius, OUTLINE, 4, lineType=cv2.LINE_AA)
+    # Metallic radial shading (simple rings)
+    for r in (int(eye_radius*0.85), int(eye_radius*0.6)):
+        cv2.circle(canvas, center, r, RING, 2, lineType=cv2.LINE_AA)
+
+
+def draw_iris(canvas, pupil_center, pupil_radius: int):
+    # Limbal ring (darker edge), iris colour, pupil, highlight
+    cv2.circle(canvas, pupil_center, pupil_radius, LIMBAL, -1, lineType=cv2.LINE_AA)
+    cv2.circle(canvas, pupil_center, int(pupil_radius*0.9), IRIS, -1, lineType=cv2.LINE_AA)
+    cv2.circle(canvas, pupil_center, int(pupil_radius*0.45), PUPIL, -1, lineType=cv2.LINE_AA)
+    cv2.circle(canvas, highlight_center(pupil_center, pupil_radius), int(pupil_radius*0.35),
+               HIGHLIGHT, -1, lineType=cv2.LINE_AA)
+
+
+def draw_outline(canvas, center, eye_radius: int):
+    cv2.circle(canvas, center, eye_radius, OUTLINE, 4, lineType=cv2.LINE_AA)
+
+
+class EyeSprites:
+    """All pre-rendered layers for one ``(eye_radius, pupil_radius)`` pair."""
+
+    def __init__(self, eye_radius: int, pupil_radius: int):
+        self.eye_radius = eye_radius
+        self.pupil_radius = pupil_radius
+        self.half = eye_radius + PATCH_MARGIN
+        size = 2 * self.half + 1
+        c = (self.half, self.half)
+
+        self.sclera = np.zeros((size, size, 3), dtype=np.uint8)
+        draw_sclera(self.sclera, c, eye_radius)
+        self.sclera_relined = self.sclera.copy()
+        draw_outline(self.sclera_relined, c, eye_radius)
+
+        # Lid rectangles span eye_radius+2 either side of the centre column.
+        x0, x1 = self.half - eye_radius - 2, self.half + eye_radius + 3
+        self.lid_top = self.sclera.copy()
+        self.lid_top[:, x0:x1] = LID_TOP
+        draw_outline(self.lid_top, c, eye_radius)
+        self.lid_bottom = self.sclera.copy()
+        self.lid_bottom[:, x0:x1] = LID_BOTTOM
+        draw_outline(self.lid_bottom, c, eye_radius)
+
+        # Iris stack over black gives the premultiplied colour; over white it
+        # additionally reveals how much background shows through.
+        self.iris_half = pupil_radius + 2
+        isize = 2 * self.iris_half + 1
+        ic = (self.iris_half, self.iris_half)
+        on_black = np.zeros((isize, isize, 3), dtype=np.uint8)
+        on_white = np.full((isize, isize, 3), 255, dtype=np.uint8)
+        draw_iris(on_black, ic, pupil_radius)
+        draw_iris(on_white, ic, pupil_radius)
+        self.iris_premul = on_black.astype(np.uint16)
+        self.iris_inv_alpha = (on_white.astype(np.int16) - on_black).clip(0, 255).astype(np.uint16)
+        self._blend = np.empty((isize, isize, 3), dtype=np.uint16)
+
+
+class EyeSpriteCache:
+    """Draws eyes from cached sprites; drop-in for ``robot_eyes.draw_eye``.
+
+    Sprites are rebuilt whenever the geometry passed to ``draw_eye`` differs
+    from the cached one, so changing the size constants invalidates the cache.
+    The resting (not blinking) eyelid rows are cached per emotion.
+    """
+
+    def __init__(self):
+        self._sprites = None
+        self._resting_lids = {}
+
+    def sprites(self, eye_radius: int, pupil_radius: int) -> EyeSprites:
+        s = self._sprites
+        if s is None or s.eye_radius != eye_radius or s.pupil_radius != pupil_radius:
+            s = self._sprites = EyeSprites(eye_radius, pupil_radius)
+            self._resting_lids.clear()
+        return s
+
+    def _lids(self, s: EyeSprites, blink_amount: float, emotion: str):
+        # Rows are computed in patch coordinates (eye centre at ``s.half``).
+        if blink_amount:
+            return eyelid_rows(s.half, s.eye_radius, blink_amount, emotion)
+        lids = self._resting_lids.get(emotion)
+        if lids is None:
+            lids = self._resting_lids[emotion] = eyelid_rows(s.half, s.eye_radius, 0.0, emotion)
+        return lids
+
+    def draw_eye(self, canvas, center, pupil_offset, blink_amount: float, emotion: str,
+                 eye_radius: int, pupil_radius: int) -> bool:
+        """Draw one eye; returns False if it does not fit inside ``canvas``."""
+        s = self.sprites(eye_radius, pupil_radius)
+        h = s.half
+        cx, cy = center
+        top, left = cy - h, cx - h
+        if top < 0 or left < 0 or cy + h >= canvas.shape[0] or cx + h >= canvas.shape[1]:
+            return False
+        roi = canvas[top:top + 2*h + 1, left:left + 2*h + 1]
+
+        active, top_rows, bottom_rows = self._lids(s, blink_amount, emotion)
+        roi[:] = s.sclera_relined if active else s.sclera
+
+        if blink_amount < 0.98:  # hide pupil when almost fully closed
+            px = int(cx + pupil_offset[0]) - left
+            py = int(cy + pupil_offset[1]) - top
+            ih = s.iris_half
+            iris_roi = roi[py - ih:py + ih + 1, px - ih:px + ih + 1]
+            blend = s._blend
+            np.multiply(s.iris_inv_alpha, iris_roi, out=blend)
+            blend += 127
+            blend //= 255
+            blend += s.iris_premul
+            iris_roi[:] = blend
+
+        if top_rows is not None:
+            roi[top_rows[0]:top_rows[1] + 1] = s.lid_top[top_rows[0]:top_rows[1] + 1]
+        if bottom_rows is not None:
+            roi[bottom_rows[0]:bottom_rows[1] + 1] = s.lid_bottom[bottom_rows[0]:bottom_rows[1] + 1]
+        return True
+
+
+def benchmark(frames: int = 600):
+    """Compare ``draw_eye`` against the sprite renderer and report FPS/diff."""
+    import robot_eyes as re
+
+    rng = np.random.default_rng(0)
+    emotions = ["neutral", "sleepy", "angry", "sad", "surprised"]
+    states = []
+    for i in range(frames):
+        offset = rng.uniform(-1, 1, size=2)
+        offset = offset / max(1.0, np.linalg.norm(offset)) * re.PUPIL_TRAVEL
+        blink = float(rng.choice([0.0, 0.0, 0.0, rng.uniform(0, 1), 1.0]))
+        states.append((offset, blink, emotions[i % len(emotions)]))
+
+    centers = re.eye_centers()
+    ref = np.zeros((re.WINDOW_H, re.WINDOW_W, 3), dtype=np.uint8)
+    out = np.zeros_like(ref)
+    cache = EyeSpriteCache()
+    max_diff = 0
+    for offset, blink, emotion in states[:100]:
+        ref[:] = 0
+        for c in centers:
+            re.draw_eye(ref, c, offset, blink, emotion)
+            cache.draw_eye(out, c, offset, blink, emotion, re.EYE_RADIUS, re.PUPIL_RADIUS)
+        max_diff = max(max_diff, int(cv2.absdiff(ref, out).max()))
+
+    t0 = time.perf_counter()
+    for offset, blink, emotion in states:
+        ref[:] = 0
+        for c in centers:
+            re.draw_eye(ref, c, offset, blink, emotion)
+    t_ref = time.perf_counter() - t0
+
+    t0 = time.perf_counter()
+    for offset, blink, emotion in states:
+        for c in centers:
+            cache.draw_eye(out, c, offset, blink, emotion, re.EYE_RADIUS, re.PUPIL_RADIUS)
+    t_sprite = time.perf_counter() - t0
+
+    print(f"[BENCH] draw_eye: {frames / t_ref:8.1f} fps")
+    print(f"[BENCH] sprites : {frames / t_sprite:8.1f} fps ({t_ref / t_sprite:.1f}x)")
+    print(f"[BENCH] max abs pixel difference: {max_diff}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,136 @@
+"""Shared-memory state channel between the tool runner and the eye renderer.
+
+The writer (``tools_runner.facial_emotion_update``) and the reader
+(``robot_eyes.py``) map the same small file and exchange a fixed-size record
+protected by a sequence counter (seqlock):
+
+    offset  size  field
+    0       8     seq        (u64, odd while a write is in progress)
+    8       16    emotion    (ascii, NUL padded)
+    24      16    direction  (ascii, NUL padded)
+    40      8     timestamp  (f64, time.time() of the update)
+
+The reader never takes a lock and never issues a syscall once the mapping is
+open: it reads ``seq``, copies the payload, re-reads ``seq`` and retries if a
+write raced with it. Only one process (the tool runner) is expected to write.
+"""
+from __future__ import annotations
+
+import mmap
+import os
+import struct
+import tempfile
+import time
+
+STATE_PATH = os.environ.get(
+    "ROBOT_EYES_STATE", os.path.join(tempfile.gettempdir(), "robot_eyes_state.bin")
+)
+
+_SEQ = struct.Struct("<Q")
+_PAYLOAD = struct.Struct("<16s16sd")
+_PAYLOAD_OFFSET = _SEQ.size
+RECORD_SIZE = _SEQ.size + _PAYLOAD.size
+MAX_READ_RETRIES = 64
+
+
+def _encode(value: str) -> bytes:
+    return value.encode("ascii", "replace")[:16]
+
+
+def _decode(raw: bytes) -> str:
+    return raw.rstrip(b"\0").decode("ascii", "replace")
+
+
+def _open_mapping(path: str, create: bool) -> mmap.mmap | None:
+    if create:
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        fd = os.open(path, os.O_RDWR | os.O_CREAT, 0o666)
+    else:
+        try:
+            fd = os.open(path, os.O_RDWR)
+        except FileNotFoundError:
+            return None
+    try:
+        if os.fstat(fd).st_size < RECORD_SIZE:
+            if not create:
+                return None
+            os.ftruncate(fd, RECORD_SIZE)
+        return mmap.mmap(fd, RECORD_SIZE)
+    finally:
+        os.close(fd)
+
+
+class EyeStateWriter:
+    """Publishes emotion/direction updates into the shared record."""
+
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self._map = _open_mapping(path, create=True)
+
+    def publish(self, emotion: str, direction: str, timestamp: float | None = None):
+        if timestamp is None:
+            timestamp = time.time()
+        buf = self._map
+        seq = _SEQ.unpack_from(buf, 0)[0]
+        if seq & 1:  # a previous writer died mid-update; resume from even
+            seq += 1
+        _SEQ.pack_into(buf, 0, seq + 1)
+        _PAYLOAD.pack_into(buf, _PAYLOAD_OFFSET, _encode(emotion), _encode(direction), timestamp)
+        _SEQ.pack_into(buf, 0, seq + 2)
+        return seq + 2
+
+    def close(self):
+        self._map.close()
+
+
+class EyeStateReader:
+    """Lock-free reader for the shared record.
+
+    ``read()`` returns ``None`` until a writer has published at least once, so
+    callers can fall back to the JSON config file.
+    """
+
+    def __init__(self, path: str = STATE_PATH):
+        self.path = path
+        self._map = None
+        self.last_seq = 0
+        self._last = None
+
+    @property
+    def attached(self) -> bool:
+        return self._map is not None
+
+    def attach(self) -> bool:
+        """Map the state file if a writer has created it."""
+        if self._map is None:
+            self._map = _open_mapping(self.path, create=False)
+        return self._map is not None
+
+    def read(self) -> dict | None:
+        buf = self._map
+        if buf is None:
+            return None
+        for _ in range(MAX_READ_RETRIES):
+            seq = _SEQ.unpack_from(buf, 0)[0]
+            if seq == self.last_seq:
+                return self._last
+            if seq & 1:
+                continue
+            emotion, direction, timestamp = _PAYLOAD.unpack_from(buf, _PAYLOAD_OFFSET)
+            if _SEQ.unpack_from(buf, 0)[0] != seq:
+                continue
+            if seq == 0:
+                return None
+            self.last_seq = seq
+            self._last = {
+                "emotion": _decode(emotion),
+                "direction": _decode(direction),
+                "timestamp": timestamp,
+            }
+            return self._last
+        return self._last
+
+    def close(self):
+        if self._map is not None:
+            self._map.close()
+            self._map = None
@@ -5,6 +5,18 @@ import time
 import random
 import json
 import os
+import argparse
+
+from eye_sprites import (
+    LID_BOTTOM,
+    LID_TOP,
+    EyeSpriteCache,
+    draw_iris,
+    draw_outline,
+    draw_sclera,
+    eyelid_rows,
+)
+from eye_state import EyeStateReader
 
 
 WINDOW_W = 800
@@ -15,7 +27,8 @@ EYE_GAP = 120
 PUPIL_TRAVEL = EYE_RADIUS - PUPIL_RADIUS - 20  
 SMOOTHING = 0.2  # 0..1 (higher = faster response, lower = smoother)
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), 'config.json')
-CONFIG_POLL_INTERVAL = 0.5  # seconds
+CONFIG_POLL_INTERVAL = 0.5  # seconds (JSON fallback only)
+STATE_ATTACH_INTERVAL = 1.0  # seconds between attempts to map the shared state
 
 # Blinking parameters
 BLINK_MIN_INTERVAL = 3.0
@@ -23,92 +36,82 @@ BLINK_MAX_INTERVAL = 7.0
 BLINK_CLOSE_DURATION = 0.09  # seconds to close
 BLINK_HOLD_DURATION = 0.03   # eye fully closed
 BLINK_OPEN_DURATION = 0.10   # seconds to reopen
+BLINK_TOTAL_DURATION = BLINK_CLOSE_DURATION + BLINK_HOLD_DURATION + BLINK_OPEN_DURATION
 
-def ease_in_out_sine(x: float) -> float:
-    return 0.5 - 0.5 * math.cos(math.pi * x)
+# Frame pacing: frames are only rendered while something moves (blink,
+# pupil smoothing, state change); otherwise the loop sleeps until the next
+# blink, waking every IDLE_POLL_INTERVAL to check for a new emotion/direction.
+TARGET_FPS = 30
+IDLE_POLL_INTERVAL = 0.05  # seconds
+CONVERGE_EPSILON = 0.05  # pixels of pupil movement per frame considered "still"
+STATS_INTERVAL = 10.0  # seconds between [STATS] reports (0 disables)
 
-cap = None  # Camera removed for minimal version
+DIRECTION_MAP = {
+    'center': (0.0, 0.0),
+    'right': (-1.0, 0.0),
+    'left': (1.0, 0.0),
+    'up': (0.0, -1.0),
+    'down': (0.0, 1.0),
+    'upright': (-0.7, -0.7),
+    'upleft': (0.7, -0.7),
+    'downright': (-0.7, 0.7),
+    'downleft': (0.7, 0.7)
+}
 
-# Create a named window
-cv2.namedWindow('Robot Eyes', cv2.WINDOW_NORMAL)
-cv2.resizeWindow('Robot Eyes', WINDOW_W, WINDOW_H)
-
-# State for smoothing
-pupil_offset_left = np.array([0.0, 0.0])
-pupil_offset_right = np.array([0.0, 0.0])
+def ease_in_out_sine(x: float) -> float:
+    return 0.5 - 0.5 * math.cos(math.pi * x)
 
-# Blink state
-next_blink_time = time.time() + random.uniform(BLINK_MIN_INTERVAL, BLINK_MAX_INTERVAL)
-current_blink_start = None  # time when blink started
-last_config_load = 0.0
-config = {"emotion": "neutral", "direction": "center"}
 
-# Helper functions
+def blink_curve(t: float) -> float:
+    """Eyelid closure ``t`` seconds into a blink."""
+    if t < BLINK_CLOSE_DURATION:
+        return ease_in_out_sine(t / BLINK_CLOSE_DURATION)
+    if t < BLINK_CLOSE_DURATION + BLINK_HOLD_DURATION:
+        return 1.0
+    if t < BLINK_TOTAL_DURATION:
+        t_open = (t - BLINK_CLOSE_DURATION - BLINK_HOLD_DURATION) / BLINK_OPEN_DURATION
+        return ease_in_out_sine(1 - t_open)
+    return 0.0
 
-# (All gaze detection code removed for minimal build)
+# Sprite-cached renderer (see eye_sprites.py); set False to rasterise every
+# frame with draw_eye, e.g. when tweaking the drawing code.
+USE_SPRITES = True
+sprite_cache = EyeSpriteCache()
 
 
 def draw_eye(canvas, center, pupil_offset, blink_amount: float, emotion: str):
-    # Eye white
-    cv2.circle(canvas, center, EYE_RADIUS, (240, 240, 245), -1, lineType=cv2.LINE_AA)
-    cv2.circle(canvas, center, EYE_RADIUS, (60, 60, 80), 4, lineType=cv2.LINE_AA)
-
-    # Metallic radial shading (simple rings)
-    for r, alpha in [(int(EYE_RADIUS*0.85), 15), (int(EYE_RADIUS*0.6), 25)]:
-        cv2.circle(canvas, center, r, (220, 220, 230), 2, lineType=cv2.LINE_AA)
+    # Eye white, outline and metallic radial shading (simple rings)
+    draw_sclera(canvas, center, EYE_RADIUS)
 
     pupil_center = (int(center[0] + pupil_offset[0]), int(center[1] + pupil_offset[1]))
     if blink_amount < 0.98:  # hide pupil when almost fully closed
-        # Dark blue iris (BGR) - outer ring slightly brighter than inner
-        # Limbal ring (darker edge)
-        cv2.circle(canvas, pupil_center, PUPIL_RADIUS, (80, 40, 30), -1, lineType=cv2.LINE_AA)
-        # Iris color
-        cv2.circle(canvas, pupil_center, int(PUPIL_RADIUS*0.9), (220, 150, 80), -1, lineType=cv2.LINE_AA) # Bright blue
-        # Pupil
-        cv2.circle(canvas, pupil_center, int(PUPIL_RADIUS*0.45), (10, 10, 10), -1, lineType=cv2.LINE_AA)
-        # Highlight
-        highlight_center = (int(pupil_center[0] - PUPIL_RADIUS*0.3), int(pupil_center[1] - PUPIL_RADIUS*0.3))
-        cv2.circle(canvas, highlight_center, int(PUPIL_RADIUS*0.35), (255, 255, 255), -1, lineType=cv2.LINE_AA)
-
-    # Emotion adjustments (eyelid shaping)
-    # We'll modify blink_amount effective coverage and add partial lid positions.
-    emotion_upper_extra = 0.0
-    emotion_lower_extra = 0.0
-    if emotion == 'sleepy':
-        # half closed look
-        emotion_upper_extra = 0.45  # add baseline closure
-    elif emotion == 'angry':
-        emotion_upper_extra = 0.20
-    elif emotion == 'sad':
-        emotion_lower_extra = 0.20
-    elif emotion == 'surprised':
-        # widen (negative closure)
-        emotion_upper_extra = -0.15
-        emotion_lower_extra = -0.10
-
-    effective_closure = np.clip(blink_amount + max(0.0, emotion_upper_extra), 0.0, 1.0)
-    # Draw eyelid (top moving down, slight bottom assist) based on blink_amount or emotion
-    if effective_closure > 0 or emotion_lower_extra != 0 or emotion_upper_extra < 0:
-        cover_color_top = (30, 35, 50)
-        cover_color_bottom = (25, 30, 40)
-        frac = effective_closure
-        # Top eyelid: cover proportion up to full diameter
-        cover_h_top = int(frac * 2 * EYE_RADIUS)
-        y0 = center[1] - EYE_RADIUS
-        # Clip rectangle to canvas
-        y1 = min(center[1] - EYE_RADIUS + cover_h_top, center[1] + EYE_RADIUS)
-        if y1 > y0:
-            cv2.rectangle(canvas, (center[0]-EYE_RADIUS-2, y0-2), (center[0]+EYE_RADIUS+2, y1), cover_color_top, -1)
-        # Bottom eyelid: small upward movement for realism (30% of top travel)
-        base_bottom_frac = frac * 0.3 + max(0.0, emotion_lower_extra)
-        base_bottom_frac = max(0.0, base_bottom_frac + (-emotion_lower_extra if emotion_lower_extra < 0 else 0))
-        cover_h_bottom = int(base_bottom_frac * 2 * EYE_RADIUS)
-        yb0 = center[1] + EYE_RADIUS - cover_h_bottom
-        yb1 = center[1] + EYE_RADIUS
-        if yb0 < yb1:
-            cv2.rectangle(canvas, (center[0]-EYE_RADIUS-2, yb0), (center[0]+EYE_RADIUS+2, yb1+2), cover_color_bottom, -1)
+        # Dark blue iris (BGR): limbal ring, iris colour, pupil, highlight
+        draw_iris(canvas, pupil_center, PUPIL_RADIUS)
+
+    # Emotion adjustments (eyelid shaping): emotions add baseline closure on
+    # top of blink_amount or raise the lower lid.
+    active, top_rows, bottom_rows = eyelid_rows(center[1], EYE_RADIUS, blink_amount, emotion)
+    if active:
+        if top_rows is not None:
+            cv2.rectangle(canvas, (center[0]-EYE_RADIUS-2, top_rows[0]), (center[0]+EYE_RADIUS+2, top_rows[1]), LID_TOP, -1)
+        if bottom_rows is not None:
+            cv2.rectangle(canvas, (center[0]-EYE_RADIUS-2, bottom_rows[0]), (center[0]+EYE_RADIUS+2, bottom_rows[1]), LID_BOTTOM, -1)
         # Re-draw eye border outline on top
-        cv2.circle(canvas, center, EYE_RADIUS, (60, 60, 80), 4, lineType=cv2.LINE_AA)
+        draw_outline(canvas, center, EYE_RADIUS)
+
+
+def render_eye(canvas, center, pupil_offset, blink_amount: float, emotion: str):
+    if not (USE_SPRITES and sprite_cache.draw_eye(
+            canvas, center, pupil_offset, blink_amount, emotion, EYE_RADIUS, PUPIL_RADIUS)):
+        draw_eye(canvas, center, pupil_offset, blink_amount, emotion)
+
+
+def eye_centers():
+    center_y = WINDOW_H // 2
+    center_x = WINDOW_W // 2
+    left_center = (center_x - EYE_GAP//2 - EYE_RADIUS, center_y)
+    right_center = (center_x + EYE_GAP//2 + EYE_RADIUS, center_y)
+    return left_center, right_center
 
 
 def map_direction_vec(vec2):
@@ -119,77 +122,147 @@ def map_direction_vec(vec2):
         v /= norm
     return v * scale
 
-try:
-    while True:
-        # --- Blink state update ---
-        now = time.time()
-        blink_amount = 0.0
-        if current_blink_start is None and now >= next_blink_time:
-            current_blink_start = now
-        if current_blink_start is not None:
-            t = now - current_blink_start
-            total = BLINK_CLOSE_DURATION + BLINK_HOLD_DURATION + BLINK_OPEN_DURATION
-            if t < BLINK_CLOSE_DURATION:
-                blink_amount = ease_in_out_sine(t / BLINK_CLOSE_DURATION)
-            elif t < BLINK_CLOSE_DURATION + BLINK_HOLD_DURATION:
-                blink_amount = 1.0
-            elif t < total:
-                t_open = (t - BLINK_CLOSE_DURATION - BLINK_HOLD_DURATION) / BLINK_OPEN_DURATION
-                blink_amount = ease_in_out_sine(1 - t_open)
+
+class RenderStats:
+    """Frame-time and CPU accounting for the periodic [STATS] report."""
+
+    def __init__(self):
+        self.reset(time.perf_counter())
+
+    def reset(self, now: float):
+        self.window_start = now
+        self.cpu_start = time.process_time()
+        self.frame_times = []
+
+    def add_frame(self, seconds: float):
+        self.frame_times.append(seconds)
+
+    def report(self, now: float) -> str:
+        wall = now - self.window_start
+        cpu = time.process_time() - self.cpu_start
+        ft = sorted(self.frame_times)
+        n = len(ft)
+        if n:
+            avg = sum(ft) / n * 1000
+            p95 = ft[min(n - 1, int(n * 0.95))] * 1000
+            worst = ft[-1] * 1000
+        else:
+            avg = p95 = worst = 0.0
+        line = (f"[STATS] {n / wall:5.1f} fps drawn, cpu {100 * cpu / wall:5.1f}%, "
+                f"frame avg {avg:.2f} ms p95 {p95:.2f} ms max {worst:.2f} ms")
+        self.reset(now)
+        return line
+
+
+def main(target_fps: float = TARGET_FPS, stats_interval: float = STATS_INTERVAL):
+    # Create a named window
+    cv2.namedWindow('Robot Eyes', cv2.WINDOW_NORMAL)
+    cv2.resizeWindow('Robot Eyes', WINDOW_W, WINDOW_H)
+
+    frame_period = 1.0 / target_fps
+    canvas = np.zeros((WINDOW_H, WINDOW_W, 3), dtype=np.uint8)
+    left_center, right_center = eye_centers()
+    targets = {name: map_direction_vec(vec) for name, vec in DIRECTION_MAP.items()}
+
+    # State for smoothing (both eyes always look the same way)
+    pupil_offset = np.array([0.0, 0.0])
+
+    # Blink state
+    next_blink_time = time.time() + random.uniform(BLINK_MIN_INTERVAL, BLINK_MAX_INTERVAL)
+    current_blink_start = None  # time when blink started
+    last_config_load = 0.0
+    last_state_attach = 0.0
+    config = {"emotion": "neutral", "direction": "center"}
+    state_reader = EyeStateReader()
+
+    drawn_state = None  # (emotion, blink_amount, pupil px) last shown
+    settled = False  # pupil converged; nothing to animate until state changes
+    stats = RenderStats()
+    next_stats = time.perf_counter() + stats_interval
+
+    try:
+        while True:
+            frame_start = time.perf_counter()
+            # --- Blink state update ---
+            now = time.time()
+            blink_amount = 0.0
+            if current_blink_start is None and now >= next_blink_time:
+                current_blink_start = now
+            if current_blink_start is not None:
+                t = now - current_blink_start
+                if t < BLINK_TOTAL_DURATION:
+                    blink_amount = blink_curve(t)
+                else:
+                    current_blink_start = None
+                    next_blink_time = now + random.uniform(BLINK_MIN_INTERVAL, BLINK_MAX_INTERVAL)
+
+            # Shared-memory state is read every frame; the JSON file is only
+            # polled until a writer has published into the shared record.
+            if not state_reader.attached and now - last_state_attach >= STATE_ATTACH_INTERVAL:
+                state_reader.attach()
+                last_state_attach = now
+            shared_state = state_reader.read()
+            if shared_state is not None:
+                new_config = shared_state
+            elif now - last_config_load >= CONFIG_POLL_INTERVAL:
+                new_config = config
+                try:
+                    with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
+                        new_config = json.load(f)
+                except Exception:
+                    pass
+                last_config_load = now
             else:
-                blink_amount = 0.0
-                current_blink_start = None
-                next_blink_time = now + random.uniform(BLINK_MIN_INTERVAL, BLINK_MAX_INTERVAL)
-
-        # Reload config periodically
-        if now - last_config_load >= CONFIG_POLL_INTERVAL:
-            try:
-                with open(CONFIG_PATH, 'r', encoding='utf-8') as f:
-                    config = json.load(f)
-            except Exception:
-                pass
-            last_config_load = now
-
-        direction = config.get('direction', 'center')
-        emotion = config.get('emotion', 'neutral')
-
-        # Smoothly return to center before applying direction
-        pupil_offset_left *= (1 - SMOOTHING)
-        pupil_offset_right *= (1 - SMOOTHING)
-
-        canvas = np.zeros((WINDOW_H, WINDOW_W, 3), dtype=np.uint8)
-        canvas[:] = (0, 0, 0)
-
-        # Compute eye centers
-        center_y = WINDOW_H // 2
-        center_x = WINDOW_W // 2
-        left_center = (center_x - EYE_GAP//2 - EYE_RADIUS, center_y)
-        right_center = (center_x + EYE_GAP//2 + EYE_RADIUS, center_y)
-
-        # Apply direction override
-        direction_map = {
-            'center': (0.0, 0.0),
-            'right': (-1.0, 0.0),
-            'left': (1.0, 0.0),
-            'up': (0.0, -1.0),
-            'down': (0.0, 1.0),
-            'upright': (-0.7, -0.7),
-            'upleft': (0.7, -0.7),
-            'downright': (-0.7, 0.7),
-            'downleft': (0.7, 0.7)
-        }
-        if direction in direction_map:
-            target = map_direction_vec(direction_map[direction])
-            pupil_offset_left = (1-SMOOTHING)*pupil_offset_left + SMOOTHING*target
-            pupil_offset_right = (1-SMOOTHING)*pupil_offset_right + SMOOTHING*target
-
-        draw_eye(canvas, left_center, pupil_offset_left, blink_amount, emotion)
-        draw_eye(canvas, right_center, pupil_offset_right, blink_amount, emotion)
-
-        cv2.imshow('Robot Eyes', canvas)
-        key = cv2.waitKey(1) & 0xFF
-        if key == ord('q'):
-            break
-finally:
-    # No resources to release beyond OpenCV windows
-    cv2.destroyAllWindows()
+                new_config = config
+            if new_config is not config:
+                if (new_config.get('emotion'), new_config.get('direction')) != (config.get('emotion'), config.get('direction')):
+                    settled = False
+                config = new_config
+
+            direction = config.get('direction', 'center')
+            emotion = config.get('emotion', 'neutral')
+
+            # Smoothly return to center before applying direction
+            if not settled:
+                previous = pupil_offset
+                pupil_offset = pupil_offset * (1 - SMOOTHING)
+                target = targets.get(direction)
+                if target is not None:
+                    pupil_offset = (1-SMOOTHING)*pupil_offset + SMOOTHING*target
+                settled = float(np.abs(pupil_offset - previous).max()) < CONVERGE_EPSILON
+
+            state = (emotion, blink_amount, int(pupil_offset[0]), int(pupil_offset[1]))
+            if state != drawn_state:
+                if not USE_SPRITES:
+                    canvas[:] = 0
+                render_eye(canvas, left_center, pupil_offset, blink_amount, emotion)
+                render_eye(canvas, right_center, pupil_offset, blink_amount, emotion)
+                cv2.imshow('Robot Eyes', canvas)
+                drawn_state = state
+                stats.add_frame(time.perf_counter() - frame_start)
+
+            # Sleep until the next frame while animating, otherwise until the
+            # next blink (bounded so state changes are picked up promptly).
+            if current_blink_start is not None or not settled:
+                wait = frame_period - (time.perf_counter() - frame_start)
+            else:
+                wait = min(next_blink_time - time.time(), IDLE_POLL_INTERVAL)
+            key = cv2.waitKey(max(1, int(wait * 1000))) & 0xFF
+            if key == ord('q'):
+                break
+
+            if stats_interval > 0 and time.perf_counter() >= next_stats:
+                print(stats.report(time.perf_counter()))
+                next_stats += stats_interval
+    finally:
+        state_reader.close()
+        cv2.destroyAllWindows()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Robot eyes renderer")
+    parser.add_argument("--fps", type=float, default=TARGET_FPS, help="target frame rate while animating")
+    parser.add_argument("--stats-interval", type=float, default=STATS_INTERVAL,
+                        help="seconds between [STATS] reports, 0 to disable")
+    args = parser.parse_args()
+    main(target_fps=args.fps, stats_interval=args.stats_interval)
@@ -0,0 +1,105 @@
+"""Preallocated PCM ring buffer between a PyAudio callback and asyncio.
+
+PyAudio runs the stream callback on its own thread. The callback is the only
+writer and the asyncio task is the only reader, so the buffer needs no lock:
+each side owns one monotonically increasing byte counter and only publishes
+it after its copy is complete. When the ring is full, incoming audio is
+dropped and counted (``ring_drops``: the consumer fell behind) instead of
+silently overwriting unread data. Overflows the device itself reports are
+counted separately in ``device_overflows`` by the producer.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+
+
+class PcmRingBuffer:
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._buf = bytearray(capacity)
+        self._written = 0  # total bytes written, owned by the producer
+        self._read = 0  # total bytes read, owned by the consumer
+        self._loop = None
+        self._ready = None
+        self._wanted = 0  # bytes the consumer is waiting for, 0 if not waiting
+        self.ring_drops = 0  # producer writes dropped because the ring was full
+        self.device_overflows = 0  # input overflows reported by the device (PyAudio status flag)
+        self.dropped_bytes = 0
+        self.underruns = 0  # consumer waits that timed out without enough data
+        self.last_write_time = 0.0  # perf_counter() when the producer last published
+
+    def bind(self, loop: asyncio.AbstractEventLoop):
+        """Attach the event loop the consumer awaits on."""
+        self._loop = loop
+        self._ready = asyncio.Event()
+
+    def available(self) -> int:
+        return self._written - self._read
+
+    def write(self, data: bytes) -> bool:
+        """Producer side; safe to call from the PyAudio callback thread."""
+        n = len(data)
+        if n > self.capacity - (self._written - self._read):
+            self.ring_drops += 1
+            self.dropped_bytes += n
+            return False
+        start = self._written % self.capacity
+        first = min(n, self.capacity - start)
+        self._buf[start:start + first] = data[:first]
+        if first < n:
+            self._buf[:n - first] = data[first:]
+        self._written += n
+        self.last_write_time = time.perf_counter()
+        wanted = self._wanted
+        if wanted and self._written - self._read >= wanted:
+            self._wanted = 0
+            self._loop.call_soon_threadsafe(self._ready.set)
+        return True
+
+    def read(self, n: int) -> bytes:
+        """Consumer side; returns up to ``n`` bytes."""
+        n = min(n, self._written - self._read)
+        start = self._read % self.capacity
+        first = min(n, self.capacity - start)
+        data = bytes(self._buf[start:start + first])
+        if first < n:
+            data += self._buf[:n - first]
+        self._read += n
+        return data
+
+    def age(self, n: int, bytes_per_second: float) -> float:
+        """Seconds since the oldest of the last ``n`` bytes read was captured.
+
+        Assumes the producer writes in real time, so the unread backlog and
+        the batch itself lie directly before the most recent write.
+        """
+        backlog = self._written - self._read
+        return time.perf_counter() - self.last_write_time + (backlog + n) / bytes_per_second
+
+    async def read_batch(self, n: int, timeout: float | None = None) -> bytes:
+        """Wait until ``n`` bytes are buffered and return them.
+
+        Each wait that exceeds ``timeout`` counts as an underrun (the device
+        stopped delivering); waiting then continues.
+        """
+        while self.available() < n:
+            self._ready.clear()
+            self._wanted = n
+            if self.available() >= n:  # producer raced us before seeing _wanted
+                self._wanted = 0
+                break
+            try:
+                await asyncio.wait_for(self._ready.wait(), timeout)
+            except TimeoutError:
+                self.underruns += 1
+        return self.read(n)
+
+    def stats(self) -> dict:
+        return {
+            "buffered_bytes": self.available(),
+            "device_overflows": self.device_overflows,
+            "ring_drops": self.ring_drops,
+            "dropped_bytes": self.dropped_bytes,
+            "underruns": self.underruns,
+        }
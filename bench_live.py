@@ -0,0 +1,126 @@
+"""End-to-end benchmark of AudioLoop against the local Live stand-in.
+
+Runs the real ``AudioLoop`` (VAD, send lanes, video gate and encoder, tool
+executor, jitter buffer) with fake mic, speaker and camera devices and a
+``FakeLiveClient`` replaying scripted model turns, then prints throughput and
+per-stage latency. No network, audio hardware or camera is needed::
+
+    python bench_live.py --seconds 20
+    python bench_live.py --video none --vad off --json
+    python bench_live.py --uplink-kbps 400    # congested link: watch the video level
+"""
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import time
+
+import core
+from fake_live import DEFAULT_SCRIPT, FakeCamera, FakeLiveClient, FakeMic, FakeSpeaker, LatencyProbe
+from history_log import ConversationHistory
+from vad import MODES as VAD_MODES, VoiceActivityGate
+
+
+class BenchAudioLoop(core.AudioLoop):
+    """AudioLoop on fake devices that ends after ``seconds`` instead of on 'q'."""
+
+    def __init__(self, probe: LatencyProbe, seconds: float, **kwargs):
+        super().__init__(**kwargs)
+        self.probe = probe
+        self.seconds = seconds
+
+    def _open_mic(self):
+        return FakeMic(self._mic_callback, self.probe, chunk_size=core.CHUNK_SIZE,
+                       sample_rate=core.SEND_SAMPLE_RATE)
+
+    def _open_speaker(self):
+        return FakeSpeaker(self.probe, sample_rate=core.RECEIVE_SAMPLE_RATE)
+
+    def _open_capture(self):
+        return FakeCamera(self.probe)
+
+    async def send_text(self):
+        await asyncio.sleep(self.seconds)
+
+
+async def run_benchmark(seconds: float = 15.0, video_mode: str = "camera", vad_mode: str = "gate",
+                        script: list | None = None, user_turn_ms: int = 2000, uplink_kbps: float | None = None,
+                        **loop_options) -> dict:
+    probe = LatencyProbe()
+    client = FakeLiveClient(script or DEFAULT_SCRIPT, probe, user_turn_ms=user_turn_ms, uplink_kbps=uplink_kbps)
+    vad = VoiceActivityGate(mode=vad_mode, sample_rate=core.SEND_SAMPLE_RATE, chunk_size=core.CHUNK_SIZE)
+    loop = BenchAudioLoop(probe, seconds, video_mode=video_mode, vad=vad, client=client,
+                          history=ConversationHistory(None), reconnect_attempts=0, **loop_options)
+    start = time.perf_counter()
+    await loop.run()
+    elapsed = time.perf_counter() - start
+    loop.tool_executor.shutdown()
+
+    counters = dict(probe.counters)
+    return {
+        "seconds": elapsed,
+        "video": video_mode,
+        "vad": vad_mode,
+        "throughput": {
+            "uplink_audio_kbps": 8 * counters.get("uplink_audio_bytes", 0) / elapsed / 1000,
+            "uplink_audio_msgs_per_s": counters.get("uplink_audio_messages", 0) / elapsed,
+            "uplink_frames_per_s": counters.get("uplink_frames", 0) / elapsed,
+            "uplink_frame_kbps": 8 * counters.get("uplink_frame_bytes", 0) / elapsed / 1000,
+            "model_turns": counters.get("model_turns", 0),
+            "tool_calls": counters.get("tool_calls", 0),
+            "tool_timeouts": counters.get("tool_timeouts", 0),
+            "downlink_audio_s": counters.get("downlink_audio_bytes", 0) / (core.RECEIVE_SAMPLE_RATE * core.SAMPLE_WIDTH),
+            "played_audio_s": counters.get("speaker_bytes", 0) / (core.RECEIVE_SAMPLE_RATE * core.SAMPLE_WIDTH),
+        },
+        "latency": probe.summary(),
+        "stages": loop.metrics.snapshot(),
+        "playback": loop.playback_buffer.stats(),
+        "uplink_lanes": loop.send_scheduler.stats() if loop.send_scheduler else {},
+        "video_controller": loop.video_controller.stats() if loop.video_controller else None,
+    }
+
+
+def print_report(result: dict):
+    print(f"[BENCH] {result['seconds']:.1f}s video={result['video']} vad={result['vad']}")
+    for name, value in result["throughput"].items():
+        print(f"[BENCH]   {name:<24} {value:10.2f}")
+    print(f"[BENCH]   {'stage':<38} {'count':>6} {'p50':>8} {'p95':>8} {'p99':>8} {'max':>8}  (ms)")
+    for stage, st in result["latency"].items():
+        print(f"[BENCH]   {stage:<38} {st['count']:>6} {st['p50_ms']:>8.1f} {st['p95_ms']:>8.1f} "
+              f"{st['p99_ms']:>8.1f} {st['max_ms']:>8.1f}")
+    print(f"[BENCH]   {'pipeline stage':<38} {'count':>6} {'p50':>8} {'p90':>8} {'p99':>8} {'max':>8}  (ms)")
+    for stage, st in result["stages"].items():
+        print(f"[BENCH]   {stage:<38} {st['count']:>6} {st['p50_ms']:>8.1f} {st['p90_ms']:>8.1f} "
+              f"{st['p99_ms']:>8.1f} {st['max_ms']:>8.1f}")
+    playback = result["playback"]
+    print(f"[BENCH]   playback underruns={playback['underruns']} dropped_bytes={playback['dropped_bytes']} "
+          f"max_buffered={playback['max_buffered_ms']:.0f}ms")
+    video = result["video_controller"]
+    if video:
+        print(f"[BENCH]   video level={video['level']}/{video['levels'] - 1} interval={video['interval']}s "
+              f"max_dimension={video['max_dimension']} quality={video['quality']} "
+              f"steps down={video['steps_down']} up={video['steps_up']}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--seconds", type=float, default=15.0, help="benchmark duration")
+    parser.add_argument("--video", choices=core.VIDEO_MODES, default="camera")
+    parser.add_argument("--vad", choices=VAD_MODES, default="gate")
+    parser.add_argument("--user-turn-ms", type=int, default=2000,
+                        help="realtime audio the stand-in treats as a finished user turn")
+    parser.add_argument("--script", help="JSON file with a list of scripted model turns")
+    parser.add_argument("--uplink-kbps", type=float, help="simulate an uplink of this rate")
+    parser.add_argument("--json", action="store_true", help="print the result as JSON")
+    args = parser.parse_args()
+    script = None
+    if args.script:
+        with open(args.script, "r", encoding="utf-8") as f:
+            script = json.load(f)
+    result = asyncio.run(run_benchmark(args.seconds, args.video, args.vad, script, args.user_turn_ms,
+                                       args.uplink_kbps))
+    if args.json:
+        print(json.dumps(result, indent=2))
+    else:
+        print_report(result)
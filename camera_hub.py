@@ -0,0 +1,269 @@
+"""One camera, many consumers.
+
+``CameraHub`` owns the only capture device. A capture thread decodes each
+frame straight into the next slot of a ``FrameRing`` in shared memory, and
+every consumer reads from that ring at its own pace:
+
+* in-process consumers (the Live uplink, the preview) call
+  ``hub.subscribe(name, fps)``. ``FrameSubscriber.get()`` waits until the
+  consumer is due and then copies the newest frame, so a slow consumer
+  skips frames instead of queueing them and never holds up the camera or
+  the other consumers.
+* other processes (the face recognizer) attach to the same ring by name
+  with ``FrameRing(*hub.ring.spec())`` and read it the same way.
+
+``FrameRing`` guards each slot with its sequence number in a shared header:
+writers mark the slot busy before writing and publish the new sequence (and
+the capture time) after, readers copy the slot and re-check the sequence,
+discarding torn frames.
+"""
+from __future__ import annotations
+
+import threading
+import time
+from multiprocessing import shared_memory
+
+import numpy as np
+
+FRAME_SHAPE = (480, 640, 3)
+RING_SLOTS = 4
+CAPTURE_FPS = 30.0  # upper bound; a camera that delivers fewer frames paces itself
+BUSY = -1
+
+
+class FrameRing:
+    """Fixed-size ring of frames in shared memory with a per-slot sequence header."""
+
+    def __init__(self, shape=FRAME_SHAPE, slots: int = RING_SLOTS, name: str | None = None):
+        self.shape = tuple(shape)
+        self.slots = slots
+        frame_bytes = int(np.prod(self.shape))
+        header_bytes = 8 * (slots + 1)
+        stamp_bytes = 8 * slots
+        create = name is None
+        self.shm = shared_memory.SharedMemory(name=name, create=create,
+                                              size=header_bytes + stamp_bytes + slots * frame_bytes)
+        self.owner = create
+        # header[0]: latest published sequence; header[1 + i]: sequence in slot i.
+        self.header = np.ndarray((slots + 1,), dtype=np.int64, buffer=self.shm.buf)
+        # stamps[i]: time.perf_counter() at capture of the frame in slot i.
+        self.stamps = np.ndarray((slots,), dtype=np.float64, buffer=self.shm.buf, offset=header_bytes)
+        self.frames = np.ndarray((slots,) + self.shape, dtype=np.uint8, buffer=self.shm.buf,
+                                 offset=header_bytes + stamp_bytes)
+        if create:
+            self.header[:] = BUSY
+        self._next = int(self.header[0]) + 1
+
+    @property
+    def name(self) -> str:
+        return self.shm.name
+
+    def spec(self) -> tuple:
+        """Arguments for attaching to this ring from another process."""
+        return self.shape, self.slots, self.name
+
+    def begin_write(self):
+        """Return ``(seq, slot view)`` to fill in place, e.g. ``cap.read(view)``."""
+        seq = self._next
+        slot = seq % self.slots
+        self.header[1 + slot] = BUSY
+        return seq, self.frames[slot]
+
+    def commit(self, seq: int, captured: float | None = None):
+        slot = seq % self.slots
+        self.stamps[slot] = time.perf_counter() if captured is None else captured
+        self.header[1 + slot] = seq
+        self.header[0] = seq
+        self._next = seq + 1
+
+    def write(self, frame, captured: float | None = None) -> int:
+        seq, view = self.begin_write()
+        view[...] = frame
+        self.commit(seq, captured)
+        return seq
+
+    def latest(self) -> int:
+        return int(self.header[0])
+
+    def read_stamped(self, seq: int | None = None, out=None):
+        """Like ``read()``, returning ``(seq, frame, capture time)``."""
+        if seq is None:
+            seq = self.latest()
+        if seq < 0:
+            return None, None, None
+        slot = seq % self.slots
+        if self.header[1 + slot] != seq:
+            return None, None, None  # overwritten already
+        if out is None:
+            out = np.empty(self.shape, dtype=np.uint8)
+        out[...] = self.frames[slot]
+        captured = float(self.stamps[slot])
+        if self.header[1 + slot] != seq:
+            return None, None, None  # overwritten while copying
+        return seq, out, captured
+
+    def read(self, seq: int | None = None, out=None):
+        """Copy frame ``seq`` (default: newest); returns ``(seq, frame)`` or ``(None, None)``."""
+        seq, out, _ = self.read_stamped(seq, out)
+        return seq, out
+
+    def close(self):
+        del self.header, self.stamps, self.frames
+        self.shm.close()
+        if self.owner:
+            self.shm.unlink()
+
+
+class FrameSubscriber:
+    """One consumer's view of a ``CameraHub``: newest frame, at most ``fps`` per second."""
+
+    def __init__(self, hub: CameraHub, name: str, fps: float | None = None):
+        self.hub = hub
+        self.name = name
+        self.interval = 1.0 / fps if fps else 0.0
+        self.last_seq = -1
+        self.delivered = 0
+        self.skipped = 0  # frames published while this consumer was busy or not due
+        self.closed = False
+        self._due = time.monotonic()
+        self._buffer = None  # reused copy target
+
+    def get(self, timeout: float | None = None):
+        """Wait until due, then return ``(seq, frame, capture time)``.
+
+        Returns ``(None, None, None)`` on timeout, or when the hub or this
+        subscriber was closed. The frame buffer is reused by the next call.
+        """
+        deadline = None if timeout is None else time.monotonic() + timeout
+        delay = self._due - time.monotonic()
+        if delay > 0:
+            if deadline is not None and self._due > deadline:
+                self.hub.stopped.wait(timeout)
+                return None, None, None
+            self.hub.stopped.wait(delay)
+        while True:
+            if not self.hub.wait_frame(self.last_seq, None if deadline is None else deadline - time.monotonic()):
+                return None, None, None
+            if self.closed:
+                return None, None, None
+            ring = self.hub.ring
+            if self._buffer is None or self._buffer.shape != ring.shape:
+                self._buffer = np.empty(ring.shape, dtype=np.uint8)
+            seq, frame, captured = ring.read_stamped(out=self._buffer)
+            if seq is not None:
+                break  # else the slot was overwritten while copying: take the next one
+        if self.last_seq >= 0:
+            self.skipped += max(0, seq - self.last_seq - 1)
+        self.last_seq = seq
+        self.delivered += 1
+        now = time.monotonic()
+        self._due = max(self._due + self.interval, now) if self.interval else now
+        return seq, frame, captured
+
+    def stats(self) -> dict:
+        return {"delivered": self.delivered, "skipped": self.skipped,
+                "fps_limit": 1.0 / self.interval if self.interval else None}
+
+    def close(self):
+        self.closed = True
+        self.hub.unsubscribe(self)
+
+
+class CameraHub:
+    """Owns one capture device and publishes its frames to any number of consumers."""
+
+    def __init__(self, capture, fps: float = CAPTURE_FPS, slots: int = RING_SLOTS, metrics=None):
+        self.capture = capture  # anything with cv2.VideoCapture's read()/release()
+        self.interval = 1.0 / fps if fps else 0.0
+        self.slots = slots
+        self.metrics = metrics  # PipelineMetrics; records camera.read
+        self.ring = None  # created from the first frame's shape
+        self.subscribers = {}
+        self.frames = 0
+        self.stopped = threading.Event()
+        self._cond = threading.Condition()
+        self._thread = None
+
+    def start(self) -> CameraHub:
+        self._thread = threading.Thread(target=self._run, name="camera-hub", daemon=True)
+        self._thread.start()
+        return self
+
+    def _read(self):
+        start = time.perf_counter()
+        if self.ring is None:
+            ret, frame = self.capture.read()
+            if ret:
+                self.ring = FrameRing(frame.shape, self.slots)
+                self.ring.write(frame, time.perf_counter())
+        else:
+            seq, view = self.ring.begin_write()
+            ret, frame = self.capture.read(view)
+            if ret:
+                if frame.ctypes.data != view.ctypes.data:
+                    # The device allocated its own image (e.g. it changed size).
+                    if frame.shape == view.shape:
+                        view[...] = frame
+                    else:
+                        import cv2
+
+                        cv2.resize(frame, (view.shape[1], view.shape[0]), dst=view)
+                self.ring.commit(seq, time.perf_counter())
+        if ret and self.metrics is not None:
+            self.metrics.since("camera.read", start)
+        return ret
+
+    def _run(self):
+        next_read = time.monotonic()
+        try:
+            while not self.stopped.is_set():
+                if self.interval:
+                    delay = next_read - time.monotonic()
+                    if delay > 0 and self.stopped.wait(delay):
+                        break
+                    next_read = max(next_read + self.interval, time.monotonic())
+                if not self._read():
+                    break  # camera stopped delivering
+                self.frames += 1
+                with self._cond:
+                    self._cond.notify_all()
+        finally:
+            self.stopped.set()
+            with self._cond:
+                self._cond.notify_all()
+
+    def wait_frame(self, after: int, timeout: float | None = None) -> bool:
+        """Block until a frame newer than ``after`` is published; False if stopped or timed out."""
+        with self._cond:
+            return self._cond.wait_for(
+                lambda: self.stopped.is_set() or (self.ring is not None and self.ring.latest() > after),
+                timeout,
+            ) and not self.stopped.is_set()
+
+    def wait_ready(self, timeout: float | None = None) -> bool:
+        """Block until the ring exists (the first frame arrived); needed before ``ring.spec()``."""
+        return self.wait_frame(-1, timeout)
+
+    def subscribe(self, name: str, fps: float | None = None) -> FrameSubscriber:
+        subscriber = FrameSubscriber(self, name, fps)
+        self.subscribers[name] = subscriber
+        return subscriber
+
+    def unsubscribe(self, subscriber: FrameSubscriber):
+        if self.subscribers.get(subscriber.name) is subscriber:
+            del self.subscribers[subscriber.name]
+        with self._cond:
+            self._cond.notify_all()
+
+    def stats(self) -> dict:
+        return {"frames": self.frames, **{name: s.stats() for name, s in self.subscribers.items()}}
+
+    def close(self):
+        """Stop capturing and release the device; blocks until the capture thread exits."""
+        self.stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+        self.capture.release()
+        if self.ring is not None:
+            self.ring.close()
+            self.ring = None
@@ -1,33 +1,78 @@
 import os
+import time
 import asyncio
-import base64
-import io
+import threading
 import traceback
+from concurrent.futures import ThreadPoolExecutor
+
+_import_start = time.perf_counter()
 
-import cv2
-import pyaudio
-import PIL.Image
-import mss
 import instruction as ins
 import argparse
 
-from google import genai
-from google.genai import types
-from tools_runner import *
-from move_function import robot_leg_movement
-FORMAT = pyaudio.paInt16
+# cv2, mss, the camera hub, the google-genai SDK, tools_runner and PyAudio are
+# loaded on first use so that startup (and --video none) does not pay for them.
+from frame_encoder import FrameEncoder, JPEG_QUALITY, MAX_DIMENSION, BACKENDS
+from scene_gate import SceneChangeGate, CHANGE_THRESHOLD, KEEPALIVE_INTERVAL
+from screen_capture import ScreenCapture, TileChangeGate, parse_region, MONITOR as SCREEN_MONITOR, MIN_CHANGED_TILES
+from video_controller import VideoController, LEVELS as VIDEO_LEVELS, MAX_INTERVAL, MIN_DIMENSION, MIN_QUALITY
+from audio_ring import PcmRingBuffer
+from send_scheduler import SendScheduler
+from startup import StartupTimeline, ImportTimer
+from pipeline_metrics import PipelineMetrics, EXPORT_INTERVAL as METRICS_INTERVAL
+from history_log import ConversationHistory, MAX_ENTRIES as HISTORY_SIZE
+from tool_executor import ToolExecutor
+from jitter_buffer import PlaybackBuffer, PREFILL_MS, MAX_MS
+from vad import VoiceActivityGate, MODES as VAD_MODES, HANGOVER_MS, PREROLL_MS
+
+IMPORT_SECONDS = time.perf_counter() - _import_start
+
 CHANNELS = 1
 SEND_SAMPLE_RATE = 16000
 RECEIVE_SAMPLE_RATE = 24000
 CHUNK_SIZE = 1024
+SAMPLE_WIDTH = 2  # bytes per paInt16 sample
+# PortAudio callback constants, so fake devices can drive _mic_callback
+# without loading PyAudio.
+PA_CONTINUE = 0  # pyaudio.paContinue
+PA_INPUT_OVERFLOW = 0x2  # pyaudio.paInputOverflow
+MIC_BATCH_CHUNKS = 1  # CHUNK_SIZE blocks drained from the mic ring per send
+MIC_RING_SECONDS = 2.0  # capture buffered before the ring overflows
+AUDIO_STATS_INTERVAL = 10.0  # seconds between [AUDIO] overflow checks
+UPLINK_STATS_INTERVAL = 30.0  # seconds between [UPLINK] lane reports
 
 MODEL = "models/gemini-2.5-flash-live-preview"
 
+RECONNECT_ATTEMPTS = 3
+RECONNECT_DELAY = 2.0  # seconds
+
+HISTORY_LOG = os.path.join(os.path.dirname(os.path.abspath(__file__)), "logs", "conversation.log")
+
+VIDEO_MODES = ("camera", "screen", "none")
+FRAME_INTERVAL = 1.0  # seconds between frames taken from the camera hub or screen for the model
+VIDEO_STATS_INTERVAL = 60.0  # seconds between [VIDEO] counter logs
+FRAME_UNCHANGED = object()  # _get_frame result for frames the scene gate skipped
+FACE_FPS = 5.0  # frames per second the face recognizer takes from the camera hub
+FACE_POLL_INTERVAL = 0.2  # seconds between checks for new recognition results
+FACE_CONTEXT_INTERVAL = 2.0  # minimum seconds between "who is in view" messages
+PREVIEW_FPS = 15.0
+FACE_BACKENDS = ("lbph", "embedding")  # face_index.BACKENDS, without importing OpenCV here
+
+
+_client = None
+
+
+def get_client():
+    global _client
+    if _client is None:
+        from google import genai
+
+        _client = genai.Client(
+            http_options={"api_version": "v1beta"},
+            api_key='',
+        )
+    return _client
 
-client = genai.Client(
-    http_options={"api_version": "v1beta"},
-    api_key='',
-)
 
 facial_emotion_update = {
     "name": "facial_emotion_update",
@@ -51,62 +96,185 @@ facial_emotion_update = {
 
 robot_leg_movement={
     "name":"robot_leg_movement",
-    "description":"moves the robot to specific direction",
+    "description":"moves the robot to specific direction; returns a command_id as soon as the move is queued",
     "parameters":{
         "type":"object",
             "properties":{
                 "direction": {
                 "type": "string",
                 "description": "The direction robot needs to move i.e front,back,left or right",
+            },
+                "autonomous": {
+                "type": "boolean",
+                "description": "true for self-initiated patrol moves, false (default) when the user asked for the move",
             },
             }
         }
     }
 
 
-tools = [
-    types.Tool(google_search=types.GoogleSearch()),
-    types.Tool(
-        function_declarations=[facial_emotion_update]
-    ),
-    types.Tool(
-        function_declarations=[robot_leg_movement]
-    )
-]
-
-CONFIG = types.LiveConnectConfig(
-    response_modalities=[
-        "AUDIO",
-    ],
-    media_resolution="MEDIA_RESOLUTION_MEDIUM",
-    speech_config=types.SpeechConfig(
-        language_code="en-US",
-        voice_config=types.VoiceConfig(
-            prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name="Aoede")
+robot_motion_status={
+    "name":"robot_motion_status",
+    "description":"reports whether a queued movement is queued, sent, done, failed or cancelled",
+    "parameters":{
+        "type":"object",
+        "properties":{
+            "command_id":{
+                "type":"integer",
+                "description":"command_id returned by robot_leg_movement",
+            },
+        },
+        "required":["command_id"],
+    }
+}
+
+
+_config = None
+
+
+def base_config():
+    """Session config; built (importing the genai SDK) on first use."""
+    global _config
+    if _config is not None:
+        return _config
+    from google.genai import types
+
+    tools = [
+        types.Tool(google_search=types.GoogleSearch()),
+        types.Tool(
+            function_declarations=[facial_emotion_update]
+        ),
+        types.Tool(
+            function_declarations=[robot_leg_movement, robot_motion_status]
         )
-    ),
-    realtime_input_config=types.RealtimeInputConfig(turn_coverage="TURN_INCLUDES_ALL_INPUT"),
-    context_window_compression=types.ContextWindowCompressionConfig(
-        trigger_tokens=25600,
-        sliding_window=types.SlidingWindow(target_tokens=12800),
-    ),
-    tools=tools,
-    system_instruction=tuple(ins.instructions),
+    ]
+    
+    _config = types.LiveConnectConfig(
+        response_modalities=[
+            "AUDIO",
+        ],
+        media_resolution="MEDIA_RESOLUTION_MEDIUM",
+        speech_config=types.SpeechConfig(
+            language_code="en-US",
+            voice_config=types.VoiceConfig(
+                prebuilt_voice_config=types.PrebuiltVoiceConfig(voice_name="Aoede")
+            )
+        ),
+        realtime_input_config=types.RealtimeInputConfig(turn_coverage="TURN_INCLUDES_ALL_INPUT"),
+        context_window_compression=types.ContextWindowCompressionConfig(
+            trigger_tokens=25600,
+            sliding_window=types.SlidingWindow(target_tokens=12800),
+        ),
+        tools=tools,
+        system_instruction=tuple(ins.instructions),
+    )
+    return _config
 
-)
 
-pya = pyaudio.PyAudio()
+def live_config(vad_mode: str):
+    """base_config() adjusted for the microphone VAD mode."""
+    from google.genai import types
 
+    if vad_mode != "explicit":
+        return base_config()
+    # Client-side VAD sends activity start/end itself.
+    config = base_config().model_copy(deep=True)
+    config.realtime_input_config.automatic_activity_detection = types.AutomaticActivityDetection(disabled=True)
+    return config
 
-class AudioLoop:
-    def __init__(self, video_mode='camera'):
-        self.video_mode = video_mode
-        self.contents = []
 
-        self.audio_in_queue = None
-        self.out_queue = None
+_pya = None
+
+
+def get_pyaudio():
+    """Shared PyAudio instance; creating it enumerates every audio device."""
+    global _pya
+    if _pya is None:
+        import pyaudio
+
+        _pya = pyaudio.PyAudio()
+    return _pya
+
+
+def dispatch_tool(function_name, function_args):
+    from tools_runner import get_tool_to_run
+
+    return get_tool_to_run(function_name, function_args)
+
 
+class AudioLoop:
+    def __init__(self, video_mode='camera', frame_encoder=None, scene_gate=None, vad=None,
+                 mic_batch_chunks=MIC_BATCH_CHUNKS, prefill_ms=PREFILL_MS, max_playback_ms=MAX_MS,
+                 history=None, reconnect_attempts=RECONNECT_ATTEMPTS, import_timer=None, client=None,
+                 metrics=None, metrics_jsonl=None, metrics_port=None, metrics_interval=METRICS_INTERVAL,
+                 faces=False, preview=False, face_backend="lbph", screen_capture=None, video_controller=None):
+        if video_mode not in VIDEO_MODES:
+            raise ValueError(f"Unknown video mode '{video_mode}'. Allowed: {', '.join(VIDEO_MODES)}")
+        if (faces or preview) and video_mode != "camera":
+            raise ValueError("Face recognition and the preview need video_mode='camera'")
+        self.video_mode = video_mode
+        self.mic_batch_chunks = mic_batch_chunks
+        self.mic_ring = PcmRingBuffer(int(MIC_RING_SECONDS * SEND_SAMPLE_RATE) * CHANNELS * SAMPLE_WIDTH)
+        # Recent turns in memory, older ones spilled to an append-only log.
+        # Not `history or ...`: an empty ConversationHistory is falsy (it has __len__).
+        self.contents = history if history is not None else ConversationHistory(HISTORY_LOG)
+        self.frame_encoder = self.scene_gate = self.screen_capture = None
+        if video_mode == "camera":
+            self.frame_encoder = frame_encoder or FrameEncoder()
+            self.scene_gate = scene_gate or SceneChangeGate()
+        elif video_mode == "screen":
+            self.frame_encoder = frame_encoder or FrameEncoder()
+            self.scene_gate = scene_gate or TileChangeGate()
+            # Grabs are downscaled before the gate and the encoder see them.
+            self.screen_capture = screen_capture or ScreenCapture(fps=1 / FRAME_INTERVAL)
+        self.vad = vad or VoiceActivityGate(sample_rate=SEND_SAMPLE_RATE, chunk_size=CHUNK_SIZE * mic_batch_chunks)
+        # Camera capture and JPEG encoding get their own thread so they never
+        # queue behind the audio to_thread hops in the default executor.
+        self.video_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="video")
+        # The camera is a CameraHub: the uplink, the face recognizer process
+        # and the preview each take frames from it at their own rate.
+        self.face_recognition = faces
+        self.face_backend = face_backend
+        self.face_pipeline = None  # FacePipeline attached to the hub's frame ring
+        self._face_hub = None
+        self.faces = []  # latest FaceResults from the recognizer
+        self.face_names = []  # names last sent to the model
+        self.preview = preview
+        self._preview_thread = None
+
+        self.playback_buffer = PlaybackBuffer(RECEIVE_SAMPLE_RATE, SAMPLE_WIDTH, CHANNELS,
+                                              prefill_ms=prefill_ms, max_ms=max_playback_ms)
+        self.send_scheduler = None
+        self.tool_executor = ToolExecutor(dispatch_tool)
+        self._tool_tasks = set()
+        self._last_tool_task = None
+
+        self.client = client  # None: the real Gemini client, see get_client()
         self.session = None
+        self.reconnect_attempts = reconnect_attempts
+        # Devices are opened concurrently with the session connect and kept
+        # open across reconnects: name -> future of the open device.
+        self._devices = {}
+        self.timeline = StartupTimeline()
+        self.import_timer = import_timer
+        # Per-stage latency histograms; always recorded, exported if configured.
+        self.metrics = metrics or PipelineMetrics()
+        self.metrics_jsonl = metrics_jsonl
+        self.metrics_port = metrics_port
+        self.metrics_interval = metrics_interval
+        # Steps frame interval, size and JPEG quality down while the uplink
+        # is saturated; level 0 is the configured setting.
+        self.video_controller = None
+        if self.frame_encoder is not None:
+            self.video_controller = video_controller or VideoController(
+                min_interval=FRAME_INTERVAL, max_interval=max(FRAME_INTERVAL, MAX_INTERVAL),
+                max_dimension=self.frame_encoder.max_dimension,
+                min_dimension=min(MIN_DIMENSION, self.frame_encoder.max_dimension),
+                max_quality=self.frame_encoder.quality, min_quality=min(MIN_QUALITY, self.frame_encoder.quality),
+                metrics=self.metrics)
+            if self.video_controller.metrics is None:
+                self.video_controller.metrics = self.metrics
+                self.video_controller.publish()
 
         self.send_text_task = None
         self.receive_audio_task = None
@@ -120,140 +288,554 @@ class AudioLoop:
             )
             if text.lower() == "q":
                 break
+            self._note_user_turn()
             await self.session.send(input=text or ".", end_of_turn=True)
 
-    def _get_frame(self, cap):
-        # Read the frameq
-        ret, frame = cap.read()
-        if not ret:
-            return None
-        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        img = PIL.Image.fromarray(frame_rgb)  
-        img.thumbnail([1024, 1024])
+    def _note_user_turn(self):
+        from move_function import note_user_turn
 
-        image_io = io.BytesIO()
-        img.save(image_io, format="jpeg")
-        image_io.seek(0)
+        note_user_turn()
 
-        mime_type = "image/jpeg"
-        image_bytes = image_io.read()
-        return {"mime_type": mime_type, "data": base64.b64encode(image_bytes).decode()}
+    def _get_frame(self, source):
+        # Newest frame once FRAME_INTERVAL has passed; waits for the hub or the screen.
+        seq, frame, captured = source.get()
+        if seq is None:
+            return None, None
+        start = time.perf_counter()
+        self.metrics.record("video.frame_age", start - captured)
+        if not self.scene_gate.should_send(frame):
+            return FRAME_UNCHANGED, captured
+        msg = self.frame_encoder.encode(frame)
+        self.metrics.since("video.encode", start)
+        return msg, captured
 
     async def get_frames(self):
-        cap = await asyncio.to_thread(
-            cv2.VideoCapture, 0
-        ) 
+        loop = asyncio.get_running_loop()
+        name = self.video_mode
+        try:
+            device = await self._device(name)
+        except Exception:
+            if name != "screen":
+                raise
+            # Same as a failed grab: no video this session, but audio keeps running.
+            traceback.print_exc()
+            self._devices.pop(name, None)
+            return
+        # The screen is grabbed on demand; the camera hub is shared with other consumers.
+        source = device if name == "screen" else device.subscribe("uplink", fps=1 / FRAME_INTERVAL)
+
+        next_stats = loop.time() + VIDEO_STATS_INTERVAL
+        applied = None
+        try:
+            while True:
+                setting = self.video_controller.setting
+                if setting is not applied:
+                    # Applied between frames, so the executor never sees a half-changed encoder.
+                    source.interval = setting.interval
+                    self.frame_encoder.configure(setting.max_dimension, setting.quality)
+                    applied = setting
+                frame, captured = await loop.run_in_executor(self.video_executor, self._get_frame, source)
+                if frame is None:
+                    break
+
+                if frame is not FRAME_UNCHANGED:
+                    await self.send_scheduler.put("video", frame, origin=captured)
+                if loop.time() >= next_stats:
+                    stats = self.scene_gate.stats()
+                    grabbed = f"screen grabs={device.grabs}" if name == "screen" else f"camera frames={device.frames}"
+                    print(f"[VIDEO] frames sent={stats['frames_sent']} skipped={stats['frames_skipped']} {grabbed} "
+                          f"level={applied.level}")
+                    next_stats += VIDEO_STATS_INTERVAL
+        except Exception:
+            if name != "screen":
+                raise
+            traceback.print_exc()  # e.g. the display went away
+        finally:
+            if source is not device:
+                source.close()
+
+        # Video stopped delivering: release it so a reconnect reopens it.
+        self._devices.pop(name, None)
+        await loop.run_in_executor(self.video_executor, device.close)
+
+    async def _start_face_pipeline(self, hub):
+        from face_pipeline import FacePipeline
+
+        if self.face_pipeline is not None:
+            await asyncio.to_thread(self.face_pipeline.close)
+        if not await asyncio.to_thread(hub.wait_ready):
+            self.face_pipeline = None
+            return
+        self.face_pipeline = FacePipeline(ring=hub.ring, interval=1 / FACE_FPS, backend=self.face_backend)
+        await asyncio.to_thread(self.face_pipeline.start)
+        self._face_hub = hub
+
+    async def watch_faces(self):
+        """Tell the model who is in view whenever the recognized names change."""
+        loop = asyncio.get_running_loop()
+        hub = await self._device("camera")
+        if hub is not self._face_hub:
+            # First session, or the camera was reopened: attach to its ring.
+            await self._start_face_pipeline(hub)
+            if self.face_pipeline is None:
+                return
+        self.face_names = []  # a new session has not been told anything yet
+        next_context = loop.time()
+        while True:
+            for message in self.face_pipeline.poll():
+                if message[0] == "faces":
+                    self.faces = message[2]
+                elif message[0] == "status":
+                    print(f"[FACES] {message[1]}")
+            names = sorted({face.name for face in self.faces if face.name is not None})
+            if names != self.face_names and loop.time() >= next_context:
+                self.face_names = names
+                if names:
+                    text = f"[camera] Recognized people in view: {', '.join(names)}."
+                else:
+                    text = "[camera] No recognized people in view any more."
+                await self.send_scheduler.put("context", text)
+                next_context = loop.time() + FACE_CONTEXT_INTERVAL
+            await asyncio.sleep(FACE_POLL_INTERVAL)
+
+    def _preview_loop(self, subscriber):
+        import cv2
 
         while True:
-            frame = await asyncio.to_thread(self._get_frame, cap)
-            if frame is None:
+            seq, frame, _ = subscriber.get()
+            if seq is None:
                 break
-
-            await asyncio.sleep(1.0)
-
-            await self.out_queue.put(frame)
-
-        cap.release()
+            for face in self.faces:
+                x, y, w, h = face.box
+                color = (0, 255, 0) if face.name is not None else (0, 165, 255)
+                cv2.rectangle(frame, (x, y), (x + w, y + h), color, 2)
+                cv2.putText(frame, face.name or "Unknown", (x, y - 10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
+            cv2.imshow("Camera", frame)
+            cv2.waitKey(1)
+        cv2.destroyWindow("Camera")
+
+    async def start_preview(self):
+        # Runs until its hub stops, so it survives session reconnects.
+        hub = await self._device("camera")
+        if self._preview_thread is None or not self._preview_thread.is_alive():
+            self._preview_thread = threading.Thread(
+                target=self._preview_loop, args=(hub.subscribe("preview", fps=PREVIEW_FPS),),
+                name="preview", daemon=True)
+            self._preview_thread.start()
+
+    async def _send_activity(self, activity: str):
+        from google.genai import types
+
+        match activity:
+            case "start":
+                await self.session.send_realtime_input(activity_start=types.ActivityStart())
+            case "end":
+                await self.session.send_realtime_input(activity_end=types.ActivityEnd())
+            case "stream_end":
+                await self.session.send_realtime_input(audio_stream_end=True)
+
+    def _log_uplink(self):
+        parts = []
+        for name, st in self.send_scheduler.stats().items():
+            parts.append(f"{name}: depth={st['depth']} sent={st['sent']} dropped={st['dropped']} "
+                         f"wait avg={st['wait_avg_ms']:.1f}ms max={st['wait_max_ms']:.1f}ms")
+        print("[UPLINK] " + " | ".join(parts))
 
     async def send_realtime(self):
+        loop = asyncio.get_running_loop()
+        next_stats = loop.time() + UPLINK_STATS_INTERVAL
         while True:
-            msg = await self.out_queue.get()
-            await self.session.send(input=msg)
-
-    async def listen_audio(self):
+            lane, msg = await self.send_scheduler.get()
+            start = time.perf_counter()
+            if "activity" in msg:
+                await self._send_activity(msg["activity"])
+            else:
+                await self.session.send(input=msg)
+            sent = time.perf_counter()
+            self.metrics.record(f"uplink.{lane}.queue", self.send_scheduler.last_wait)
+            self.metrics.record(f"uplink.{lane}.send", sent - start)
+            self.metrics.record(f"uplink.{lane}.capture_to_sent", sent - self.send_scheduler.last_origin)
+            if self.video_controller is not None:
+                setting = self.video_controller.observe(
+                    lane, self.send_scheduler.last_wait, sent - start, self.send_scheduler.depth(),
+                    self.send_scheduler.lanes["video"].dropped)
+                if setting is not None:
+                    print(f"[VIDEO] {self.video_controller.last_reason}: level {setting.level}, "
+                          f"interval={setting.interval}s max_dimension={setting.max_dimension} "
+                          f"quality={setting.quality}")
+            if loop.time() >= next_stats:
+                self._log_uplink()
+                next_stats = loop.time() + UPLINK_STATS_INTERVAL
+
+    def _mic_callback(self, in_data, frame_count, time_info, status):
+        # Runs on PyAudio's callback thread: copy into the ring and return.
+        if status & PA_INPUT_OVERFLOW:
+            self.mic_ring.device_overflows += 1
+        self.mic_ring.write(in_data)
+        return (None, PA_CONTINUE)
+
+    def _open_mic(self):
+        pya = get_pyaudio()
         mic_info = pya.get_default_input_device_info()
-        self.audio_stream = await asyncio.to_thread(
-            pya.open,
-            format=FORMAT,
+        return pya.open(
+            format=pya.get_format_from_width(SAMPLE_WIDTH),
             channels=CHANNELS,
             rate=SEND_SAMPLE_RATE,
             input=True,
             input_device_index=mic_info["index"],
             frames_per_buffer=CHUNK_SIZE,
+            stream_callback=self._mic_callback,
+        )
+
+    def _open_speaker(self):
+        pya = get_pyaudio()
+        return pya.open(
+            format=pya.get_format_from_width(SAMPLE_WIDTH),
+            channels=CHANNELS,
+            rate=RECEIVE_SAMPLE_RATE,
+            output=True,
         )
-        if __debug__:
-            kwargs = {"exception_on_overflow": False}
-        else:
-            kwargs = {}
+
+    def _open_capture(self):
+        import cv2
+
+        return cv2.VideoCapture(0)
+
+    def _open_camera(self):
+        from camera_hub import CameraHub
+
+        return CameraHub(self._open_capture(), metrics=self.metrics).start()
+
+    def _open_screen(self):
+        # mss handles are per thread: open and grab on the video executor.
+        return self.screen_capture.open()
+
+    def _open_device(self, name, opener):
+        device = opener()
+        self.timeline.mark(f"{name} open")
+        return device
+
+    def prewarm(self):
+        """Start opening all devices in parallel; open ones are reused."""
+        loop = asyncio.get_running_loop()
+        openers = {"mic": (None, self._open_mic), "speaker": (None, self._open_speaker)}
+        if self.video_mode == "camera":
+            openers["camera"] = (self.video_executor, self._open_camera)
+        elif self.video_mode == "screen":
+            openers["screen"] = (self.video_executor, self._open_screen)
+        for name, (executor, opener) in openers.items():
+            future = self._devices.get(name)
+            if future is not None and not (future.done() and future.exception() is not None):
+                self.timeline.mark(f"{name} reused")
+                continue
+            self._devices[name] = loop.run_in_executor(executor, self._open_device, name, opener)
+
+    async def _device(self, name):
+        return await self._devices[name]
+
+    async def close_devices(self):
+        loop = asyncio.get_running_loop()
+        devices, self._devices = self._devices, {}
+        for name, future in devices.items():
+            if not future.done() or future.exception() is not None:
+                continue
+            # Video devices are closed on the thread that opened them.
+            executor = self.video_executor if name in ("camera", "screen") else None
+            await loop.run_in_executor(executor, future.result().close)
+
+    async def listen_audio(self):
+        loop = asyncio.get_running_loop()
+        self.audio_stream = await self._device("mic")
+        self.mic_ring.read(self.mic_ring.available())  # drop audio buffered while disconnected
+        batch_bytes = CHUNK_SIZE * self.mic_batch_chunks * CHANNELS * SAMPLE_WIDTH
+        bytes_per_second = SEND_SAMPLE_RATE * CHANNELS * SAMPLE_WIDTH
+        # A batch should arrive every batch_seconds; waiting twice that long
+        # means the device stalled.
+        batch_seconds = CHUNK_SIZE * self.mic_batch_chunks / SEND_SAMPLE_RATE
+        reported = (0, 0)  # (device_overflows, ring_drops) at the last report
+        next_stats = loop.time() + AUDIO_STATS_INTERVAL
         while True:
-            data = await asyncio.to_thread(self.audio_stream.read, CHUNK_SIZE, **kwargs)
-            await self.out_queue.put({"data": data, "mime_type": "audio/pcm"})
+            data = await self.mic_ring.read_batch(batch_bytes, timeout=2 * batch_seconds)
+            start = time.perf_counter()
+            captured = start - self.mic_ring.age(len(data), bytes_per_second)
+            self.metrics.record("mic.capture_to_read", start - captured)
+            messages = self.vad.process(data)
+            self.metrics.since("mic.vad", start)
+            # Moves the model makes while or soon after the user speaks count as
+            # requested, later ones as autonomous patrol (see MotionController).
+            # Gated modes only emit messages during speech; "off" emits every chunk.
+            if (self.vad.is_speech(data) if self.vad.mode == "off" else messages):
+                self._note_user_turn()
+            for msg in messages:
+                await self.send_scheduler.put("audio", msg, origin=captured)
+            if loop.time() >= next_stats:
+                counts = (self.mic_ring.device_overflows, self.mic_ring.ring_drops)
+                if counts != reported:
+                    # Device overflows: PortAudio lost input. Ring drops: this task fell behind.
+                    stats = self.mic_ring.stats()
+                    print(f"[AUDIO] mic device_overflows={stats['device_overflows']} "
+                          f"ring_drops={stats['ring_drops']} dropped_bytes={stats['dropped_bytes']} "
+                          f"underruns={stats['underruns']}")
+                    reported = counts
+                next_stats += AUDIO_STATS_INTERVAL
 
     async def receive_audio(self):
         "Background task to reads from the websocket and write pcm chunks to the output queue"
+        from google.genai import types
+
         while True:
             turn = self.session.receive()
+            interrupted = False
             async for response in turn:
                 if data := response.data:
-                    self.audio_in_queue.put_nowait(data)
+                    self.timeline.mark("first audio in")
+                    self.playback_buffer.push(data)
                     continue
+                if response.server_content and response.server_content.interrupted:
+                    # User barge-in: stop talking now, not after the backlog.
+                    interrupted = True
+                    self.playback_buffer.flush()
                 if text := response.text:
                     print(text, end="")
                 if external_tool := response.tool_call:
-                    function_responses = []
-                    # Append function call and result of the function execution to contents
-                    self.contents.append(types.Content(role="model", parts=[types.Part(function_call=external_tool)])) # Append the content from the model's response.
-                    for fc in external_tool.function_calls:
-                        result = get_tool_to_run(fc.name, fc.args)
-                        function_response = types.FunctionResponse(
-                            id=fc.id,
-                            name=fc.name,
-                            response={"result": result},
-                        )
-                        function_responses.append(function_response)
-                        function_response_part = types.Part(function_response=function_response)
-                        self.contents.append(types.Content(role="tool", parts=[function_response_part]))
-                    await self.session.send_tool_response(
-                        function_responses=function_responses
-                    )
-                    
-            while not self.audio_in_queue.empty():
-                self.audio_in_queue.get_nowait()
+                    # Append the function call now so contents keep the model's order;
+                    # results are appended when the tools finish.
+                    self.contents.append(types.Content(
+                        role="model",
+                        parts=[types.Part(function_call=fc) for fc in external_tool.function_calls],
+                    ))
+                    task = asyncio.create_task(
+                        self._run_tool_call(external_tool, self._last_tool_task, time.perf_counter()))
+                    self._last_tool_task = task
+                    self._tool_tasks.add(task)
+                    task.add_done_callback(self._tool_task_done)
+
+            if interrupted:
+                self.playback_buffer.flush()
+            else:
+                self.playback_buffer.end_turn()
+
+    async def _run_tool_call(self, tool_call, previous, received):
+        """Execute one tool_call message without blocking receive_audio."""
+        from google.genai import types
+
+        calls = [(fc.name, fc.args) for fc in tool_call.function_calls]
+        start = time.perf_counter()
+        results = await self.tool_executor.run_all(calls)
+        self.metrics.since("tool.run", start)
+        function_responses = []
+        for fc, result in zip(tool_call.function_calls, results):
+            function_response = types.FunctionResponse(
+                id=fc.id,
+                name=fc.name,
+                response={"result": result},
+            )
+            function_responses.append(function_response)
+        # Tool responses go back in the order the calls arrived.
+        if previous is not None:
+            start = time.perf_counter()
+            await asyncio.wait([previous])
+            self.metrics.since("tool.order_wait", start)
+        for function_response in function_responses:
+            function_response_part = types.Part(function_response=function_response)
+            self.contents.append(types.Content(role="tool", parts=[function_response_part]))
+        start = time.perf_counter()
+        await self.session.send_tool_response(
+            function_responses=function_responses
+        )
+        self.metrics.since("tool.send", start)
+        self.metrics.since("tool.receive_to_response", received)
+
+    def _tool_task_done(self, task):
+        self._tool_tasks.discard(task)
+        if task is self._last_tool_task:
+            self._last_tool_task = None
+        if not task.cancelled() and task.exception() is not None:
+            traceback.print_exception(task.exception())
 
     async def play_audio(self):
-        stream = await asyncio.to_thread(
-            pya.open,
-            format=FORMAT,
-            channels=CHANNELS,
-            rate=RECEIVE_SAMPLE_RATE,
-            output=True,
-        )
+        stream = await self._device("speaker")
         while True:
-            bytestream = await self.audio_in_queue.get()
-            await asyncio.to_thread(stream.write, bytestream)
+            block = await self.playback_buffer.pull()
+            start = time.perf_counter()
+            if self.playback_buffer.last_arrival is not None:
+                self.metrics.record("playback.receive_to_write", start - self.playback_buffer.last_arrival)
+            await asyncio.to_thread(stream.write, block)
+            self.metrics.since("playback.write", start)
+            if self.timeline.mark("first audio out"):
+                print(f"[STARTUP] time to first audio out: {self.timeline.elapsed('first audio out'):.3f}s")
+
+    async def _report_startup(self):
+        await asyncio.gather(*self._devices.values(), return_exceptions=True)
+        self.timeline.mark("ready")
+        print(self.timeline.report())
+        if self.import_timer is not None:
+            print(f"[IMPORT] core.py module imports: {IMPORT_SECONDS * 1000:.1f}ms")
+            print(self.import_timer.report())
+
+    async def _run_session(self):
+        # The SDK import overlaps with the device opens started by prewarm().
+        config = await asyncio.to_thread(live_config, self.vad.mode)
+        async with (
+            (self.client or get_client()).aio.live.connect(model=MODEL, config=config) as session,
+            asyncio.TaskGroup() as tg,
+        ):
+            self.timeline.mark("session connected")
+            self.session = session
+
+            self.send_scheduler = SendScheduler()
+            self.playback_buffer.flush()
+
+            send_text_task = tg.create_task(self.send_text())
+            tg.create_task(self.send_realtime())
+            tg.create_task(self.listen_audio())
+            if self.video_mode != "none":
+                tg.create_task(self.get_frames())
+            if self.face_recognition:
+                tg.create_task(self.watch_faces())
+            if self.preview:
+                tg.create_task(self.start_preview())
+
+            tg.create_task(self.receive_audio())
+            tg.create_task(self.play_audio())
+            tg.create_task(self._report_startup())
+
+            await send_text_task
+            raise asyncio.CancelledError("User requested exit")
+
+    async def _start_metrics_export(self):
+        tasks = []
+        if self.metrics_jsonl:
+            os.makedirs(os.path.dirname(os.path.abspath(self.metrics_jsonl)), exist_ok=True)
+            tasks.append(asyncio.create_task(
+                self.metrics.export_periodically(self.metrics_jsonl, self.metrics_interval)))
+        server = None
+        if self.metrics_port:
+            server = await self.metrics.serve(port=self.metrics_port)
+            print(f"[METRICS] serving http://127.0.0.1:{self.metrics_port}/metrics")
+        return tasks, server
 
     async def run(self):
+        self.mic_ring.bind(asyncio.get_running_loop())
+        export_tasks, metrics_server = await self._start_metrics_export()
+        attempt = 0
         try:
-            async with (
-                client.aio.live.connect(model=MODEL, config=CONFIG) as session,
-                asyncio.TaskGroup() as tg,
-            ):
-                self.session = session
-
-                self.audio_in_queue = asyncio.Queue()
-                self.out_queue = asyncio.Queue(maxsize=5)
-
-                send_text_task = tg.create_task(self.send_text())
-                tg.create_task(self.send_realtime())
-                tg.create_task(self.listen_audio())
-                if self.video_mode == "camera":
-                    tg.create_task(self.get_frames())
-
-                tg.create_task(self.receive_audio())
-                tg.create_task(self.play_audio())
-
-                await send_text_task
-                raise asyncio.CancelledError("User requested exit")
-
+            while True:
+                self.prewarm()
+                try:
+                    await self._run_session()
+                    return
+                except ExceptionGroup as EG:
+                    traceback.print_exception(EG)
+                    if attempt >= self.reconnect_attempts:
+                        return
+                attempt += 1
+                print(f"[SESSION] reconnecting ({attempt}/{self.reconnect_attempts}) in {RECONNECT_DELAY:g}s")
+                await asyncio.sleep(RECONNECT_DELAY)
+                self.timeline = StartupTimeline(f"reconnect {attempt}")
         except asyncio.CancelledError:
             pass
-        except ExceptionGroup as EG:
-            self.audio_stream.close()
-            traceback.print_exception(EG)
+        finally:
+            for task in export_tasks:
+                task.cancel()
+            if metrics_server is not None:
+                metrics_server.close()
+            if self.metrics_jsonl:
+                self.metrics.write_jsonl(self.metrics_jsonl)
+            if self.face_pipeline is not None:
+                await asyncio.to_thread(self.face_pipeline.close)
+            await self.close_devices()
 
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
+    parser.add_argument("--video", choices=VIDEO_MODES, default="camera",
+                        help="video source; 'screen' shares a monitor, 'none' never loads OpenCV")
+    parser.add_argument("--monitor", type=int, default=SCREEN_MONITOR,
+                        help="monitor for --video screen (mss numbering: 1 is the primary, 0 all combined)")
+    parser.add_argument("--region",
+                        help="capture only LEFT,TOP,WIDTH,HEIGHT of the monitor for --video screen")
+    parser.add_argument("--min-changed-tiles", type=int, default=MIN_CHANGED_TILES,
+                        help="changed tiles of an 8x8 grid needed to send a new screen frame")
+    parser.add_argument("--jpeg-quality", type=int, default=JPEG_QUALITY, help="JPEG quality for video frames (1-100)")
+    parser.add_argument("--max-dimension", type=int, default=MAX_DIMENSION, help="longest side of video frames in pixels")
+    parser.add_argument("--encoder", choices=BACKENDS, default="opencv", help="JPEG encoder backend")
+    parser.add_argument("--scene-threshold", type=float, default=CHANGE_THRESHOLD,
+                        help="mean grayscale change needed to send a new frame, 0 sends every frame")
+    parser.add_argument("--keepalive", type=float, default=KEEPALIVE_INTERVAL,
+                        help="send a frame at least every this many seconds even if unchanged")
+    parser.add_argument("--video-levels", type=int, default=VIDEO_LEVELS,
+                        help="adaptive video steps between the settings above and the floors below; 1 disables it")
+    parser.add_argument("--max-frame-interval", type=float, default=MAX_INTERVAL,
+                        help="slowest frame interval in seconds while the uplink is saturated")
+    parser.add_argument("--min-dimension", type=int, default=MIN_DIMENSION,
+                        help="smallest longest-side in pixels while the uplink is saturated")
+    parser.add_argument("--min-jpeg-quality", type=int, default=MIN_QUALITY,
+                        help="lowest JPEG quality while the uplink is saturated")
+    parser.add_argument("--vad", choices=VAD_MODES, default="gate",
+                        help="microphone voice-activity gating: off, gate (drop silence) or explicit (activity start/end)")
+    parser.add_argument("--vad-hangover-ms", type=int, default=HANGOVER_MS, help="keep sending this long after speech stops")
+    parser.add_argument("--vad-preroll-ms", type=int, default=PREROLL_MS, help="audio sent from before the detected speech onset")
+    parser.add_argument("--mic-batch", type=int, default=MIC_BATCH_CHUNKS,
+                        help=f"{CHUNK_SIZE}-sample mic blocks sent per realtime message")
+    parser.add_argument("--prefill-ms", type=int, default=PREFILL_MS, help="model audio buffered before playback starts")
+    parser.add_argument("--max-playback-ms", type=int, default=MAX_MS, help="playback backlog cap; oldest audio is dropped beyond it")
+    parser.add_argument("--history-size", type=int, default=HISTORY_SIZE, help="conversation entries kept in memory")
+    parser.add_argument("--history-log", default=HISTORY_LOG, help="append-only log for older conversation entries")
+    parser.add_argument("--reconnect", type=int, default=RECONNECT_ATTEMPTS,
+                        help="session reconnect attempts after an error (devices stay open)")
+    parser.add_argument("--metrics-jsonl", help="append per-stage latency percentiles to this JSON lines file")
+    parser.add_argument("--metrics-port", type=int, help="serve Prometheus text metrics on 127.0.0.1:PORT/metrics")
+    parser.add_argument("--metrics-interval", type=float, default=METRICS_INTERVAL,
+                        help="seconds between JSON lines metric exports")
+    parser.add_argument("--faces", action="store_true",
+                        help="recognise faces from the shared camera and tell the model who is in view")
+    parser.add_argument("--face-backend", choices=FACE_BACKENDS, default="lbph",
+                        help="face model for --faces: LBPH or the embedding index")
+    parser.add_argument("--preview", action="store_true", help="show the shared camera with recognised faces")
+    parser.add_argument("--startup-report", action="store_true",
+                        help="print an import-time table (like python -X importtime) once the session is ready")
     args = parser.parse_args()
-    main = AudioLoop()
+    if (args.faces or args.preview) and args.video != "camera":
+        parser.error("--faces and --preview need --video camera")
+    if args.monitor < 0:
+        parser.error(f"--monitor must be 0 or more, got {args.monitor}")
+    if args.region is not None:
+        try:
+            args.region = parse_region(args.region)
+        except ValueError as e:
+            parser.error(str(e))
+    import_timer = None
+    if args.startup_report:
+        import_timer = ImportTimer()
+        import_timer.install()
+    encoder = gate = screen = controller = None
+    if args.video == "camera":
+        encoder = FrameEncoder(max_dimension=args.max_dimension, quality=args.jpeg_quality, backend=args.encoder)
+        gate = SceneChangeGate(threshold=args.scene_threshold, keepalive_interval=args.keepalive)
+    elif args.video == "screen":
+        encoder = FrameEncoder(max_dimension=args.max_dimension, quality=args.jpeg_quality, backend=args.encoder)
+        gate = TileChangeGate(min_changed_tiles=args.min_changed_tiles, keepalive_interval=args.keepalive)
+        screen = ScreenCapture(args.monitor, args.region, max_dimension=args.max_dimension, fps=1 / FRAME_INTERVAL)
+        try:
+            screen.check()  # no display, or a monitor/region that does not exist
+        except Exception as e:
+            parser.error(f"--video screen: {e}")
+    if encoder is not None:
+        try:
+            controller = VideoController(FRAME_INTERVAL, max(FRAME_INTERVAL, args.max_frame_interval),
+                                         args.max_dimension, min(args.min_dimension, args.max_dimension),
+                                         args.jpeg_quality, min(args.min_jpeg_quality, args.jpeg_quality),
+                                         levels=args.video_levels)
+        except ValueError as e:
+            parser.error(str(e))
+    vad = VoiceActivityGate(mode=args.vad, sample_rate=SEND_SAMPLE_RATE, chunk_size=CHUNK_SIZE * args.mic_batch,
+                            hangover_ms=args.vad_hangover_ms, preroll_ms=args.vad_preroll_ms)
+    main = AudioLoop(video_mode=args.video, frame_encoder=encoder, scene_gate=gate, vad=vad, mic_batch_chunks=args.mic_batch,
+                     prefill_ms=args.prefill_ms, max_playback_ms=args.max_playback_ms,
+                     history=ConversationHistory(args.history_log, max_entries=args.history_size),
+                     reconnect_attempts=args.reconnect, import_timer=import_timer,
+                     metrics_jsonl=args.metrics_jsonl, metrics_port=args.metrics_port,
+                     metrics_interval=args.metrics_interval, faces=args.faces, preview=args.preview,
+                     face_backend=args.face_backend, screen_capture=screen, video_controller=controller)
     asyncio.run(main.run())
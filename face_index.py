@@ -0,0 +1,483 @@
+"""Embedding-based face identities: a drop-in alternative to the LBPH model.
+
+LBPH compares a query against every training histogram inside OpenCV and
+can only grow by ``update()``. ``FaceIndex`` instead turns each dataset crop
+into one L2-normalised float32 embedding, stored as a row of a contiguous
+matrix, so that:
+
+* matching is one matrix-vector product (cosine similarity) and an argmax;
+* enrolling a face is an amortised O(1) row append, and deleted dataset
+  files are simply dropped rows, no retraining;
+* search is exact by default. An opt-in coarse index (``coarse=True``:
+  spherical k-means buckets, ``nprobe`` of them searched per query) makes
+  queries sub-linear in the number of rows, at the cost of accuracy: the
+  true nearest row is missed whenever it lies outside the probed buckets.
+  On the benchmark's 944-dim vectors, probing 30% of the buckets finds the
+  right row for about 97% of queries at 5000 rows and 96% at 50000. Even
+  then it is no faster than the exact matrix product, which is why the
+  coarse index stays off unless asked for.
+
+Embeddings come from OpenCV's SFace network if ``face_recognition_sface_2021dec.onnx``
+is in the model directory, otherwise from spatial histograms of uniform
+local binary patterns (the same features LBPH uses, with Hellinger
+scaling so cosine similarity applies). Crops are the unaligned 200x200
+grayscale faces of the dataset. ``predict()`` reports 100 * cosine
+distance, lower is better, like LBPH's confidence; ``default_threshold()``
+gives a starting cut-off per embedder.
+
+``python face_index.py`` benchmarks enrollment and query latency against
+the number of identities. Like ``FaceModel`` it can be given a ``FaceStore``
+to embed packed crops instead of dataset JPEGs.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from face_model import DATASET_DIR, MODEL_DIR, FaceModel, _file_key, label_from_filename
+
+INDEX_FILE = "embeddings.npz"
+INDEX_VERSION = 1
+SFACE_MODEL = "face_recognition_sface_2021dec.onnx"
+BACKENDS = ("lbph", "embedding")
+LBPH_THRESHOLD = 70  # LBPH histogram distance
+# 100 * cosine distance. SFace's is OpenCV's suggested 0.363 similarity; the
+# LBP one is a starting point, tune it with +/- in test.py.
+THRESHOLDS = {"lbp": 10.0, "sface": 63.7}
+LBP_SIZE = (64, 64)  # crops are reduced to this before computing patterns
+LBP_GRID = (4, 4)
+COARSE_MIN_ROWS = 4096  # with coarse=True, build k-means buckets from this many rows on
+# Fraction of the buckets searched per query. Chosen from the benchmark's recall@1:
+# 8 buckets of 70 (5000 rows) gave 0.88 and 32 gave 0.99, while 8 of 223
+# (50000 rows) gave 0.61. A fraction holds recall at ~0.96 as the index grows.
+NPROBE_FRACTION = 0.3
+KMEANS_ITERATIONS = 8
+
+
+def _uniform_lbp_table() -> np.ndarray:
+    """Map 8-bit LBP codes to 59 bins: 58 uniform patterns plus one for the rest."""
+    table = np.full(256, 58, dtype=np.int64)
+    uniform = 0
+    for code in range(256):
+        bits = [(code >> i) & 1 for i in range(8)]
+        if sum(bits[i] != bits[(i + 1) % 8] for i in range(8)) <= 2:
+            table[code] = uniform
+            uniform += 1
+    return table
+
+
+_UNIFORM = _uniform_lbp_table()
+_NEIGHBOURS = ((-1, -1), (-1, 0), (-1, 1), (0, 1), (1, 1), (1, 0), (1, -1), (0, -1))
+
+
+class LbpEmbedder:
+    name = "lbp"
+
+    def __init__(self, size=LBP_SIZE, grid=LBP_GRID):
+        self.size = size
+        self.grid = grid
+        self.dim = grid[0] * grid[1] * 59
+        h, w = size[1] - 2, size[0] - 2
+        # Grid cell of every pattern pixel, pre-multiplied by the bin count.
+        rows = np.minimum(np.arange(h) * grid[1] // h, grid[1] - 1)
+        cols = np.minimum(np.arange(w) * grid[0] // w, grid[0] - 1)
+        self._cell_offset = ((rows[:, None] * grid[0] + cols[None, :]) * 59).ravel()
+
+    def embed(self, face) -> np.ndarray:
+        img = cv2.equalizeHist(cv2.resize(face, self.size, interpolation=cv2.INTER_AREA))
+        h, w = img.shape
+        center = img[1:-1, 1:-1]
+        codes = np.zeros(center.shape, dtype=np.uint8)
+        for bit, (dy, dx) in enumerate(_NEIGHBOURS):
+            codes |= (img[1 + dy:h - 1 + dy, 1 + dx:w - 1 + dx] >= center).astype(np.uint8) << bit
+        hist = np.bincount(self._cell_offset + _UNIFORM[codes.ravel()], minlength=self.dim)
+        vec = np.sqrt(hist.astype(np.float32))
+        return vec / (np.linalg.norm(vec) or 1.0)
+
+
+class SFaceEmbedder:
+    name = "sface"
+    dim = 128
+
+    def __init__(self, model_path: str):
+        self.net = cv2.FaceRecognizerSF.create(model_path, "")
+
+    def embed(self, face) -> np.ndarray:
+        bgr = cv2.cvtColor(cv2.resize(face, (112, 112), interpolation=cv2.INTER_AREA), cv2.COLOR_GRAY2BGR)
+        vec = self.net.feature(bgr).astype(np.float32).ravel()
+        return vec / (np.linalg.norm(vec) or 1.0)
+
+
+def create_embedder(model_dir: str = MODEL_DIR):
+    path = os.path.join(model_dir, SFACE_MODEL)
+    return SFaceEmbedder(path) if os.path.exists(path) else LbpEmbedder()
+
+
+def default_threshold(backend: str, model_dir: str = MODEL_DIR) -> float:
+    if backend == "lbph":
+        return LBPH_THRESHOLD
+    return THRESHOLDS["sface" if os.path.exists(os.path.join(model_dir, SFACE_MODEL)) else "lbp"]
+
+
+def create_model(backend: str = "lbph", dataset_dir: str = DATASET_DIR, model_dir: str = MODEL_DIR, store=None,
+                 coarse: bool = False, nprobe: int | None = None):
+    """``FaceModel`` (LBPH) or ``FaceIndex``; both share load/sync/add/predict/save.
+
+    ``coarse``/``nprobe`` opt the embedding index into approximate search.
+    """
+    if backend not in BACKENDS:
+        raise ValueError(f"Unknown face backend '{backend}'. Allowed: {', '.join(BACKENDS)}")
+    if backend == "lbph":
+        return FaceModel(dataset_dir, model_dir, store=store)
+    return FaceIndex(dataset_dir, model_dir, store=store, coarse=coarse, nprobe=nprobe)
+
+
+class EmbeddingIndex:
+    """Growable float32 matrix of unit vectors with a label per row.
+
+    Search is exact unless ``coarse`` is set; ``nprobe`` (default: a
+    ``NPROBE_FRACTION`` of the buckets) trades recall for speed.
+    """
+
+    def __init__(self, dim: int, capacity: int = 256, coarse: bool = False, nprobe: int | None = None):
+        self.dim = dim
+        self.coarse = coarse
+        self.nprobe = nprobe
+        self.vectors = np.empty((capacity, dim), dtype=np.float32)
+        self.labels = np.empty(capacity, dtype=np.int32)
+        self.size = 0
+        # Coarse index: centroids and the rows of each bucket.
+        self.centroids = None
+        self.buckets = []
+        self._bucket_rows = []  # cached arrays of self.buckets, None once appended to
+        self._built_size = 0
+
+    def _grow(self, needed: int):
+        capacity = len(self.vectors)
+        if needed <= capacity:
+            return
+        while capacity < needed:
+            capacity *= 2
+        for attr in ("vectors", "labels"):
+            old = getattr(self, attr)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:self.size] = old[:self.size]
+            setattr(self, attr, new)
+
+    def add(self, vectors, labels):
+        vectors = np.asarray(vectors, dtype=np.float32).reshape(-1, self.dim)
+        n = len(vectors)
+        self._grow(self.size + n)
+        rows = slice(self.size, self.size + n)
+        self.vectors[rows] = vectors
+        self.labels[rows] = labels
+        if self.centroids is not None:
+            assigned = np.argmax(vectors @ self.centroids.T, axis=1)
+            for row, bucket in zip(range(self.size, self.size + n), assigned):
+                self.buckets[bucket].append(row)
+                self._bucket_rows[bucket] = None
+        self.size += n
+        if self.coarse and self.size >= COARSE_MIN_ROWS and self.size >= 2 * self._built_size:
+            self.build_coarse()
+
+    def remove(self, rows):
+        """Drop rows (O(N) compaction; only used when dataset files are deleted)."""
+        keep = np.ones(self.size, dtype=bool)
+        keep[list(rows)] = False
+        n = int(keep.sum())
+        self.vectors[:n] = self.vectors[:self.size][keep]
+        self.labels[:n] = self.labels[:self.size][keep]
+        self.size = n
+        self.centroids, self.buckets, self._bucket_rows, self._built_size = None, [], [], 0
+        if self.coarse and self.size >= COARSE_MIN_ROWS:
+            self.build_coarse()
+
+    def build_coarse(self, n_buckets: int | None = None, iterations: int = KMEANS_ITERATIONS, seed: int = 0):
+        """Spherical k-means over the rows; about sqrt(N) buckets by default."""
+        data = self.vectors[:self.size]
+        k = n_buckets or max(1, int(np.sqrt(self.size)))
+        rng = np.random.default_rng(seed)
+        centroids = data[rng.choice(self.size, size=k, replace=False)].copy()
+        for _ in range(iterations):
+            assigned = np.argmax(data @ centroids.T, axis=1)
+            sums = np.zeros_like(centroids)
+            np.add.at(sums, assigned, data)
+            norms = np.linalg.norm(sums, axis=1, keepdims=True)
+            empty = norms[:, 0] == 0
+            centroids = np.where(empty[:, None], centroids, sums / np.where(norms == 0, 1, norms))
+        assigned = np.argmax(data @ centroids.T, axis=1)
+        self.centroids = centroids
+        order = np.argsort(assigned, kind="stable")
+        bounds = np.searchsorted(assigned[order], np.arange(k + 1))
+        self.buckets = [order[bounds[i]:bounds[i + 1]].tolist() for i in range(k)]
+        self._bucket_rows = [order[bounds[i]:bounds[i + 1]] for i in range(k)]
+        self._built_size = self.size
+
+    def _rows(self, bucket: int) -> np.ndarray:
+        rows = self._bucket_rows[bucket]
+        if rows is None:
+            rows = self._bucket_rows[bucket] = np.array(self.buckets[bucket], dtype=np.int64)
+        return rows
+
+    def search(self, query, nprobe: int | None = None):
+        """Return ``(row, cosine similarity)`` of the nearest row, or ``(None, None)`` if empty.
+
+        Exact unless a coarse index was built; then only ``nprobe`` buckets are searched.
+        """
+        if not self.size:
+            return None, None
+        query = np.asarray(query, dtype=np.float32).ravel()
+        if self.centroids is not None:
+            nprobe = nprobe or self.nprobe or max(1, int(np.ceil(NPROBE_FRACTION * len(self.centroids))))
+        if self.centroids is None or nprobe >= len(self.centroids):
+            sims = self.vectors[:self.size] @ query
+            row = int(np.argmax(sims))
+            return row, float(sims[row])
+        probe = np.argpartition(-(self.centroids @ query), nprobe - 1)[:nprobe]
+        rows = np.concatenate([self._rows(b) for b in probe])
+        if not len(rows):
+            return None, None
+        sims = self.vectors[rows] @ query
+        best = int(np.argmax(sims))
+        return int(rows[best]), float(sims[best])
+
+
+class FaceIndex:
+    """Face identities as an ``EmbeddingIndex``, cached next to the dataset like ``FaceModel``."""
+
+    def __init__(self, dataset_dir: str = DATASET_DIR, model_dir: str = MODEL_DIR, embedder=None, store=None,
+                 coarse: bool = False, nprobe: int | None = None):
+        self.dataset_dir = dataset_dir
+        self.coarse = coarse  # approximate search, see EmbeddingIndex
+        self.nprobe = nprobe
+        self.store = store  # FaceStore to embed instead of the dataset JPEGs
+        self.model_dir = model_dir
+        self.index_path = os.path.join(model_dir, INDEX_FILE)
+        self.embedder = embedder or create_embedder(model_dir)
+        self.index = self._new_index()
+        self.names = []  # label -> name
+        self.label_ids = {}  # name -> label
+        self.row_files = []  # dataset filename of each index row
+        self.files = {}  # dataset filename -> [size, mtime_ns] of the embedded version
+        self.store_rows = 0  # FaceStore rows in the index
+        self.dirty = False
+
+    available = True  # needs only NumPy and core OpenCV
+
+    @property
+    def labels(self) -> dict:
+        return dict(enumerate(self.names))
+
+    def _label_id(self, name: str) -> int:
+        if name not in self.label_ids:
+            self.label_ids[name] = len(self.names)
+            self.names.append(name)
+        return self.label_ids[name]
+
+    def _scan(self) -> dict:
+        files = {}
+        with os.scandir(self.dataset_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".jpg") and entry.is_file():
+                    files[entry.name] = _file_key(entry.stat())
+        return files
+
+    def _new_index(self, capacity: int = 256) -> EmbeddingIndex:
+        return EmbeddingIndex(self.embedder.dim, capacity, coarse=self.coarse, nprobe=self.nprobe)
+
+    def load(self) -> bool:
+        """Restore saved embeddings; False if missing or made by another embedder."""
+        if not os.path.exists(self.index_path):
+            return False
+        try:
+            with np.load(self.index_path) as data:
+                meta = json.loads(str(data["meta"]))
+                if (meta.get("version") != INDEX_VERSION or meta.get("embedder") != self.embedder.name
+                        or data["vectors"].shape[1:] != (self.embedder.dim,)):
+                    return False
+                vectors, labels = data["vectors"], data["labels"]
+        except (OSError, ValueError, KeyError):
+            return False
+        self.index = self._new_index(capacity=max(256, len(vectors)))
+        self.index.add(vectors, labels)
+        self.names = meta["names"]
+        self.label_ids = {name: i for i, name in enumerate(self.names)}
+        self.row_files = meta["rows"]
+        self.files = meta["files"]
+        self.store_rows = meta.get("store_rows", 0)
+        self.dirty = False
+        return True
+
+    def _embed_files(self, filenames):
+        vectors, labels, rows, keys = [], [], [], {}
+        for filename in filenames:
+            path = os.path.join(self.dataset_dir, filename)
+            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                continue
+            vectors.append(self.embedder.embed(img))
+            labels.append(self._label_id(label_from_filename(filename)))
+            rows.append(filename)
+            keys[filename] = _file_key(os.stat(path))
+        if vectors:
+            self.index.add(np.stack(vectors), labels)
+            self.row_files.extend(rows)
+        self.files.update(keys)
+        return len(vectors)
+
+    def _embed_store(self, start: int, stop: int) -> int:
+        crops = self.store.crops[start:stop]
+        if len(crops):
+            labels = [self._label_id(self.store.names[label]) for label in self.store.labels[start:stop]]
+            self.index.add(np.stack([self.embedder.embed(crop) for crop in crops]), labels)
+        self.store_rows = stop
+        return len(crops)
+
+    def retrain(self) -> dict:
+        """Embed every file in the dataset (or every store row) from scratch."""
+        start = time.perf_counter()
+        self.index = self._new_index()
+        self.names, self.label_ids, self.row_files, self.files, self.store_rows = [], {}, [], {}, 0
+        if self.store is not None:
+            added = self._embed_store(0, len(self.store))
+        else:
+            added = self._embed_files(sorted(self._scan()))
+        self.dirty = True
+        return {"mode": "retrain", "added": added, "seconds": time.perf_counter() - start}
+
+    def _sync_store(self) -> dict:
+        start = time.perf_counter()
+        total = len(self.store)
+        if self.files or self.index.size != self.store_rows or total < self.store_rows:
+            return self.retrain()  # built from JPEGs or from another store
+        if total == self.store_rows:
+            return {"mode": "cached", "added": 0, "seconds": time.perf_counter() - start}
+        added = self._embed_store(self.store_rows, total)
+        self.dirty = True
+        return {"mode": "update", "added": added, "seconds": time.perf_counter() - start}
+
+    def sync(self) -> dict:
+        """Bring the index up to date with the dataset: drop stale rows, embed new files."""
+        start = time.perf_counter()
+        if self.store is not None:
+            return self._sync_store()
+        if self.store_rows:
+            return self.retrain()  # built from a store
+        current = self._scan()
+        stale = {name for name, key in self.files.items() if current.get(name) != key}
+        if stale:
+            self.index.remove([row for row, name in enumerate(self.row_files) if name in stale])
+            self.row_files = [name for name in self.row_files if name not in stale]
+            for name in stale:
+                del self.files[name]
+        new = sorted(name for name in current if name not in self.files)
+        added = self._embed_files(new)
+        if not stale and not added:
+            return {"mode": "cached", "added": 0, "seconds": time.perf_counter() - start}
+        self.dirty = True
+        return {"mode": "update", "added": added, "removed": len(stale), "seconds": time.perf_counter() - start}
+
+    def add(self, name: str, faces, filenames=()):
+        """Append freshly saved crops of ``name``; O(1) per face.
+
+        With a store, the crops must be the rows just appended to it.
+        """
+        label = self._label_id(name)
+        faces = list(faces)
+        if not faces:
+            return
+        self.index.add(np.stack([self.embedder.embed(face) for face in faces]), [label] * len(faces))
+        if self.store is not None and self.store_rows + len(faces) == len(self.store):
+            self.store_rows = len(self.store)
+        self.row_files.extend(filenames)
+        for filename in filenames:
+            self.files[filename] = _file_key(os.stat(os.path.join(self.dataset_dir, filename)))
+        self.dirty = True
+
+    def predict(self, face):
+        """Return ``(name, 100 * cosine distance)`` of the nearest enrolled face."""
+        row, similarity = self.index.search(self.embedder.embed(face))
+        if row is None:
+            return None, None
+        return self.names[self.index.labels[row]], 100.0 * (1.0 - similarity)
+
+    def save(self):
+        if not self.dirty:
+            return
+        os.makedirs(self.model_dir, exist_ok=True)
+        meta = {
+            "version": INDEX_VERSION,
+            "embedder": self.embedder.name,
+            "names": self.names,
+            "rows": self.row_files,
+            "files": self.files,
+            "store_rows": self.store_rows,
+        }
+        tmp = self.index_path[:-len(".npz")] + ".tmp.npz"
+        size = self.index.size
+        np.savez(tmp, vectors=self.index.vectors[:size], labels=self.index.labels[:size],
+                 meta=np.array(json.dumps(meta)))
+        os.replace(tmp, self.index_path)
+        self.dirty = False
+
+
+def _percentiles_ms(samples) -> str:
+    p50, p99 = np.percentile(np.array(samples) * 1000, [50, 99])
+    return f"{p50:8.3f} {p99:8.3f}"
+
+
+def benchmark(sizes=(100, 1000, 10000, 50000), queries: int = 200, dim: int | None = None):
+    """Enrollment and query latency versus identities (``python face_index.py``)."""
+    from face_model import _synthetic_face
+
+    rng = np.random.default_rng(0)
+    embedder = LbpEmbedder()
+    faces = [_synthetic_face(rng, i % 5) for i in range(50)]
+    start = time.perf_counter()
+    for face in faces:
+        embedder.embed(face)
+    print(f"[BENCH] {embedder.name} embedding: {1000 * (time.perf_counter() - start) / len(faces):.2f} ms/face, "
+          f"dim {embedder.dim}")
+
+    dim = dim or embedder.dim
+    probes = (8, 32, None)  # None: NPROBE_FRACTION of the buckets
+    labels = [f"nprobe={p}" if p else f"nprobe={NPROBE_FRACTION:.0%}" for p in probes]
+    header = "".join(f" {label + ' p50':>15} {'p99':>8} {'recall@1':>8}" for label in labels)
+    print(f"[BENCH] {'identities':>10} {'enroll/face':>12} {'exact p50':>9} {'p99':>8}{header}  (ms)")
+    for size in sizes:
+        # One unit vector per identity; queries are noisy copies of enrolled ones.
+        base = rng.standard_normal((size, dim)).astype(np.float32)
+        base /= np.linalg.norm(base, axis=1, keepdims=True)
+        index = EmbeddingIndex(dim)
+        start = time.perf_counter()
+        for i in range(size):
+            index.add(base[i], [i])
+        enroll = (time.perf_counter() - start) / size
+        targets = rng.integers(0, size, queries)
+        noisy = base[targets] + 0.05 * rng.standard_normal((queries, dim)).astype(np.float32)
+        noisy /= np.linalg.norm(noisy, axis=1, keepdims=True)
+
+        exact = []
+        for q in noisy:
+            start = time.perf_counter()
+            index.search(q)
+            exact.append(time.perf_counter() - start)
+        index.build_coarse()
+        columns = ""
+        for nprobe in probes:
+            coarse, hits = [], 0
+            for q, target in zip(noisy, targets):
+                start = time.perf_counter()
+                row, _ = index.search(q, nprobe)
+                coarse.append(time.perf_counter() - start)
+                hits += row == target
+            columns += f" {_percentiles_ms(coarse):>24} {hits / queries:>8.2f}"
+        print(f"[BENCH] {size:>10} {1000 * enroll:>12.4f} {_percentiles_ms(exact)}{columns}")
+
+
+if __name__ == "__main__":
+    benchmark()
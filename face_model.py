@@ -0,0 +1,295 @@
+"""Incrementally trained LBPH face model with an on-disk cache.
+
+``test.py`` used to decode every JPEG in the dataset and retrain LBPH from
+scratch at startup and after every capture. ``FaceModel`` instead keeps the
+trained recognizer (``write``/``read``) next to a manifest of the dataset
+files it contains, keyed by name with their size and mtime:
+
+* ``sync()`` stats the dataset and feeds only files missing from the
+  manifest to ``recognizer.update()``. LBPH cannot forget samples, so a
+  deleted or modified file triggers one full retrain.
+* ``add()`` updates the model with freshly captured crops that are already
+  in memory, so nothing is decoded again.
+* ``save()`` writes the model and then the manifest (with the sample count,
+  so a model/manifest mismatch is detected and retrained). Writing is slow
+  for large models and is done on exit; if the process dies first, the next
+  ``sync()`` simply re-adds the files the saved manifest does not list.
+
+With a ``FaceStore`` (face_store.py) the model trains from its packed
+crops instead: the manifest records how many store rows it contains and
+``sync()`` feeds it the rows appended since.
+
+Requires opencv-contrib-python for ``cv2.face``; without it ``available`` is
+False and the dataset can still be collected.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+DATASET_DIR = "faces_dataset"
+MODEL_DIR = "faces_model"
+MODEL_FILE = "lbph.yml.gz"
+MANIFEST_FILE = "manifest.json"
+MANIFEST_VERSION = 1
+LBPH_PARAMS = {"radius": 1, "neighbors": 8, "grid_x": 8, "grid_y": 8}
+
+
+def label_from_filename(filename: str) -> str:
+    return filename.split("_")[0]
+
+
+def _file_key(st: os.stat_result) -> list:
+    return [st.st_size, st.st_mtime_ns]
+
+
+def _create_recognizer():
+    try:
+        return cv2.face.LBPHFaceRecognizer_create(**LBPH_PARAMS)
+    except AttributeError:
+        return None
+
+
+class FaceModel:
+    def __init__(self, dataset_dir: str = DATASET_DIR, model_dir: str = MODEL_DIR, store=None):
+        self.dataset_dir = dataset_dir
+        self.store = store  # FaceStore to train from instead of the dataset JPEGs
+        self.model_dir = model_dir
+        self.model_path = os.path.join(model_dir, MODEL_FILE)
+        self.manifest_path = os.path.join(model_dir, MANIFEST_FILE)
+        self.recognizer = _create_recognizer()
+        self.label_ids = {}  # name -> LBPH label
+        self.files = {}  # dataset filename -> [size, mtime_ns] of the trained version
+        self.samples = 0
+        self.store_rows = 0  # FaceStore rows in the model
+        self.dirty = False  # in-memory model differs from the saved one
+
+    @property
+    def available(self) -> bool:
+        return self.recognizer is not None
+
+    @property
+    def labels(self) -> dict:
+        """LBPH label -> name."""
+        return {v: k for k, v in self.label_ids.items()}
+
+    def _label_id(self, name: str) -> int:
+        if name not in self.label_ids:
+            self.label_ids[name] = len(self.label_ids)
+        return self.label_ids[name]
+
+    def _scan(self) -> dict:
+        files = {}
+        with os.scandir(self.dataset_dir) as it:
+            for entry in it:
+                if entry.name.endswith(".jpg") and entry.is_file():
+                    files[entry.name] = _file_key(entry.stat())
+        return files
+
+    def load(self) -> bool:
+        """Restore the saved model; returns False if there is none or it is stale."""
+        if not self.available or not os.path.exists(self.manifest_path) or not os.path.exists(self.model_path):
+            return False
+        try:
+            with open(self.manifest_path, "r", encoding="utf-8") as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return False
+        if manifest.get("version") != MANIFEST_VERSION or manifest.get("params") != LBPH_PARAMS:
+            return False
+        recognizer = _create_recognizer()
+        try:
+            recognizer.read(self.model_path)
+        except cv2.error:
+            return False
+        if len(recognizer.getLabels()) != manifest.get("samples"):
+            return False  # model and manifest were written by different runs
+        self.recognizer = recognizer
+        self.label_ids = manifest["labels"]
+        self.files = manifest["files"]
+        self.samples = manifest["samples"]
+        self.store_rows = manifest.get("store_rows", 0)
+        self.dirty = False
+        return True
+
+    def _read_faces(self, filenames):
+        faces, labels, keys = [], [], {}
+        for filename in filenames:
+            path = os.path.join(self.dataset_dir, filename)
+            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                continue
+            faces.append(img)
+            labels.append(self._label_id(label_from_filename(filename)))
+            keys[filename] = _file_key(os.stat(path))
+        return faces, labels, keys
+
+    def _store_faces(self, start: int, stop: int):
+        crops = self.store.crops[start:stop]
+        labels = [self._label_id(self.store.names[label]) for label in self.store.labels[start:stop]]
+        return list(crops), labels
+
+    def retrain(self) -> dict:
+        """Train from scratch on every file in the dataset (or every store row)."""
+        start = time.perf_counter()
+        self.recognizer = _create_recognizer()
+        self.label_ids, self.files, self.samples, self.store_rows = {}, {}, 0, 0
+        if self.store is not None:
+            self.store_rows = len(self.store)
+            faces, labels = self._store_faces(0, self.store_rows)
+            keys = {}
+        else:
+            faces, labels, keys = self._read_faces(sorted(self._scan()))
+        if faces:
+            self.recognizer.train(faces, np.array(labels))
+        self.files, self.samples = keys, len(faces)
+        self.dirty = True
+        return {"mode": "retrain", "added": len(faces), "seconds": time.perf_counter() - start}
+
+    def _sync_store(self) -> dict:
+        start = time.perf_counter()
+        total = len(self.store)
+        if self.files or self.samples != self.store_rows or total < self.store_rows:
+            return self.retrain()  # trained from JPEGs or from another store
+        if total == self.store_rows:
+            return {"mode": "cached", "added": 0, "seconds": time.perf_counter() - start}
+        faces, labels = self._store_faces(self.store_rows, total)
+        self._update(faces, labels)
+        self.store_rows = total
+        return {"mode": "update", "added": len(faces), "seconds": time.perf_counter() - start}
+
+    def sync(self) -> dict:
+        """Bring the model up to date with the dataset directory (or store)."""
+        start = time.perf_counter()
+        if not self.available:
+            return {"mode": "unavailable", "added": 0, "seconds": 0.0}
+        if self.store is not None:
+            return self._sync_store()
+        if self.store_rows:
+            return self.retrain()  # trained from a store
+        current = self._scan()
+        if any(current.get(name) != key for name, key in self.files.items()):
+            return self.retrain()  # a trained file was removed or rewritten
+        new = sorted(name for name in current if name not in self.files)
+        if not new:
+            return {"mode": "cached", "added": 0, "seconds": time.perf_counter() - start}
+        faces, labels, keys = self._read_faces(new)
+        self._update(faces, labels)
+        self.files.update(keys)
+        return {"mode": "update", "added": len(faces), "seconds": time.perf_counter() - start}
+
+    def _update(self, faces, labels):
+        if not faces:
+            return
+        if self.samples:
+            self.recognizer.update(faces, np.array(labels))
+        else:
+            self.recognizer.train(faces, np.array(labels))
+        self.samples += len(faces)
+        self.dirty = True
+
+    def add(self, name: str, faces, filenames=()):
+        """Add freshly saved crops of ``name`` without re-reading them.
+
+        With a store, the crops must be the rows just appended to it;
+        ``filenames`` is then unused.
+        """
+        if not self.available:
+            return
+        label = self._label_id(name)
+        self._update(list(faces), [label] * len(faces))
+        if self.store is not None and self.store_rows + len(faces) == len(self.store):
+            self.store_rows = len(self.store)
+        for filename in filenames:
+            self.files[filename] = _file_key(os.stat(os.path.join(self.dataset_dir, filename)))
+
+    def predict(self, face):
+        """Return ``(name, confidence)``; LBPH confidence is a distance, lower is better."""
+        if not self.available or not self.samples:
+            return None, None
+        label, confidence = self.recognizer.predict(face)
+        return self.labels.get(label), confidence
+
+    def save(self):
+        if not self.available or not self.dirty:
+            return
+        os.makedirs(self.model_dir, exist_ok=True)
+        tmp_model = self.model_path + ".tmp" + MODEL_FILE[MODEL_FILE.index("."):]
+        self.recognizer.write(tmp_model)
+        os.replace(tmp_model, self.model_path)
+        manifest = {
+            "version": MANIFEST_VERSION,
+            "params": LBPH_PARAMS,
+            "samples": self.samples,
+            "store_rows": self.store_rows,
+            "labels": self.label_ids,
+            "files": self.files,
+        }
+        tmp_manifest = self.manifest_path + ".tmp"
+        with open(tmp_manifest, "w", encoding="utf-8") as f:
+            json.dump(manifest, f)
+        os.replace(tmp_manifest, self.manifest_path)
+        self.dirty = False
+
+
+def _synthetic_face(rng, identity: int, size=(200, 200)):
+    """A textured stand-in for a face crop: per-identity pattern plus noise."""
+    base = np.random.default_rng(identity).integers(0, 255, (size[1] // 8, size[0] // 8), dtype=np.uint8)
+    img = cv2.resize(base, size, interpolation=cv2.INTER_CUBIC)
+    noise = rng.integers(-20, 20, img.shape)
+    return np.clip(img.astype(np.int16) + noise, 0, 255).astype(np.uint8)
+
+
+def benchmark(sizes=(50, 100, 200, 400), batch: int = 20, identities: int = 5):
+    """Startup and retrain time versus dataset size (``python face_model.py``)."""
+    import tempfile
+
+    rng = np.random.default_rng(0)
+    print(f"[BENCH] {'files':>6} {'full train':>11} {'save':>8} {'cached start':>13} "
+          f"{'+{} on start'.format(batch):>12} {'add {}'.format(batch):>8}  (seconds)")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = os.path.join(tmp, "faces")
+            os.makedirs(dataset)
+            for i in range(size):
+                cv2.imwrite(os.path.join(dataset, f"p{i % identities}_{i:06d}.jpg"),
+                            _synthetic_face(rng, i % identities))
+            model_dir = os.path.join(tmp, "model")
+
+            cold = FaceModel(dataset, model_dir)
+            full = cold.sync()["seconds"]  # no cache: decode + train everything
+            start = time.perf_counter()
+            cold.save()
+            save = time.perf_counter() - start
+
+            start = time.perf_counter()
+            warm = FaceModel(dataset, model_dir)
+            assert warm.load()
+            warm.sync()
+            cached = time.perf_counter() - start
+
+            for i in range(batch):
+                cv2.imwrite(os.path.join(dataset, f"new_{i:06d}.jpg"), _synthetic_face(rng, identities))
+            start = time.perf_counter()
+            again = FaceModel(dataset, model_dir)
+            again.load()
+            result = again.sync()
+            assert result["mode"] == "update" and result["added"] == batch
+            incremental = time.perf_counter() - start
+
+            crops = [_synthetic_face(rng, identities + 1) for _ in range(batch)]
+            names = [f"extra_{i:06d}.jpg" for i in range(batch)]
+            for name, crop in zip(names, crops):
+                cv2.imwrite(os.path.join(dataset, name), crop)
+            start = time.perf_counter()
+            again.add("extra", crops, names)
+            add = time.perf_counter() - start
+            print(f"[BENCH] {size:>6} {full:>11.3f} {save:>8.3f} {cached:>13.3f} {incremental:>12.3f} {add:>8.3f}")
+
+
+if __name__ == "__main__":
+    benchmark()
@@ -0,0 +1,243 @@
+"""Multi-process capture / recognition / display pipeline for test.py.
+
+Three processes share frames through a ``FrameRing`` in
+``multiprocessing.shared_memory`` instead of pickling them:
+
+* capture: ``cap.read()`` decodes straight into the next ring slot and
+  publishes its sequence number. It never waits for consumers; a slot is
+  simply overwritten once the ring wraps.
+* recognizer: always takes the newest published frame, so when detection
+  or LBPH is slower than the camera, frames are skipped, not queued. It
+  owns the face model (LBPH or embedding index) and runs the ``TrackedRecognizer`` and enrollment
+  (the largest tracked face every ``SAMPLE_INTERVAL`` seconds) without
+  ever blocking capture or display.
+* display (the calling process): copies the newest frame, draws the most
+  recent results and handles keys. Only small result and command messages
+  go through queues.
+
+The recognizer can also attach to a ring that is already being filled, such
+as the one of core.py's ``CameraHub``; then no capture process is started.
+"""
+from __future__ import annotations
+
+import multiprocessing as mp
+import os
+import queue
+import time
+from datetime import datetime
+
+import numpy as np
+
+from camera_hub import FRAME_SHAPE, RING_SLOTS, FrameRing
+
+POLL_INTERVAL = 0.003  # seconds between checks for a new frame
+SAMPLE_INTERVAL = 1.0  # seconds between enrollment samples
+SAMPLE_SIZE = 20
+
+
+def capture_worker(ring_spec, source, stop):
+    import cv2
+
+    cv2.setNumThreads(1)
+    shape, slots, name = ring_spec
+    ring = FrameRing(shape, slots, name)
+    cap = cv2.VideoCapture(source)
+    height, width = shape[:2]
+    cap.set(cv2.CAP_PROP_FRAME_WIDTH, width)
+    cap.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    # A camera paces itself; a video file is played back at its own frame rate.
+    period = 1.0 / (cap.get(cv2.CAP_PROP_FPS) or 30.0) if isinstance(source, str) else 0.0
+    next_frame = time.monotonic()
+    try:
+        while not stop.is_set():
+            if period:
+                next_frame += period
+                time.sleep(max(0.0, next_frame - time.monotonic()))
+            seq, view = ring.begin_write()
+            ret, frame = cap.read(view)
+            if not ret:
+                if isinstance(source, str):
+                    break  # end of video file
+                time.sleep(0.01)
+                continue
+            if frame is not view and frame.ctypes.data != view.ctypes.data:
+                # Camera ignored the requested size: scale into the slot.
+                cv2.resize(frame, (width, height), dst=view)
+            ring.commit(seq)
+    finally:
+        cap.release()
+        ring.close()
+
+
+def recognizer_worker(ring_spec, commands, results, stop, dataset_dir, options, interval: float = 0.0,
+                      backend: str = "lbph", store_dir: str | None = None, coarse: bool = False,
+                      nprobe: int | None = None):
+    import cv2
+
+    from face_index import create_model, default_threshold
+    from face_store import FaceStore
+    from face_tracker import FACE_SIZE, TrackedRecognizer, load_cascade
+
+    cv2.setNumThreads(1)
+    shape, slots, name = ring_spec
+    try:
+        cascade = load_cascade()
+    except FileNotFoundError as e:
+        results.put(("status", f"Recognizer stopped: {e}"))
+        return
+    ring = FrameRing(shape, slots, name)
+    store = None
+    if store_dir:
+        store = FaceStore(store_dir)
+        store.import_jpegs(dataset_dir)
+    model = create_model(backend, dataset_dir, store=store, coarse=coarse, nprobe=nprobe)
+    options = {"threshold": default_threshold(backend), **options}
+    if model.available:
+        model.load()
+        sync = model.sync()
+        results.put(("status", f"Model ready ({sync['mode']}, +{sync['added']} files): "
+                               f"{len(model.label_ids)} identities."))
+    else:
+        results.put(("status", "OpenCV built without 'face' module; recognition disabled."))
+    processor = TrackedRecognizer(cascade, model if model.available else None, **options)
+    frame = np.empty(shape, dtype=np.uint8)
+    last_seq = -1
+    enroll = None  # {"name", "crops", "files", "next"}
+    processed = skipped = 0
+    next_frame = time.monotonic()  # at most one frame per interval
+    try:
+        while not stop.is_set():
+            try:
+                while True:
+                    cmd = commands.get_nowait()
+                    if cmd[0] == "threshold":
+                        processor.threshold = cmd[1]
+                    elif cmd[0] == "sync" and model.available:
+                        if store is not None:
+                            store.import_jpegs(dataset_dir)
+                        sync = model.sync()
+                        results.put(("status", f"{sync['mode']} (+{sync['added']} files) in "
+                                               f"{sync['seconds']:.2f}s: {len(model.label_ids)} identities."))
+                    elif cmd[0] == "enroll":
+                        enroll = {"name": cmd[1], "crops": [], "files": [], "next": time.monotonic()}
+                        results.put(("status", f"Collecting {SAMPLE_SIZE} samples for '{cmd[1]}'..."))
+            except queue.Empty:
+                pass
+
+            seq = ring.latest()
+            if seq == last_seq or time.monotonic() < next_frame:
+                time.sleep(POLL_INTERVAL)
+                continue
+            next_frame = max(next_frame + interval, time.monotonic())
+            if last_seq >= 0:
+                skipped += max(0, seq - last_seq - 1)
+            seq, got = ring.read(seq, out=frame)
+            if got is None:
+                continue
+            last_seq = seq
+            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+            faces = processor.process(gray)
+            processed += 1
+            results.offer(("faces", seq, faces, processed, skipped))
+
+            if enroll is not None and time.monotonic() >= enroll["next"]:
+                enroll["next"] += SAMPLE_INTERVAL
+                if faces:
+                    x, y, w, h = max((f.box for f in faces), key=lambda b: b[2] * b[3])
+                    crop = cv2.resize(gray[y:y+h, x:x+w], FACE_SIZE)
+                    enroll["crops"].append(crop)
+                    if store is None:
+                        filename = f"{enroll['name']}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+                        cv2.imwrite(os.path.join(dataset_dir, filename), crop)
+                        enroll["files"].append(filename)
+                results.put(("enroll", enroll["name"], len(enroll["crops"]), SAMPLE_SIZE))
+                if len(enroll["crops"]) >= SAMPLE_SIZE:
+                    if store is not None:
+                        store.append(enroll["name"], enroll["crops"])
+                    model.add(enroll["name"], enroll["crops"], enroll["files"])
+                    results.put(("status", f"Added '{enroll['name']}'. Known identities: {len(model.label_ids)}"))
+                    enroll = None
+    finally:
+        model.save()
+        ring.close()
+
+
+class FacePipeline:
+    """Starts the capture and recognizer processes around a shared ``FrameRing``.
+
+    Pass ``ring`` to recognise frames from an existing ring (e.g. a
+    ``CameraHub``'s) instead of capturing from ``source``; ``interval`` limits
+    how often the recognizer takes a frame and ``backend`` picks the face
+    model (see ``face_index.create_model``, which also takes ``coarse`` and
+    ``nprobe``); with ``store_dir`` crops live in a ``FaceStore`` instead of
+    dataset JPEGs.
+    """
+
+    def __init__(self, source=0, dataset_dir: str = "faces_dataset", shape=FRAME_SHAPE,
+                 slots: int = RING_SLOTS, ring: FrameRing | None = None, interval: float = 0.0,
+                 backend: str = "lbph", store_dir: str | None = None, coarse: bool = False,
+                 nprobe: int | None = None, **recognizer_options):
+        ctx = mp.get_context("spawn")  # no forked OpenCV/GUI state in the workers
+        self.owns_ring = ring is None
+        self.ring = FrameRing(shape, slots) if ring is None else ring
+        self.stop_event = ctx.Event()
+        self.commands = ctx.Queue()
+        self.results = ctx.Queue(maxsize=64)
+        self.processes = [
+            ctx.Process(target=recognizer_worker,
+                        args=(self.ring.spec(), self.commands, _DropOldest(self.results),
+                              self.stop_event, dataset_dir, recognizer_options, interval, backend,
+                              store_dir, coarse, nprobe),
+                        name="face-recognizer", daemon=True),
+        ]
+        if self.owns_ring:
+            self.processes.append(
+                ctx.Process(target=capture_worker, args=(self.ring.spec(), source, self.stop_event),
+                            name="face-capture", daemon=True))
+
+    def start(self):
+        for p in self.processes:
+            p.start()
+
+    def send(self, *command):
+        self.commands.put(command)
+
+    def poll(self) -> list:
+        """Drain pending recognizer messages without blocking."""
+        messages = []
+        while True:
+            try:
+                messages.append(self.results.get_nowait())
+            except queue.Empty:
+                return messages
+
+    def close(self, timeout: float = 10.0):
+        self.stop_event.set()
+        for p in self.processes:
+            p.join(timeout)
+            if p.is_alive():
+                p.terminate()
+        if self.owns_ring:
+            self.ring.close()
+
+
+class _DropOldest:
+    """Results queue for the recognizer: face updates never block on a slow display."""
+
+    def __init__(self, q):
+        self.q = q
+
+    def put(self, item):
+        self.q.put(item)
+
+    def offer(self, item):
+        """Queue ``item``, discarding the oldest message if the queue is full."""
+        while True:
+            try:
+                self.q.put_nowait(item)
+                return
+            except queue.Full:
+                try:
+                    self.q.get_nowait()
+                except queue.Empty:
+                    pass
@@ -0,0 +1,200 @@
+"""Packed, memory-mapped face dataset.
+
+``faces_dataset/`` holds one timestamped JPEG per crop, so a cold start
+lists the directory and decodes thousands of tiny files, and labels come
+from splitting filenames. ``FaceStore`` keeps the same crops in three files:
+
+* ``crops.u8``: raw uint8 ``FACE_SIZE`` crops back to back, opened with
+  ``np.memmap``, so loading is a page-cache read rather than N opens and
+  JPEG decodes;
+* ``labels.i32``: one int32 label per crop;
+* ``index.json``: label names, the committed row count and the JPEG each
+  imported row came from.
+
+Appends write the new rows after the committed ones and then replace the
+index, so a crash mid-append leaves the old count and the partial rows are
+overwritten by the next append. ``import_jpegs()`` copies a JPEG folder in
+once (and only new files on later runs).
+
+``python face_store.py`` compares loading and LBPH training from the JPEG
+folder and from the store.
+"""
+from __future__ import annotations
+
+import json
+import os
+import time
+
+import cv2
+import numpy as np
+
+from face_model import DATASET_DIR, label_from_filename
+
+STORE_DIR = "faces_store"
+CROPS_FILE = "crops.u8"
+LABELS_FILE = "labels.i32"
+INDEX_FILE = "index.json"
+STORE_VERSION = 1
+FACE_SIZE = (200, 200)  # (width, height), as in test.py
+
+
+class FaceStore:
+    def __init__(self, path: str = STORE_DIR, face_size=FACE_SIZE):
+        self.path = path
+        self.crops_path = os.path.join(path, CROPS_FILE)
+        self.labels_path = os.path.join(path, LABELS_FILE)
+        self.index_path = os.path.join(path, INDEX_FILE)
+        self.face_size = tuple(face_size)
+        self.names = []  # label -> name
+        self.label_ids = {}  # name -> label
+        self.sources = {}  # imported JPEG filename -> row
+        self.count = 0
+        self._crops = self._labels = None  # memmaps of the committed rows
+        if os.path.exists(self.index_path):
+            with open(self.index_path, "r", encoding="utf-8") as f:
+                index = json.load(f)
+            if index.get("version") != STORE_VERSION:
+                raise ValueError(f"Unsupported face store version in {self.index_path}")
+            self.face_size = tuple(index["face_size"])
+            self.names = index["names"]
+            self.label_ids = {name: i for i, name in enumerate(self.names)}
+            self.sources = index["sources"]
+            self.count = index["count"]
+
+    def __len__(self) -> int:
+        return self.count
+
+    @property
+    def shape(self) -> tuple:
+        return self.face_size[1], self.face_size[0]
+
+    @property
+    def crops(self) -> np.ndarray:
+        """Read-only ``(count, height, width)`` memmap of all crops."""
+        if self._crops is None or len(self._crops) != self.count:
+            self._crops = (np.memmap(self.crops_path, dtype=np.uint8, mode="r", shape=(self.count,) + self.shape)
+                           if self.count else np.empty((0,) + self.shape, dtype=np.uint8))
+        return self._crops
+
+    @property
+    def labels(self) -> np.ndarray:
+        if self._labels is None or len(self._labels) != self.count:
+            self._labels = (np.memmap(self.labels_path, dtype=np.int32, mode="r", shape=(self.count,))
+                            if self.count else np.empty(0, dtype=np.int32))
+        return self._labels
+
+    def name_of(self, row: int) -> str:
+        return self.names[self.labels[row]]
+
+    def _label_id(self, name: str) -> int:
+        if name not in self.label_ids:
+            self.label_ids[name] = len(self.names)
+            self.names.append(name)
+        return self.label_ids[name]
+
+    def _write_at(self, path: str, offset: int, data: np.ndarray):
+        with open(path, "r+b" if os.path.exists(path) else "wb") as f:
+            f.seek(offset)
+            f.write(data.tobytes())
+            f.truncate()  # drop rows left over from an interrupted append
+            f.flush()
+            os.fsync(f.fileno())
+
+    def _append(self, crops: np.ndarray, labels, sources: dict | None = None) -> range:
+        os.makedirs(self.path, exist_ok=True)
+        crops = np.ascontiguousarray(crops, dtype=np.uint8).reshape((-1,) + self.shape)
+        start = self.count
+        self._write_at(self.crops_path, start * crops[0].nbytes if len(crops) else 0, crops)
+        self._write_at(self.labels_path, start * 4, np.asarray(labels, dtype=np.int32))
+        self.count += len(crops)
+        if sources:
+            self.sources.update(sources)
+        index = {
+            "version": STORE_VERSION,
+            "face_size": list(self.face_size),
+            "count": self.count,
+            "names": self.names,
+            "sources": self.sources,
+        }
+        tmp = self.index_path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(index, f)
+        os.replace(tmp, self.index_path)  # commits the new rows
+        return range(start, self.count)
+
+    def append(self, name: str, crops) -> range:
+        """Add crops of ``name``; returns their rows."""
+        crops = list(crops)
+        if not crops:
+            return range(self.count, self.count)
+        label = self._label_id(name)
+        return self._append(np.stack(crops), [label] * len(crops))
+
+    def import_jpegs(self, dataset_dir: str = DATASET_DIR) -> int:
+        """Copy in the folder's ``<name>_*.jpg`` crops that are not in the store yet."""
+        if not os.path.isdir(dataset_dir):
+            return 0
+        crops, labels, sources = [], [], {}
+        with os.scandir(dataset_dir) as it:
+            filenames = sorted(e.name for e in it if e.name.endswith(".jpg") and e.name not in self.sources)
+        for filename in filenames:
+            img = cv2.imread(os.path.join(dataset_dir, filename), cv2.IMREAD_GRAYSCALE)
+            if img is None:
+                continue
+            if img.shape != self.shape:
+                img = cv2.resize(img, self.face_size)
+            sources[filename] = self.count + len(crops)
+            crops.append(img)
+            labels.append(self._label_id(label_from_filename(filename)))
+        if crops:
+            self._append(np.stack(crops), labels, sources)
+        return len(crops)
+
+
+def benchmark(sizes=(200, 1000, 5000), identities: int = 10):
+    """Cold-start load and LBPH train time, JPEG folder vs packed store (``python face_store.py``)."""
+    import tempfile
+
+    from face_model import FaceModel, _synthetic_face
+
+    rng = np.random.default_rng(0)
+    print(f"[BENCH] {'crops':>6} {'jpeg load':>10} {'store load':>11} {'import':>8} "
+          f"{'jpeg train':>11} {'store train':>12}  (seconds)")
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as tmp:
+            dataset = os.path.join(tmp, "faces")
+            os.makedirs(dataset)
+            for i in range(size):
+                cv2.imwrite(os.path.join(dataset, f"p{i % identities}_{i:06d}.jpg"),
+                            _synthetic_face(rng, i % identities, FACE_SIZE))
+
+            start = time.perf_counter()
+            faces = [cv2.imread(os.path.join(dataset, f), cv2.IMREAD_GRAYSCALE) for f in sorted(os.listdir(dataset))]
+            jpeg_load = time.perf_counter() - start
+
+            start = time.perf_counter()
+            FaceStore(os.path.join(tmp, "store")).import_jpegs(dataset)
+            imported = time.perf_counter() - start
+
+            start = time.perf_counter()
+            store = FaceStore(os.path.join(tmp, "store"))
+            crops = np.array(store.crops)  # touch every page
+            labels = np.array(store.labels)
+            store_load = time.perf_counter() - start
+            assert len(faces) == len(crops) == len(labels)
+
+            model = FaceModel(dataset, os.path.join(tmp, "m1"))
+            if not model.available:
+                print(f"[BENCH] {size:>6} {jpeg_load:>10.3f} {store_load:>11.4f} {imported:>8.3f}  (no cv2.face)")
+                continue
+            jpeg_train = model.retrain()["seconds"]
+            start = time.perf_counter()
+            model = FaceModel(dataset, os.path.join(tmp, "m2"), store=FaceStore(os.path.join(tmp, "store")))
+            model.retrain()
+            store_train = time.perf_counter() - start
+            print(f"[BENCH] {size:>6} {jpeg_load:>10.3f} {store_load:>11.4f} {imported:>8.3f} "
+                  f"{jpeg_train:>11.3f} {store_train:>12.3f}")
+
+
+if __name__ == "__main__":
+    benchmark()
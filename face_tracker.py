@@ -0,0 +1,199 @@
+"""Face detection, tracking and per-track recognition for the camera loop.
+
+Two interchangeable frame processors, both taking a grayscale frame and
+returning ``FaceResult`` tuples:
+
+* ``FrameRecognizer`` is the original approach: Haar detection on the full
+  frame and an LBPH prediction for every face, every frame.
+* ``TrackedRecognizer`` runs detection on a downscaled frame every
+  ``detect_every`` frames and keeps boxes as tracks in between (greedy IoU
+  matching, falling back to centroid distance). Labels live on the track, so
+  a face is only recognised again when its track is new or its label is
+  stale: after ``recognize_every`` frames, or ``retry_unknown_every`` frames
+  while it is still unknown.
+"""
+from __future__ import annotations
+
+import itertools
+from typing import NamedTuple
+
+import cv2
+
+FACE_SIZE = (200, 200)
+THRESHOLD_CONFIDENCE = 70  # LBPH distance; lower is better
+DETECT_EVERY = 5
+DETECT_SCALE = 0.5
+RECOGNIZE_EVERY = 30  # frames before a known label is checked again
+RETRY_UNKNOWN_EVERY = 10
+IOU_MATCH = 0.3
+MAX_MISSED = 2  # detections a track may miss before it is dropped
+
+
+class FaceResult(NamedTuple):
+    box: tuple  # (x, y, w, h) in frame pixels
+    name: str | None  # None when unknown or below the confidence threshold
+    confidence: float | None
+    track_id: int
+
+
+def load_cascade():
+    path = cv2.data.haarcascades + "haarcascade_frontalface_default.xml"
+    cascade = cv2.CascadeClassifier(path)
+    if cascade.empty():
+        raise FileNotFoundError(f"Haar cascade not found or unreadable: {path}")
+    return cascade
+
+
+def detect_faces(cascade, gray, scale: float = 1.0):
+    """Haar detection, optionally on a downscaled copy; boxes are in ``gray`` pixels."""
+    if scale != 1.0:
+        small = cv2.resize(gray, None, fx=scale, fy=scale, interpolation=cv2.INTER_AREA)
+        dets = cascade.detectMultiScale(small, 1.3, 5)
+        return [tuple(int(round(v / scale)) for v in det) for det in dets]
+    return [tuple(int(v) for v in det) for det in cascade.detectMultiScale(gray, 1.3, 5)]
+
+
+def recognize(model, gray, box, threshold: float):
+    """Return ``(name, confidence)`` for one box; name is None if not confident."""
+    if model is None:
+        return None, None
+    x, y, w, h = box
+    face_norm = cv2.resize(gray[y:y+h, x:x+w], FACE_SIZE)
+    try:
+        name, confidence = model.predict(face_norm)
+    except cv2.error:
+        return None, None
+    if name is None or confidence > threshold:
+        return None, confidence
+    return name, confidence
+
+
+def iou(a, b) -> float:
+    ax, ay, aw, ah = a
+    bx, by, bw, bh = b
+    iw = min(ax + aw, bx + bw) - max(ax, bx)
+    ih = min(ay + ah, by + bh) - max(ay, by)
+    if iw <= 0 or ih <= 0:
+        return 0.0
+    inter = iw * ih
+    return inter / (aw * ah + bw * bh - inter)
+
+
+class Track:
+    def __init__(self, track_id: int, box, frame: int):
+        self.id = track_id
+        self.box = box
+        self.name = None
+        self.confidence = None
+        self.recognized_at = None  # frame of the last recognition
+        self.last_seen = frame
+        self.missed = 0
+
+    def needs_recognition(self, frame: int, recognize_every: int, retry_unknown_every: int) -> bool:
+        if self.recognized_at is None:
+            return True
+        every = recognize_every if self.name is not None else retry_unknown_every
+        return frame - self.recognized_at >= every
+
+
+class FaceTracker:
+    def __init__(self, iou_match: float = IOU_MATCH, max_missed: int = MAX_MISSED):
+        self.iou_match = iou_match
+        self.max_missed = max_missed
+        self.tracks = []
+        self._ids = itertools.count()
+
+    def update(self, boxes, frame: int) -> list:
+        """Associate new detections with tracks; returns the live tracks."""
+        pairs = []
+        for ti, track in enumerate(self.tracks):
+            for bi, box in enumerate(boxes):
+                score = iou(track.box, box)
+                if score < self.iou_match:
+                    # Fast motion between detections: accept a close centroid.
+                    tx, ty, tw, th = track.box
+                    bx, by, bw, bh = box
+                    dist = abs(tx + tw / 2 - bx - bw / 2) + abs(ty + th / 2 - by - bh / 2)
+                    if dist > 0.5 * max(tw, th):
+                        continue
+                    score = 0.0
+                pairs.append((score, ti, bi))
+        pairs.sort(reverse=True)
+        used_tracks, used_boxes = set(), set()
+        for _, ti, bi in pairs:
+            if ti in used_tracks or bi in used_boxes:
+                continue
+            used_tracks.add(ti)
+            used_boxes.add(bi)
+            track = self.tracks[ti]
+            track.box = boxes[bi]
+            track.last_seen = frame
+            track.missed = 0
+        survivors = []
+        for ti, track in enumerate(self.tracks):
+            if ti not in used_tracks:
+                track.missed += 1
+            if track.missed <= self.max_missed:
+                survivors.append(track)
+        for bi, box in enumerate(boxes):
+            if bi not in used_boxes:
+                survivors.append(Track(next(self._ids), box, frame))
+        self.tracks = survivors
+        return self.tracks
+
+
+class FrameRecognizer:
+    """Detect and recognise every face on every frame (the original loop)."""
+
+    def __init__(self, cascade, model=None, threshold: float = THRESHOLD_CONFIDENCE):
+        self.cascade = cascade
+        self.model = model
+        self.threshold = threshold
+        self.detections = 0
+        self.recognitions = 0
+
+    def process(self, gray) -> list:
+        boxes = detect_faces(self.cascade, gray)
+        self.detections += 1
+        results = []
+        for idx, box in enumerate(boxes):
+            name, confidence = recognize(self.model, gray, box, self.threshold)
+            self.recognitions += 1
+            results.append(FaceResult(box, name, confidence, idx))
+        return results
+
+
+class TrackedRecognizer:
+    """Detect every N frames at reduced scale, track in between, recognise per track."""
+
+    def __init__(self, cascade, model=None, threshold: float = THRESHOLD_CONFIDENCE,
+                 detect_every: int = DETECT_EVERY, detect_scale: float = DETECT_SCALE,
+                 recognize_every: int = RECOGNIZE_EVERY, retry_unknown_every: int = RETRY_UNKNOWN_EVERY):
+        self.cascade = cascade
+        self.model = model
+        self.threshold = threshold
+        self.detect_every = max(1, detect_every)
+        self.detect_scale = detect_scale
+        self.recognize_every = recognize_every
+        self.retry_unknown_every = retry_unknown_every
+        self.tracker = FaceTracker()
+        self.frame = 0
+        self.detections = 0
+        self.recognitions = 0
+
+    def process(self, gray) -> list:
+        if self.frame % self.detect_every == 0:
+            self.tracker.update(detect_faces(self.cascade, gray, self.detect_scale), self.frame)
+            self.detections += 1
+        results = []
+        for track in self.tracker.tracks:
+            if track.missed:
+                continue  # kept briefly in case the face is re-detected, not shown
+            if self.model is not None and track.needs_recognition(
+                    self.frame, self.recognize_every, self.retry_unknown_every):
+                track.name, track.confidence = recognize(self.model, gray, track.box, self.threshold)
+                track.recognized_at = self.frame
+                self.recognitions += 1
+            results.append(FaceResult(track.box, track.name, track.confidence, track.id))
+        self.frame += 1
+        return results
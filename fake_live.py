@@ -0,0 +1,449 @@
+"""In-process stand-in for the Gemini Live API and the local devices.
+
+``FakeLiveClient`` exposes ``client.aio.live.connect(model=..., config=...)``
+and yields a ``FakeLiveSession`` with the subset of the session interface
+``AudioLoop`` uses: ``send``, ``send_realtime_input``, ``send_tool_response``
+and ``receive``. Responses are real ``types.LiveServerMessage`` objects, so
+the client code runs unchanged.
+
+The session replays a script of model turns. A turn starts when the user's
+turn ends: a text message with ``end_of_turn``, an explicit activity end or
+audio stream end, or (standing in for server-side VAD) ``user_turn_ms`` of
+realtime audio. With ``uplink_kbps`` every ``send`` takes as long as its
+payload needs on a link of that rate, standing in for a congested uplink.
+Each turn is a list of events::
+
+    {"delay": 0.3}                    # think time before the next event
+    {"audio_ms": 1200}                # model speech, streamed in chunks
+    {"text": "..."}                   # a text part
+    {"tool_call": {"name": ..., "args": {...}}}  # waits for the tool response
+
+``FakeMic``, ``FakeSpeaker`` and ``FakeCamera`` replace PyAudio streams and
+``cv2.VideoCapture`` with the same method names. All of them report to a
+``LatencyProbe``, which pairs each captured mic chunk and camera frame with
+its arrival at the session, and each emitted model chunk with the moment it
+is written to the speaker.
+"""
+from __future__ import annotations
+
+import asyncio
+import base64
+import bisect
+import contextlib
+import itertools
+import threading
+import time
+from collections import defaultdict
+
+from google.genai import types
+
+SEND_SAMPLE_RATE = 16000
+RECEIVE_SAMPLE_RATE = 24000
+SAMPLE_WIDTH = 2
+MODEL_CHUNK_MS = 40  # size of each streamed model audio message
+STREAM_SPEED = 2.0  # model audio is generated faster than real time
+USER_TURN_MS = 2000  # realtime audio that counts as a finished user turn
+TOOL_RESPONSE_TIMEOUT = 10.0
+
+STAMP_SAMPLES = 4  # mic chunks carry a 16-bit sequence number, 4 bits per sample
+STAMP_BITS = 16
+STAMP_BLOCK = 16  # camera frames carry one as black/white blocks of this size
+
+DEFAULT_SCRIPT = [
+    [{"delay": 0.35}, {"audio_ms": 1600}],
+    [{"delay": 0.25}, {"tool_call": {"name": "robot_motion_status", "args": {"command_id": 1}}},
+     {"delay": 0.2}, {"audio_ms": 900}],
+    [{"delay": 0.3}, {"text": "Looking around."}, {"audio_ms": 1200}],
+]
+
+
+def _percentile(sorted_values: list, q: float) -> float:
+    return sorted_values[min(len(sorted_values) - 1, int(q * len(sorted_values)))]
+
+
+class LatencyProbe:
+    """Per-stage latency samples and byte counters for one benchmark run."""
+
+    def __init__(self):
+        self.samples = defaultdict(list)  # stage -> seconds
+        self.counters = defaultdict(int)
+        self.start = time.perf_counter()
+        self._lock = threading.Lock()
+        self._mic = {}  # sequence -> capture time
+        self._frames = {}
+        self._emitted_ends = []  # cumulative model audio bytes after each chunk
+        self._emitted = []  # (emit time, user turn end time for a turn's first chunk)
+        self._emitted_bytes = 0
+        self._played_bytes = 0
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            self.samples[stage].append(seconds)
+
+    def count(self, name: str, n: int = 1):
+        with self._lock:
+            self.counters[name] += n
+
+    def mic_captured(self, seq: int, t: float):
+        with self._lock:
+            self._mic[seq] = t
+
+    def mic_sent(self, seq: int, t: float):
+        with self._lock:
+            captured = self._mic.pop(seq, None)
+        if captured is not None:
+            self.record("mic -> uplink", t - captured)
+
+    def frame_captured(self, seq: int, t: float):
+        with self._lock:
+            self._frames[seq] = t
+
+    def frame_sent(self, seq: int, t: float):
+        with self._lock:
+            captured = self._frames.pop(seq, None)
+            # Older frames were dropped by the video lane or the scene gate.
+            for stale in [s for s in self._frames if s < seq]:
+                del self._frames[stale]
+        if captured is not None:
+            self.record("camera -> uplink", t - captured)
+
+    def audio_emitted(self, nbytes: int, t: float, turn_ended: float | None = None):
+        with self._lock:
+            self._emitted_bytes += nbytes
+            self._emitted_ends.append(self._emitted_bytes)
+            self._emitted.append((t, turn_ended))
+
+    def audio_played(self, nbytes: int, t: float):
+        with self._lock:
+            i = bisect.bisect_right(self._emitted_ends, self._played_bytes)
+            self._played_bytes += nbytes
+            if i >= len(self._emitted):
+                return
+            emitted, turn_ended = self._emitted[i]
+            if turn_ended is not None:
+                self._emitted[i] = (emitted, None)
+        self.record("model audio -> speaker", t - emitted)
+        if turn_ended is not None:
+            self.record("end of user turn -> first audio out", t - turn_ended)
+
+    def summary(self) -> dict:
+        """Latency percentiles in milliseconds per stage."""
+        out = {}
+        with self._lock:
+            samples = {stage: sorted(values) for stage, values in self.samples.items()}
+        for stage, values in samples.items():
+            if not values:
+                continue
+            out[stage] = {
+                "count": len(values),
+                "p50_ms": 1000 * _percentile(values, 0.50),
+                "p95_ms": 1000 * _percentile(values, 0.95),
+                "p99_ms": 1000 * _percentile(values, 0.99),
+                "max_ms": 1000 * values[-1],
+            }
+        return out
+
+
+def stamp_pcm(chunk: bytearray, seq: int):
+    """Write ``seq`` into the first samples of a 16-bit PCM chunk at near-silent amplitude."""
+    for i in range(STAMP_SAMPLES):
+        nibble = (seq >> (4 * i)) & 0xF
+        chunk[2 * i:2 * i + 2] = nibble.to_bytes(2, "little", signed=True)
+
+
+def read_pcm_stamp(data: bytes) -> int:
+    return sum((int.from_bytes(data[2 * i:2 * i + 2], "little", signed=True) & 0xF) << (4 * i)
+               for i in range(STAMP_SAMPLES))
+
+
+def stamp_frame(frame, seq: int):
+    """Draw ``seq`` as a row of black/white blocks that survives JPEG."""
+    for bit in range(STAMP_BITS):
+        x = bit * STAMP_BLOCK
+        frame[:STAMP_BLOCK, x:x + STAMP_BLOCK] = 255 if (seq >> bit) & 1 else 0
+
+
+def read_frame_stamp(frame) -> int:
+    seq = 0
+    for bit in range(STAMP_BITS):
+        x = bit * STAMP_BLOCK
+        if frame[2:STAMP_BLOCK - 2, x + 2:x + STAMP_BLOCK - 2].mean() > 127:
+            seq |= 1 << bit
+    return seq
+
+
+class FakeMic:
+    """Microphone stream that calls a PyAudio-style callback in real time.
+
+    Alternates ``speech_ms`` of noise with ``silence_ms`` of near silence so
+    the voice-activity gate sees both.
+    """
+
+    def __init__(self, callback, probe: LatencyProbe, chunk_size: int = 1024,
+                 sample_rate: int = SEND_SAMPLE_RATE, speech_ms: int = 2500, silence_ms: int = 1500):
+        import numpy as np
+
+        self.callback = callback
+        self.probe = probe
+        self.chunk_size = chunk_size
+        self.period = chunk_size / sample_rate
+        self.pattern_ms = (speech_ms, silence_ms)
+        rng = np.random.default_rng(0)
+        self._speech = (rng.standard_normal(chunk_size) * 3000).astype("<i2").tobytes()
+        self._silence = bytes(chunk_size * SAMPLE_WIDTH)
+        self._running = True
+        self._thread = threading.Thread(target=self._run, name="fake-mic", daemon=True)
+        self._thread.start()
+
+    def _run(self):
+        speech_ms, silence_ms = self.pattern_ms
+        next_time = time.perf_counter()
+        for seq in itertools.count():
+            next_time += self.period
+            delay = next_time - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            if not self._running:
+                return
+            phase_ms = (seq * self.period * 1000) % (speech_ms + silence_ms)
+            chunk = bytearray(self._speech if phase_ms < speech_ms else self._silence)
+            stamp_pcm(chunk, seq % (1 << STAMP_BITS))
+            self.probe.mic_captured(seq % (1 << STAMP_BITS), time.perf_counter())
+            self.callback(bytes(chunk), self.chunk_size, None, 0)
+
+    def close(self):
+        self._running = False
+        self._thread.join(1.0)
+
+
+class FakeSpeaker:
+    """Output stream whose ``write`` blocks for the duration of the audio."""
+
+    def __init__(self, probe: LatencyProbe, sample_rate: int = RECEIVE_SAMPLE_RATE):
+        self.probe = probe
+        self.bytes_per_second = sample_rate * SAMPLE_WIDTH
+
+    def write(self, data: bytes):
+        self.probe.audio_played(len(data), time.perf_counter())
+        self.probe.count("speaker_bytes", len(data))
+        time.sleep(len(data) / self.bytes_per_second)
+
+    def close(self):
+        pass
+
+
+class FakeCamera:
+    """``cv2.VideoCapture`` stand-in producing a moving test pattern."""
+
+    def __init__(self, probe: LatencyProbe, width: int = 640, height: int = 480):
+        import numpy as np
+
+        self.probe = probe
+        self._frame = np.zeros((height, width, 3), dtype=np.uint8)
+        self._seq = 0
+        self._opened = True
+
+    def isOpened(self) -> bool:
+        return self._opened
+
+    def read(self, image=None):
+        if not self._opened:
+            return False, None
+        if image is not None and image.shape == self._frame.shape:
+            frame = image  # decode into the caller's buffer, like VideoCapture.read(image)
+            frame[...] = self._frame
+        else:
+            frame = self._frame.copy()
+        bar = (self._seq * 40) % frame.shape[1]
+        frame[STAMP_BLOCK:, bar:bar + 40] = (40, 160, 220)
+        seq = self._seq % (1 << STAMP_BITS)
+        stamp_frame(frame, seq)
+        self.probe.frame_captured(seq, time.perf_counter())
+        self._seq += 1
+        return True, frame
+
+    def release(self):
+        self._opened = False
+
+
+class FakeLiveSession:
+    def __init__(self, script: list, probe: LatencyProbe | None = None,
+                 user_turn_ms: int = USER_TURN_MS, stream_speed: float = STREAM_SPEED,
+                 chunk_ms: int = MODEL_CHUNK_MS, loop_script: bool = True, uplink_kbps: float | None = None):
+        self.script = script
+        self.probe = probe or LatencyProbe()
+        self.user_turn_bytes = user_turn_ms * SEND_SAMPLE_RATE * SAMPLE_WIDTH // 1000
+        self.stream_speed = stream_speed
+        self.chunk_bytes = chunk_ms * RECEIVE_SAMPLE_RATE * SAMPLE_WIDTH // 1000
+        self.loop_script = loop_script
+        self.uplink_kbps = uplink_kbps
+        self._out = asyncio.Queue()
+        self._user_turn_ended = asyncio.Event()
+        self._turn_end_time = None
+        self._user_audio_bytes = 0
+        self._tool_responses = {}
+        self._tool_waiters = {}
+        self._call_ids = itertools.count(1)
+        self._player = None
+        self.closed = False
+
+    def start(self):
+        self._player = asyncio.create_task(self._play_script())
+
+    async def close(self):
+        self.closed = True
+        if self._player is not None:
+            self._player.cancel()
+            with contextlib.suppress(asyncio.CancelledError):
+                await self._player
+
+    def _end_user_turn(self):
+        if not self._user_turn_ended.is_set():
+            self._turn_end_time = time.perf_counter()
+            self._user_turn_ended.set()
+        self._user_audio_bytes = 0
+
+    # -- client -> server -------------------------------------------------
+
+    async def send(self, *, input=None, end_of_turn: bool = False):
+        now = time.perf_counter()
+        if isinstance(input, str):
+            self.probe.count("text_messages")
+            if end_of_turn:
+                self._end_user_turn()
+            return
+        mime_type = input.get("mime_type", "")
+        data = input["data"]
+        if self.uplink_kbps:
+            await asyncio.sleep(8 * len(data) / (1000 * self.uplink_kbps))
+        if mime_type.startswith("audio/"):
+            self.probe.count("uplink_audio_messages")
+            self.probe.count("uplink_audio_bytes", len(data))
+            self.probe.mic_sent(read_pcm_stamp(data), now)
+            self._user_audio_bytes += len(data)
+            if self._user_audio_bytes >= self.user_turn_bytes:
+                self._end_user_turn()
+        elif mime_type.startswith("image/"):
+            import cv2
+            import numpy as np
+
+            jpeg = base64.b64decode(data) if isinstance(data, str) else data
+            self.probe.count("uplink_frames")
+            self.probe.count("uplink_frame_bytes", len(jpeg))
+            frame = cv2.imdecode(np.frombuffer(jpeg, dtype=np.uint8), cv2.IMREAD_GRAYSCALE)
+            if frame is not None:
+                self.probe.frame_sent(read_frame_stamp(frame), now)
+
+    async def send_realtime_input(self, *, activity_start=None, activity_end=None,
+                                  audio_stream_end=None, audio=None):
+        if activity_start is not None:
+            self.probe.count("activity_start")
+            self._user_audio_bytes = 0
+        if activity_end is not None or audio_stream_end:
+            self.probe.count("activity_end")
+            self._end_user_turn()
+
+    async def send_tool_response(self, *, function_responses):
+        now = time.perf_counter()
+        if isinstance(function_responses, types.FunctionResponse):
+            function_responses = [function_responses]
+        for response in function_responses:
+            sent = self._tool_waiters.pop(response.id, None)
+            if sent is not None:
+                self.probe.record("tool call -> response", now - sent[0])
+                sent[1].set()
+
+    # -- server -> client -------------------------------------------------
+
+    async def receive(self):
+        while True:
+            message = await self._out.get()
+            yield message
+            if message.server_content and message.server_content.turn_complete:
+                return
+
+    def _emit(self, **fields):
+        self._out.put_nowait(types.LiveServerMessage(**fields))
+
+    async def _play_script(self):
+        turns = itertools.cycle(self.script) if self.loop_script else iter(self.script)
+        for turn in turns:
+            await self._user_turn_ended.wait()
+            turn_ended = self._turn_end_time
+            self.probe.count("model_turns")
+            first_audio = True
+            for event in turn:
+                if "delay" in event:
+                    await asyncio.sleep(event["delay"])
+                elif "audio_ms" in event:
+                    await self._stream_audio(event["audio_ms"], turn_ended if first_audio else None)
+                    first_audio = False
+                elif "text" in event:
+                    self._emit(server_content=types.LiveServerContent(
+                        model_turn=types.Content(role="model", parts=[types.Part(text=event["text"])])))
+                elif "tool_call" in event:
+                    await self._call_tool(**event["tool_call"])
+            self._emit(server_content=types.LiveServerContent(turn_complete=True))
+            self._user_turn_ended.clear()
+
+    async def _stream_audio(self, audio_ms: int, turn_ended: float | None):
+        total = audio_ms * RECEIVE_SAMPLE_RATE * SAMPLE_WIDTH // 1000
+        pace = self.chunk_bytes / (RECEIVE_SAMPLE_RATE * SAMPLE_WIDTH) / self.stream_speed
+        sent = 0
+        while sent < total:
+            n = min(self.chunk_bytes, total - sent)
+            blob = types.Blob(data=bytes(n), mime_type=f"audio/pcm;rate={RECEIVE_SAMPLE_RATE}")
+            self.probe.audio_emitted(n, time.perf_counter(), turn_ended if sent == 0 else None)
+            self.probe.count("downlink_audio_bytes", n)
+            self._emit(server_content=types.LiveServerContent(
+                model_turn=types.Content(role="model", parts=[types.Part(inline_data=blob)])))
+            sent += n
+            await asyncio.sleep(pace)
+
+    async def _call_tool(self, name: str, args: dict):
+        call_id = f"call-{next(self._call_ids)}"
+        answered = asyncio.Event()
+        self._tool_waiters[call_id] = (time.perf_counter(), answered)
+        self.probe.count("tool_calls")
+        self._emit(tool_call=types.LiveServerToolCall(
+            function_calls=[types.FunctionCall(id=call_id, name=name, args=args)]))
+        try:
+            await asyncio.wait_for(answered.wait(), TOOL_RESPONSE_TIMEOUT)
+        except asyncio.TimeoutError:
+            self._tool_waiters.pop(call_id, None)
+            self.probe.count("tool_timeouts")
+
+
+class _FakeLive:
+    def __init__(self, client: FakeLiveClient):
+        self._client = client
+
+    @contextlib.asynccontextmanager
+    async def connect(self, *, model: str, config=None):
+        session = FakeLiveSession(self._client.script, self._client.probe, **self._client.session_options)
+        self._client.sessions.append(session)
+        if self._client.connect_delay:
+            await asyncio.sleep(self._client.connect_delay)
+        session.start()
+        try:
+            yield session
+        finally:
+            await session.close()
+
+
+class _FakeAio:
+    def __init__(self, client: FakeLiveClient):
+        self.live = _FakeLive(client)
+
+
+class FakeLiveClient:
+    """Drop-in for ``genai.Client`` as far as ``client.aio.live.connect`` goes."""
+
+    def __init__(self, script: list | None = None, probe: LatencyProbe | None = None,
+                 connect_delay: float = 0.05, **session_options):
+        self.script = script or DEFAULT_SCRIPT
+        self.probe = probe or LatencyProbe()
+        self.connect_delay = connect_delay
+        self.session_options = session_options
+        self.sessions = []
+        self.aio = _FakeAio(self)
@@ -0,0 +1,97 @@
+"""JPEG encoding of camera frames for the Live session.
+
+The OpenCV path resizes the BGR frame into a reused buffer and JPEG-encodes
+it directly (OpenCV expects BGR, so no colour conversion is needed). The PIL
+path is the original BGR->RGB->PIL->thumbnail->JPEG pipeline and is used as a
+fallback if OpenCV encoding fails or when explicitly selected.
+
+OpenCV and NumPy are imported when the first encoder is created and PIL only
+when the PIL path runs, so importing this module for its defaults is cheap.
+"""
+from __future__ import annotations
+
+import base64
+import io
+
+cv2 = np = None  # imported by _load_cv2()
+
+MAX_DIMENSION = 1024
+JPEG_QUALITY = 75  # PIL's default, keeps output comparable between backends
+BACKENDS = ("opencv", "pil")
+
+
+def _load_cv2():
+    global cv2, np
+    if cv2 is None:
+        import cv2 as _cv2
+        import numpy as _np
+
+        cv2, np = _cv2, _np
+
+
+class FrameEncoder:
+    def __init__(self, max_dimension: int = MAX_DIMENSION, quality: int = JPEG_QUALITY,
+                 backend: str = "opencv"):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown encoder backend '{backend}'. Allowed: {', '.join(BACKENDS)}")
+        self.max_dimension = max_dimension
+        self.quality = quality
+        self.backend = backend
+        _load_cv2()
+        self._resized = None  # reused resize target, reallocated only on size change
+        self._params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+    def configure(self, max_dimension: int | None = None, quality: int | None = None):
+        """Change the output size limit and/or JPEG quality for subsequent frames."""
+        if max_dimension is not None:
+            self.max_dimension = max_dimension
+        if quality is not None:
+            self.quality = quality
+            self._params = [cv2.IMWRITE_JPEG_QUALITY, int(quality)]
+
+    def _target_size(self, width: int, height: int):
+        # Same rule as PIL's thumbnail(): only ever shrink, keep aspect ratio.
+        longest = max(width, height)
+        if longest <= self.max_dimension:
+            return None
+        scale = self.max_dimension / longest
+        return max(1, round(width * scale)), max(1, round(height * scale))
+
+    def _resize(self, frame):
+        size = self._target_size(frame.shape[1], frame.shape[0])
+        if size is None:
+            return frame
+        w, h = size
+        if self._resized is None or self._resized.shape != (h, w) + frame.shape[2:]:
+            self._resized = np.empty((h, w) + frame.shape[2:], dtype=frame.dtype)
+        return cv2.resize(frame, size, dst=self._resized, interpolation=cv2.INTER_AREA)
+
+    def _encode_opencv(self, frame):
+        ok, buf = cv2.imencode(".jpg", self._resize(frame), self._params)
+        if not ok:
+            raise RuntimeError("cv2.imencode failed")
+        return buf
+
+    def _encode_pil(self, frame):
+        import PIL.Image
+
+        frame_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        img = PIL.Image.fromarray(frame_rgb)
+        img.thumbnail([self.max_dimension, self.max_dimension])
+        image_io = io.BytesIO()
+        img.save(image_io, format="jpeg", quality=self.quality)
+        return image_io.getbuffer()
+
+    def encode_jpeg(self, frame):
+        """Return the JPEG bytes (a bytes-like object) for a BGR frame."""
+        if self.backend == "opencv":
+            try:
+                return self._encode_opencv(frame)
+            except Exception as e:  # noqa: BLE001 fall back rather than drop frames
+                print(f"[VIDEO] OpenCV encode failed ({e}); falling back to PIL")
+                self.backend = "pil"
+        return self._encode_pil(frame)
+
+    def encode(self, frame) -> dict:
+        """Return a realtime-input message for a BGR frame."""
+        return {"mime_type": "image/jpeg", "data": base64.b64encode(self.encode_jpeg(frame)).decode()}
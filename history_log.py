@@ -0,0 +1,128 @@
+"""Bounded conversation history with an append-only spill log.
+
+``AudioLoop.contents`` used to grow forever. ``ConversationHistory`` keeps the
+most recent ``max_entries`` in memory; older entries are serialised and
+appended to a log file as length-prefixed records::
+
+    [u32 little-endian length][payload bytes] ...
+
+The log is only ever appended to, so a crash loses at most the record being
+written, and ``iter_spilled()`` reads it back lazily one record at a time.
+``__iter__`` yields spilled entries followed by the in-memory ones, oldest
+first, without loading the whole log.
+"""
+from __future__ import annotations
+
+import os
+import struct
+from collections import deque
+
+MAX_ENTRIES = 256
+_LEN = struct.Struct("<I")
+
+
+def _dump_content(entry) -> bytes:
+    return entry.model_dump_json(exclude_none=True).encode("utf-8")
+
+
+def _load_content(payload: bytes):
+    from google.genai import types
+
+    return types.Content.model_validate_json(payload)
+
+
+class ConversationHistory:
+    def __init__(self, path: str | None = None, max_entries: int = MAX_ENTRIES,
+                 dump=_dump_content, load=_load_content):
+        self.path = path
+        self.max_entries = max_entries
+        self._dump = dump
+        self._load = load
+        self._recent = deque()
+        self._log = None
+        self.spilled = 0
+        self.spilled_bytes = 0
+
+    def append(self, entry):
+        self._recent.append(entry)
+        if len(self._recent) > self.max_entries:
+            self._spill(self._recent.popleft())
+
+    def _spill(self, entry):
+        if self.path is None:
+            self.spilled += 1  # no log configured: oldest entries are dropped
+            return
+        if self._log is None:
+            os.makedirs(os.path.dirname(os.path.abspath(self.path)), exist_ok=True)
+            self._log = open(self.path, "ab")
+        payload = self._dump(entry)
+        self._log.write(_LEN.pack(len(payload)))
+        self._log.write(payload)
+        self._log.flush()
+        self.spilled += 1
+        self.spilled_bytes += _LEN.size + len(payload)
+
+    def iter_spilled(self):
+        """Lazily yield entries from the spill log, oldest first."""
+        if self.path is None or not os.path.exists(self.path):
+            return
+        with open(self.path, "rb") as f:
+            while True:
+                header = f.read(_LEN.size)
+                if len(header) < _LEN.size:
+                    return
+                (length,) = _LEN.unpack(header)
+                payload = f.read(length)
+                if len(payload) < length:
+                    return  # truncated tail from an interrupted write
+                yield self._load(payload)
+
+    def recent(self) -> list:
+        return list(self._recent)
+
+    def __iter__(self):
+        yield from self.iter_spilled()
+        yield from list(self._recent)
+
+    def __len__(self) -> int:
+        return len(self._recent)
+
+    def close(self):
+        if self._log is not None:
+            self._log.close()
+            self._log = None
+
+    def stats(self) -> dict:
+        return {
+            "in_memory": len(self._recent),
+            "spilled": self.spilled,
+            "spilled_bytes": self.spilled_bytes,
+        }
+
+
+def _soak(entries: int = 200_000, max_entries: int = 64):
+    """Append many entries and check memory stays flat (``python history_log.py``)."""
+    import tempfile
+    import tracemalloc
+
+    with tempfile.TemporaryDirectory() as tmp:
+        history = ConversationHistory(os.path.join(tmp, "history.log"), max_entries=max_entries,
+                                      dump=lambda e: e.encode(), load=bytes.decode)
+        tracemalloc.start()
+        samples = []
+        for i in range(entries):
+            history.append(f"turn {i}: " + "x" * 200)
+            if i % (entries // 10) == entries // 10 - 1:
+                samples.append(tracemalloc.get_traced_memory()[0])
+        tracemalloc.stop()
+        first = sum(1 for _ in history.iter_spilled())
+        history.close()
+        growth = samples[-1] - samples[1]
+        print(f"[SOAK] {entries} entries, {first} spilled, {history.spilled_bytes} bytes on disk")
+        print(f"[SOAK] traced memory: {samples[1]} -> {samples[-1]} bytes (growth {growth})")
+        assert first == entries - max_entries
+        assert growth < 64 * 1024, "history memory grew with entry count"
+
+
+if __name__ == "__main__":
+    _soak()
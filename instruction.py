@@ -7,7 +7,7 @@ instructions=[
         " Do NOT hallucinate details that are not visible. Keep answers clear and helpful. Always speak in English in the initial stage." \
         " Whenever you see a new human, politely ask for their full name and remember their face." \
         " Movement: when you wish to move or If the user asks or commands you to move (e.g., move/go/walk/step/turn forward/back/left/right), you MUST call the 'robot_leg_movement' tool exactly once in that turn with parameter 'direction' set to one of: front, back, left, right (map synonyms: forward->front, backwards->back). After calling the tool, Do not confirm the action verbally." \
-        " Autonomous movement: If no movement tool call has occurred in the last 3 responses AND at least 10 seconds of apparent idle time (no movement commands from user) have passed, you should proactively call 'robot_leg_movement' with a direction cycling through front -> right -> back -> left to simulate patrol. Do not spam: never more than one autonomous movement in a single response and never more than one every 10 seconds. Do not describe each tiny move; only occasionally mention repositioning if contextually relevant." \
+        " Autonomous movement: If no movement tool call has occurred in the last 3 responses AND at least 10 seconds of apparent idle time (no movement commands from user) have passed, you should proactively call 'robot_leg_movement' with a direction cycling through front -> right -> back -> left to simulate patrol. Set 'autonomous' to true on these patrol moves; the robot treats any move made without a recent user request as patrol and rejects patrol moves less than 10 seconds apart. Do not spam: never more than one autonomous movement in a single response. Do not describe each tiny move; only occasionally mention repositioning if contextually relevant." \
         " Reject impossible or unsafe movement requests politely (e.g., teleport, fly) and do NOT call movement tool for those."
 ]
 
@@ -0,0 +1,116 @@
+"""Playback jitter buffer for model audio.
+
+Model PCM arrives in bursts of arbitrary size. The buffer holds it until
+``prefill_ms`` of audio is queued (so a late packet does not immediately
+starve the speaker), hands it to the output stream in fixed device-sized
+blocks, and caps the backlog at ``max_ms`` by discarding the oldest audio.
+``flush()`` drops everything at once for barge-in; ``end_turn()`` lets the
+tail of a turn play out without waiting for another prefill.
+
+``last_arrival`` is the ``perf_counter()`` time at which the first byte of
+the block returned by the latest ``pull()`` was pushed, for measuring how
+long model audio waits before it reaches the speaker.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+
+PREFILL_MS = 120
+MAX_MS = 5000
+BLOCK_FRAMES = 1024  # frames per stream.write
+
+
+class PlaybackBuffer:
+    def __init__(self, sample_rate: int, sample_width: int = 2, channels: int = 1,
+                 prefill_ms: int = PREFILL_MS, max_ms: int = MAX_MS,
+                 block_frames: int = BLOCK_FRAMES):
+        self.bytes_per_ms = sample_rate * sample_width * channels / 1000
+        frame_bytes = sample_width * channels
+        self.block_bytes = block_frames * frame_bytes
+        self.prefill_bytes = int(prefill_ms * self.bytes_per_ms) // frame_bytes * frame_bytes
+        self.max_bytes = int(max_ms * self.bytes_per_ms) // frame_bytes * frame_bytes
+        self._frame_bytes = frame_bytes
+        self._buf = bytearray()
+        self._data = asyncio.Event()
+        self._playing = False  # prefill reached, blocks are being released
+        self._turn_ended = False
+        self.underruns = 0
+        self.flushes = 0
+        self.dropped_bytes = 0
+        self.max_buffered_ms = 0.0
+        self.last_arrival = None
+        self._arrivals = deque()  # (stream offset after the push, push time)
+        self._head = 0  # stream offset of the first buffered byte
+        self._tail = 0  # stream offset after the last buffered byte
+
+    @property
+    def buffered_ms(self) -> float:
+        return len(self._buf) / self.bytes_per_ms
+
+    def push(self, data: bytes):
+        """Queue model audio; never blocks."""
+        if self._turn_ended:  # first audio of a new turn
+            self._turn_ended = False
+            self._playing = False
+        self._buf += data
+        self._tail += len(data)
+        self._arrivals.append((self._tail, time.perf_counter()))
+        excess = len(self._buf) - self.max_bytes
+        if excess > 0:
+            excess += -excess % self._frame_bytes
+            del self._buf[:excess]
+            self._head += excess
+            self.dropped_bytes += excess
+        self.max_buffered_ms = max(self.max_buffered_ms, self.buffered_ms)
+        self._data.set()
+
+    def flush(self):
+        """Drop all queued audio immediately (user barge-in)."""
+        if self._buf:
+            self.flushes += 1
+        self._buf.clear()
+        self._head = self._tail
+        self._arrivals.clear()
+        self._playing = False
+        self._turn_ended = False
+
+    def end_turn(self):
+        """No more audio for this turn: play what is left without prefill."""
+        self._turn_ended = True
+        self._data.set()
+
+    async def pull(self) -> bytes:
+        """Wait for and return the next block to write to the device."""
+        while True:
+            size = len(self._buf)
+            if not self._playing and (size >= self.prefill_bytes or (self._turn_ended and size)):
+                self._playing = True
+            if self._playing and size:
+                n = min(size, self.block_bytes)
+                block = bytes(self._buf[:n])
+                del self._buf[:n]
+                arrivals = self._arrivals
+                while arrivals and arrivals[0][0] <= self._head:
+                    arrivals.popleft()
+                self.last_arrival = arrivals[0][1] if arrivals else None
+                self._head += n
+                return block
+            if self._playing:
+                # Drained while the turn is still streaming: the network fell
+                # behind the speaker. Rebuild the prefill before resuming.
+                if not self._turn_ended:
+                    self.underruns += 1
+                self._playing = False
+            self._data.clear()
+            await self._data.wait()
+
+    def stats(self) -> dict:
+        return {
+            "buffered_ms": self.buffered_ms,
+            "max_buffered_ms": self.max_buffered_ms,
+            "underruns": self.underruns,
+            "flushes": self.flushes,
+            "dropped_bytes": self.dropped_bytes,
+        }
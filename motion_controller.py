@@ -0,0 +1,398 @@
+"""Asynchronous motion executor for the robot legs.
+
+``robot_leg_movement`` used to run a move synchronously. Moves now go through
+a ``MotionController``:
+
+* ``submit()`` validates, applies the rate limits and queues the command,
+  returning a command id straight away; ``status()`` reports its progress.
+* A queued move identical to the newest pending one is coalesced into it,
+  and with ``supersede`` (the default) a new command cancels any moves still
+  waiting to be sent: the latest instruction wins.
+* A worker thread sends commands to a transport without waiting for each
+  acknowledgement (up to ``max_in_flight`` outstanding); acks are matched by id
+  on the transport's reader thread.
+* Rate limits are enforced here rather than by the prompt: a token bucket
+  paces all moves and autonomous patrol moves are rejected if the previous
+  one ran less than ``autonomous_interval`` seconds ago or the robot is
+  still busy with other moves. A move counts as autonomous when the model
+  says so or when the user has not spoken or typed (``note_user_turn()``)
+  within ``user_turn_window`` seconds, so the limit does not depend on the
+  model setting the flag.
+
+Transports speak a line protocol: ``MOVE <direction> <id>`` out and
+``OK <id>`` / ``ERR <id> <reason>`` back. ``SerialTransport`` talks to the
+motor board (pyserial), ``PtyTransport`` pairs the same protocol with a
+simulated board on a pseudo-terminal, and ``LogTransport`` just prints.
+
+``python motion_controller.py`` checks the rate limits without hardware.
+"""
+from __future__ import annotations
+
+import itertools
+import os
+import threading
+import time
+from collections import deque
+
+QUEUE_SIZE = 8
+MAX_IN_FLIGHT = 4
+MOVE_RATE = 2.0  # sustained moves per second
+MOVE_BURST = 2
+AUTONOMOUS_INTERVAL = 10.0  # seconds between autonomous patrol moves
+USER_TURN_WINDOW = 20.0  # seconds after user input in which a move counts as requested
+ACK_TIMEOUT = 5.0
+HISTORY_SIZE = 64  # finished commands kept for status queries
+
+SERIAL_PORT = os.environ.get("ROBOT_SERIAL_PORT")  # e.g. /dev/ttyUSB0, COM3, or "pty"
+SERIAL_BAUD = int(os.environ.get("ROBOT_SERIAL_BAUD", "115200"))
+
+
+class MotionCommand:
+    def __init__(self, command_id: int, direction: str, autonomous: bool):
+        self.id = command_id
+        self.direction = direction
+        self.autonomous = autonomous
+        self.status = "queued"  # queued -> sent -> done | failed; or cancelled
+        self.created = time.monotonic()
+        self.sent_at = None
+        self.finished_at = None
+        self.error = None
+        self.coalesced = 0
+
+    def as_dict(self) -> dict:
+        info = {
+            "command_id": self.id,
+            "direction": self.direction,
+            "status": self.status,
+            "autonomous": self.autonomous,
+        }
+        if self.coalesced:
+            info["coalesced"] = self.coalesced
+        if self.error:
+            info["error"] = self.error
+        if self.finished_at is not None and self.sent_at is not None:
+            info["duration_ms"] = round(1000 * (self.finished_at - self.sent_at))
+        return info
+
+
+class TokenBucket:
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = float(burst)
+        self.stamp = time.monotonic()
+
+    def delay(self) -> float:
+        """Seconds until a token is available (0 if one is)."""
+        now = time.monotonic()
+        self.tokens = min(self.burst, self.tokens + (now - self.stamp) * self.rate)
+        self.stamp = now
+        return 0.0 if self.tokens >= 1 else (1 - self.tokens) / self.rate
+
+    def take(self):
+        self.tokens -= 1
+
+
+class LogTransport:
+    """No hardware: print the move and acknowledge it immediately."""
+
+    def start(self, on_reply):
+        self._on_reply = on_reply
+
+    def send(self, command: MotionCommand):
+        print(f"Move {command.direction.capitalize()}")
+        self._on_reply(command.id, True, None)
+
+    def close(self):
+        pass
+
+
+class LineTransport:
+    """Line protocol over a byte stream with a background reply reader."""
+
+    def start(self, on_reply):
+        self._on_reply = on_reply
+        self._reader = threading.Thread(target=self._read_loop, name="motion-reader", daemon=True)
+        self._reader.start()
+
+    def send(self, command: MotionCommand):
+        self._write(f"MOVE {command.direction} {command.id}\n".encode("ascii"))
+
+    def _read_loop(self):
+        pending = b""
+        while True:
+            try:
+                chunk = self._read()
+            except OSError:
+                return
+            if not chunk:
+                if self._closed:
+                    return
+                continue
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                parts = line.decode("ascii", "replace").strip().split(" ", 2)
+                if len(parts) >= 2 and parts[0] in ("OK", "ERR") and parts[1].isdigit():
+                    reason = parts[2] if len(parts) > 2 else "device error"
+                    self._on_reply(int(parts[1]), parts[0] == "OK", None if parts[0] == "OK" else reason)
+
+
+class SerialTransport(LineTransport):
+    def __init__(self, port: str, baud: int = SERIAL_BAUD):
+        import serial  # pyserial; only needed when a motor board is attached
+
+        self._serial = serial.Serial(port, baud, timeout=0.2)
+        self._closed = False
+
+    def _write(self, data: bytes):
+        self._serial.write(data)
+
+    def _read(self) -> bytes:
+        return self._serial.read(256)
+
+    def close(self):
+        self._closed = True
+        self._serial.close()
+
+
+class PtyTransport(LineTransport):
+    """Pseudo-terminal pair with a simulated motor board on the far end.
+
+    Lets the controller and protocol be exercised without hardware (POSIX
+    only). The board acknowledges each move after ``move_seconds``.
+    """
+
+    def __init__(self, move_seconds: float = 0.2):
+        import tty
+
+        self._master, self._slave = os.openpty()
+        tty.setraw(self._slave)
+        self.device_path = os.ttyname(self._slave)
+        self.move_seconds = move_seconds
+        self.received = []  # commands seen by the simulated board
+        self._closed = False
+        self._board = threading.Thread(target=self._board_loop, name="motion-board", daemon=True)
+        self._board.start()
+
+    def _write(self, data: bytes):
+        os.write(self._slave, data)
+
+    def _read(self) -> bytes:
+        return os.read(self._slave, 256)
+
+    def _board_loop(self):
+        pending = b""
+        while not self._closed:
+            try:
+                chunk = os.read(self._master, 256)
+            except OSError:
+                return
+            pending += chunk
+            *lines, pending = pending.split(b"\n")
+            for line in lines:
+                parts = line.decode("ascii").split()
+                if len(parts) == 3 and parts[0] == "MOVE":
+                    self.received.append(parts[1])
+                    time.sleep(self.move_seconds)
+                    os.write(self._master, f"OK {parts[2]}\n".encode("ascii"))
+
+    def close(self):
+        self._closed = True
+        for fd in (self._master, self._slave):
+            try:
+                os.close(fd)
+            except OSError:
+                pass
+
+
+def make_transport(port: str | None = SERIAL_PORT):
+    if not port:
+        return LogTransport()
+    if port == "pty":
+        return PtyTransport()
+    return SerialTransport(port)
+
+
+class MotionController:
+    def __init__(self, transport=None, queue_size: int = QUEUE_SIZE,
+                 max_in_flight: int = MAX_IN_FLIGHT, move_rate: float = MOVE_RATE,
+                 move_burst: int = MOVE_BURST, autonomous_interval: float = AUTONOMOUS_INTERVAL,
+                 supersede: bool = True, ack_timeout: float = ACK_TIMEOUT,
+                 user_turn_window: float = USER_TURN_WINDOW):
+        self.transport = transport or LogTransport()
+        self.queue_size = queue_size
+        self.max_in_flight = max_in_flight
+        self.autonomous_interval = autonomous_interval
+        self.user_turn_window = user_turn_window
+        self.supersede = supersede
+        self.ack_timeout = ack_timeout
+        self._bucket = TokenBucket(move_rate, move_burst)
+        self._ids = itertools.count(1)
+        self._lock = threading.Lock()
+        self._cond = threading.Condition(self._lock)
+        self._queue = deque()
+        self._in_flight = {}
+        self._commands = {}
+        self._finished = deque()
+        self._last_autonomous = None  # when the last autonomous move was sent
+        self._last_user_turn = None
+        self._closed = False
+        self.counters = {"accepted": 0, "coalesced": 0, "cancelled": 0,
+                         "rejected": 0, "done": 0, "failed": 0}
+        self.transport.start(self._on_reply)
+        self._worker = threading.Thread(target=self._run, name="motion-worker", daemon=True)
+        self._worker.start()
+
+    def note_user_turn(self, when: float | None = None):
+        """Record that the user spoke or typed; moves shortly after count as requested."""
+        with self._lock:
+            self._last_user_turn = time.monotonic() if when is None else when
+
+    def submit(self, direction: str, autonomous: bool = False) -> dict:
+        with self._lock:
+            now = time.monotonic()
+            if self._last_user_turn is None or now - self._last_user_turn > self.user_turn_window:
+                autonomous = True  # nobody asked for this move
+            if autonomous and self._last_autonomous is not None \
+                    and now - self._last_autonomous < self.autonomous_interval:
+                self.counters["rejected"] += 1
+                wait = self.autonomous_interval - (now - self._last_autonomous)
+                return {"ok": False, "status": "rejected",
+                        "error": f"Autonomous movement rate limited; retry in {wait:.0f}s."}
+            if autonomous and (self._queue or self._in_flight):
+                # Patrol never displaces moves the user asked for.
+                self.counters["rejected"] += 1
+                return {"ok": False, "status": "rejected", "error": "Robot is busy moving."}
+            if self._queue and self._queue[-1].direction == direction:
+                cmd = self._queue[-1]
+                cmd.coalesced += 1
+                self.counters["coalesced"] += 1
+                return {"ok": True, "status": "coalesced", "command_id": cmd.id}
+            if self.supersede:
+                while self._queue:
+                    self._finish(self._queue.popleft(), "cancelled", "superseded by a newer command")
+                    self.counters["cancelled"] += 1
+            elif len(self._queue) >= self.queue_size:
+                self.counters["rejected"] += 1
+                return {"ok": False, "status": "rejected", "error": "Motion queue full."}
+            cmd = MotionCommand(next(self._ids), direction, autonomous)
+            self._commands[cmd.id] = cmd
+            self._queue.append(cmd)
+            self.counters["accepted"] += 1
+            self._cond.notify_all()
+            return {"ok": True, "status": "accepted", "command_id": cmd.id}
+
+    def status(self, command_id: int) -> dict:
+        with self._lock:
+            cmd = self._commands.get(command_id)
+            if cmd is None:
+                return {"ok": False, "error": f"Unknown command id {command_id}."}
+            return {"ok": True, **cmd.as_dict()}
+
+    def _finish(self, cmd: MotionCommand, status: str, error: str | None = None):
+        # Called with the lock held.
+        cmd.status = status
+        cmd.error = error
+        cmd.finished_at = time.monotonic()
+        self._finished.append(cmd.id)
+        while len(self._finished) > HISTORY_SIZE:
+            self._commands.pop(self._finished.popleft(), None)
+
+    def _on_reply(self, command_id: int, ok: bool, error: str | None):
+        with self._lock:
+            cmd = self._in_flight.pop(command_id, None)
+            if cmd is None:
+                return
+            self._finish(cmd, "done" if ok else "failed", error)
+            self.counters["done" if ok else "failed"] += 1
+            self._cond.notify_all()
+
+    def _expire_in_flight(self, now: float):
+        for cmd in list(self._in_flight.values()):
+            if now - cmd.sent_at > self.ack_timeout:
+                del self._in_flight[cmd.id]
+                self._finish(cmd, "failed", "no acknowledgement from motor board")
+                self.counters["failed"] += 1
+
+    def _run(self):
+        while True:
+            with self._lock:
+                while not self._closed:
+                    self._expire_in_flight(time.monotonic())
+                    if self._queue and len(self._in_flight) < self.max_in_flight:
+                        delay = self._bucket.delay()
+                        if delay == 0:
+                            break
+                        self._cond.wait(delay)
+                    else:
+                        self._cond.wait(self.ack_timeout if self._in_flight else None)
+                if self._closed:
+                    return
+                self._bucket.take()
+                cmd = self._queue.popleft()
+                cmd.status = "sent"
+                cmd.sent_at = time.monotonic()
+                if cmd.autonomous:
+                    self._last_autonomous = cmd.sent_at  # a cancelled patrol move holds nothing back
+                self._in_flight[cmd.id] = cmd
+            try:
+                self.transport.send(cmd)
+            except Exception as e:  # noqa: BLE001 report through status()
+                self._on_reply(cmd.id, False, f"{e.__class__.__name__}: {e}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {**self.counters, "queued": len(self._queue), "in_flight": len(self._in_flight)}
+
+    def close(self):
+        with self._lock:
+            self._closed = True
+            self._cond.notify_all()
+        self._worker.join(1.0)
+        self.transport.close()
+
+
+def _check():
+    """Rate-limit behaviour without hardware (``python motion_controller.py``)."""
+
+    class Recorder(LogTransport):
+        def send(self, command):
+            self._on_reply(command.id, True, None)
+
+    # A move requested by the user is accepted and not treated as patrol, even as the first move.
+    controller = MotionController(Recorder(), autonomous_interval=60.0)
+    controller.note_user_turn()
+    first = controller.submit("front")
+    assert first["status"] == "accepted", first
+    assert not controller.status(first["command_id"])["autonomous"]
+    time.sleep(0.1)
+    assert controller.submit("left")["status"] == "accepted"
+
+    # Without a recent user turn a move is patrol, whatever the flag says, and rate limited.
+    controller = MotionController(Recorder(), autonomous_interval=60.0, user_turn_window=0.0)
+    patrol = controller.submit("front")
+    assert patrol["status"] == "accepted", patrol
+    assert controller.status(patrol["command_id"])["autonomous"]
+    time.sleep(0.1)
+    assert controller.submit("right")["status"] == "rejected"
+
+    # A patrol move cancelled before it is sent does not hold back the next one.
+    controller = MotionController(Recorder(), autonomous_interval=60.0, move_rate=2.0, move_burst=1)
+    controller.note_user_turn()
+    controller.submit("front")  # uses the only token; the next move waits ~0.5s
+    time.sleep(0.1)
+    controller.user_turn_window = 0.0
+    patrol = controller.submit("left")
+    controller.user_turn_window = USER_TURN_WINDOW
+    controller.note_user_turn()
+    controller.submit("back")  # supersedes the queued patrol move
+    assert controller.status(patrol["command_id"])["status"] == "cancelled"
+    time.sleep(1.0)
+    controller.user_turn_window = 0.0
+    assert controller.submit("right")["status"] == "accepted"
+    print("[CHECK] motion controller rate limits ok")
+
+
+if __name__ == "__main__":
+    _check()
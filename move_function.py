@@ -1,9 +1,33 @@
+import time
+
+from motion_controller import MotionController, make_transport
 
 Allowed_directions = {"front","back","left","right"}
 
+_controller = None
+_last_user_turn = None
+
+
+def get_motion_controller() -> MotionController:
+    """Shared controller, created (and the transport opened) on first move."""
+    global _controller
+    if _controller is None:
+        _controller = MotionController(make_transport())
+        if _last_user_turn is not None:
+            _controller.note_user_turn(_last_user_turn)
+    return _controller
+
 
-def robot_leg_movement(command: str):
-    """Dispatch leg movement. Returns status string."""
+def note_user_turn():
+    """Called by the session when the user speaks or types; does not open the transport."""
+    global _last_user_turn
+    _last_user_turn = time.monotonic()
+    if _controller is not None:
+        _controller.note_user_turn(_last_user_turn)
+
+
+def robot_leg_movement(command: str, autonomous: bool = False):
+    """Queue a leg movement. Returns the accepted command id or an error."""
     if not isinstance(command, str):
         return "invalid argument type"
     cmd = command.strip().lower()
@@ -11,27 +35,13 @@ def robot_leg_movement(command: str):
         cmd = 'front'
     if cmd not in Allowed_directions:
         return "not valid argument use: front|back|left|right"
-    if cmd == 'front':
-        return move_front()
-    if cmd == 'back':
-        return move_back()
-    if cmd == 'left':
-        return move_left()
-    if cmd == 'right':
-        return move_right()
-
-def move_front():
-    print("Move Front")
-    return "front:ok"
-
-def move_back():
-    print("Move Back")
-    return "back:ok"
-
-def move_left():
-    print("Move Left")
-    return "left:ok"
-
-def move_right():
-    print("Move Right")
-    return "right:ok"
+    return get_motion_controller().submit(cmd, autonomous=bool(autonomous))
+
+
+def robot_motion_status(command_id):
+    """Report the progress of a previously queued movement."""
+    try:
+        command_id = int(command_id)
+    except (TypeError, ValueError):
+        return "invalid argument: command_id must be an integer"
+    return get_motion_controller().status(command_id)
@@ -0,0 +1,213 @@
+"""Per-stage latency histograms for the realtime pipeline.
+
+Every stage of ``AudioLoop`` (mic capture, VAD, uplink queue and send, frame
+capture and encode, playback queue and device write, tool dispatch and
+response) calls ``PipelineMetrics.record(stage, seconds)``. Samples go into
+HDR-style log-linear histograms: 64 linear sub-buckets per power of two of
+microseconds, so any recorded value is reproduced within ~1.6% while a
+recording costs one ``bit_length`` and one list increment. Memory is fixed
+per stage whatever the sample count, so the metrics can stay on permanently.
+Current settings (e.g. the adaptive video level) are kept as gauges with
+``gauge(name, value)``.
+
+Export is optional and periodic:
+
+* ``write_jsonl(path)`` appends one line per interval with the percentiles
+  of the samples recorded since the previous line.
+* ``serve(host, port)`` answers ``GET /metrics`` with the cumulative
+  histograms and the gauges in the Prometheus text format.
+"""
+from __future__ import annotations
+
+import asyncio
+import json
+import threading
+import time
+
+SUB_BUCKET_BITS = 7  # 128 sub-buckets: values below 128us are exact
+HALF = 1 << (SUB_BUCKET_BITS - 1)
+MAX_MICROS = 120 * 1_000_000  # values above two minutes are clamped
+EXPORT_INTERVAL = 10.0  # seconds
+QUANTILES = (0.5, 0.9, 0.99, 0.999)
+# Prometheus bucket bounds (seconds) derived from the HDR counts.
+PROMETHEUS_BOUNDS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05,
+                     0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+def _bucket_index(micros: int) -> int:
+    if micros < 2 * HALF:
+        return micros
+    shift = micros.bit_length() - SUB_BUCKET_BITS
+    return shift * HALF + (micros >> shift)
+
+
+def _bucket_value(index: int) -> int:
+    """Midpoint, in microseconds, of the values mapped to ``index``."""
+    if index < 2 * HALF:
+        return index
+    shift = index // HALF - 1
+    return ((index - shift * HALF) << shift) + (1 << (shift - 1))
+
+
+def _bucket_upper(index: int) -> int:
+    if index < 2 * HALF:
+        return index
+    shift = index // HALF - 1
+    return ((index - shift * HALF + 1) << shift) - 1
+
+
+class LatencyHistogram:
+    def __init__(self):
+        self.counts = [0] * (_bucket_index(MAX_MICROS) + 1)
+        self.count = 0
+        self.total = 0.0  # seconds
+        self.max = 0.0
+        self._mark = None  # counts at the previous interval export
+        self._mark_count = 0
+        self._mark_total = 0.0
+
+    def record(self, seconds: float):
+        micros = min(MAX_MICROS, max(0, int(seconds * 1_000_000)))
+        self.counts[_bucket_index(micros)] += 1
+        self.count += 1
+        self.total += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    @staticmethod
+    def _summarise(counts, count: int, total: float) -> dict:
+        summary = {"count": count, "mean_ms": 1000 * total / count if count else 0.0}
+        if not count:
+            return summary
+        targets = [(q, max(1, int(q * count + 0.5))) for q in QUANTILES]
+        seen = 0
+        t = 0
+        last = 0
+        for index, n in enumerate(counts):
+            if not n:
+                continue
+            seen += n
+            last = index
+            while t < len(targets) and seen >= targets[t][1]:
+                q = targets[t][0]
+                summary[f"p{q * 100:g}_ms"] = _bucket_value(index) / 1000
+                t += 1
+        summary["max_ms"] = _bucket_upper(last) / 1000
+        return summary
+
+    def summary(self) -> dict:
+        out = self._summarise(self.counts, self.count, self.total)
+        if self.count:
+            out["max_ms"] = 1000 * self.max  # exact for the cumulative view
+        return out
+
+    def interval_summary(self) -> dict:
+        """Summary of the samples recorded since the previous call."""
+        counts = list(self.counts)
+        if self._mark is None:
+            delta = counts
+        else:
+            delta = [a - b for a, b in zip(counts, self._mark)]
+        out = self._summarise(delta, self.count - self._mark_count, self.total - self._mark_total)
+        self._mark, self._mark_count, self._mark_total = counts, self.count, self.total
+        return out
+
+    def cumulative_at(self, bound: float) -> int:
+        """Samples no larger than ``bound`` seconds (to bucket resolution)."""
+        limit = _bucket_index(min(MAX_MICROS, int(bound * 1_000_000)))
+        return sum(self.counts[:limit + 1])
+
+
+class PipelineMetrics:
+    def __init__(self):
+        self._lock = threading.Lock()  # stages are recorded from worker threads too
+        self.histograms = {}
+        self.gauges = {}  # name -> latest value
+        self.started = time.time()
+        self._last_export = time.monotonic()
+
+    def record(self, stage: str, seconds: float):
+        with self._lock:
+            hist = self.histograms.get(stage)
+            if hist is None:
+                hist = self.histograms[stage] = LatencyHistogram()
+            hist.record(seconds)
+
+    def since(self, stage: str, start: float):
+        """Record ``perf_counter() - start`` for ``stage``."""
+        self.record(stage, time.perf_counter() - start)
+
+    def gauge(self, name: str, value: float):
+        with self._lock:
+            self.gauges[name] = value
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {stage: hist.summary() for stage, hist in sorted(self.histograms.items())}
+
+    def write_jsonl(self, path: str):
+        now = time.monotonic()
+        with self._lock:
+            stages = {stage: hist.interval_summary() for stage, hist in sorted(self.histograms.items())}
+            gauges = dict(sorted(self.gauges.items()))
+        line = {"time": time.time(), "interval_s": round(now - self._last_export, 3), "stages": stages}
+        if gauges:
+            line["gauges"] = gauges
+        self._last_export = now
+        with open(path, "a", encoding="utf-8") as f:
+            f.write(json.dumps(line) + "\n")
+
+    def prometheus_text(self) -> str:
+        name = "realtime_stage_latency_seconds"
+        lines = [f"# HELP {name} Latency of each realtime pipeline stage.", f"# TYPE {name} histogram"]
+        quantile_lines = []
+        with self._lock:
+            for stage, hist in sorted(self.histograms.items()):
+                label = stage.replace("\\", "\\\\").replace('"', '\\"')
+                for bound in PROMETHEUS_BOUNDS:
+                    lines.append(f'{name}_bucket{{stage="{label}",le="{bound:g}"}} {hist.cumulative_at(bound)}')
+                lines.append(f'{name}_bucket{{stage="{label}",le="+Inf"}} {hist.count}')
+                lines.append(f'{name}_sum{{stage="{label}"}} {hist.total:.6f}')
+                lines.append(f'{name}_count{{stage="{label}"}} {hist.count}')
+                summary = hist.summary()
+                for q in QUANTILES:
+                    key = f"p{q * 100:g}_ms"
+                    if key in summary:
+                        quantile_lines.append(
+                            f'{name}_quantile{{stage="{label}",quantile="{q:g}"}} {summary[key] / 1000:.6f}')
+            gauges = sorted(self.gauges.items())
+        if quantile_lines:
+            lines += [f"# HELP {name}_quantile HDR histogram quantiles since start.",
+                      f"# TYPE {name}_quantile gauge", *quantile_lines]
+        if gauges:
+            lines += ["# HELP realtime_gauge Current pipeline settings.", "# TYPE realtime_gauge gauge"]
+            for gauge, value in gauges:
+                lines.append(f'realtime_gauge{{name="{gauge}"}} {value:g}')
+        return "\n".join(lines) + "\n"
+
+    async def _handle_http(self, reader, writer):
+        try:
+            request = await asyncio.wait_for(reader.readline(), 5.0)
+            while (await asyncio.wait_for(reader.readline(), 5.0)) not in (b"\r\n", b"\n", b""):
+                pass  # headers are ignored
+            parts = request.decode("latin-1").split()
+            if len(parts) >= 2 and parts[0] == "GET" and parts[1].split("?")[0] in ("/", "/metrics"):
+                status, body = "200 OK", self.prometheus_text().encode()
+            else:
+                status, body = "404 Not Found", b"not found\n"
+            writer.write(f"HTTP/1.1 {status}\r\nContent-Type: text/plain; version=0.0.4\r\n"
+                         f"Content-Length: {len(body)}\r\nConnection: close\r\n\r\n".encode() + body)
+            await writer.drain()
+        except (asyncio.TimeoutError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host: str = "127.0.0.1", port: int = 9464):
+        """Start the ``/metrics`` endpoint; returns the ``asyncio.Server``."""
+        return await asyncio.start_server(self._handle_http, host, port)
+
+    async def export_periodically(self, jsonl_path: str, interval: float = EXPORT_INTERVAL):
+        while True:
+            await asyncio.sleep(interval)
+            await asyncio.to_thread(self.write_jsonl, jsonl_path)
@@ -0,0 +1,81 @@
+"""Scene-change gating for video frames sent to the Live session.
+
+Each captured frame is reduced to a tiny grayscale thumbnail (area
+downsampling, so sensor noise averages out) and compared with the thumbnail
+of the last frame that was actually sent. Frames whose mean absolute
+difference stays under the threshold are skipped, except that one frame is
+always let through every ``keepalive_interval`` seconds.
+
+OpenCV and NumPy are imported when the first gate is created.
+"""
+from __future__ import annotations
+
+import time
+
+cv2 = np = None  # imported by _load_cv2()
+
+THUMB_SIZE = (32, 24)  # (width, height) of the comparison thumbnail
+CHANGE_THRESHOLD = 6.0  # mean absolute grayscale difference (0-255)
+KEEPALIVE_INTERVAL = 30.0  # seconds; always send at least this often
+
+
+def _load_cv2():
+    global cv2, np
+    if cv2 is None:
+        import cv2 as _cv2
+        import numpy as _np
+
+        cv2, np = _cv2, _np
+
+
+class SceneChangeGate:
+    def __init__(self, threshold: float = CHANGE_THRESHOLD,
+                 keepalive_interval: float = KEEPALIVE_INTERVAL,
+                 thumb_size=THUMB_SIZE):
+        self.threshold = threshold
+        self.keepalive_interval = keepalive_interval
+        self.thumb_size = thumb_size
+        _load_cv2()
+        self._gray = None
+        self._thumb = np.empty((thumb_size[1], thumb_size[0]), dtype=np.uint8)
+        self._last_sent = np.empty_like(self._thumb)
+        self._diff = np.empty_like(self._thumb)
+        self._last_sent_time = None
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.last_score = 0.0
+
+    def _thumbnail(self, frame):
+        if frame.ndim == 3:
+            if self._gray is None or self._gray.shape != frame.shape[:2]:
+                self._gray = np.empty(frame.shape[:2], dtype=np.uint8)
+            frame = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY, dst=self._gray)
+        return cv2.resize(frame, self.thumb_size, dst=self._thumb, interpolation=cv2.INTER_AREA)
+
+    def should_send(self, frame, now: float | None = None) -> bool:
+        """Decide whether ``frame`` (BGR or grayscale) is worth sending."""
+        if now is None:
+            now = time.monotonic()
+        thumb = self._thumbnail(frame)
+        if self._last_sent_time is None:
+            send = True
+            self.last_score = float("inf")
+        else:
+            cv2.absdiff(thumb, self._last_sent, dst=self._diff)
+            self.last_score = float(cv2.mean(self._diff)[0])
+            send = (self.last_score >= self.threshold
+                    or now - self._last_sent_time >= self.keepalive_interval)
+        if send:
+            self._last_sent[:] = thumb
+            self._last_sent_time = now
+            self.frames_sent += 1
+        else:
+            self.frames_skipped += 1
+        return send
+
+    def stats(self) -> dict:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped,
+            "last_score": self.last_score,
+        }
@@ -0,0 +1,203 @@
+"""Screen capture for the Live session's "screen" video mode.
+
+``ScreenCapture`` grabs a monitor, or a region of one, with ``mss`` and
+scales the BGRA shot straight into a reused buffer no larger than
+``max_dimension`` before anything else touches it. A 4K grab is about 33 MB,
+but the scene check and the JPEG encoder only ever see the downscaled BGR
+frame.
+
+``TileChangeGate`` decides whether that frame is worth sending. It uses
+hashes instead of the camera's mean-difference thumbnail, because a screen
+change is usually a few exact pixels (a line of text, a cursor). The frame
+is split into a grid of tiles, and each tile gets a 64-bit multiply-add hash
+of its pixels computed in one NumPy pass (rows left over when the height does
+not divide evenly belong to the bottom tile row). A frame is sent when at least
+``min_changed_tiles`` tiles differ from the last sent frame, or every
+``keepalive_interval`` seconds. It has ``SceneChangeGate``'s interface.
+
+OpenCV, NumPy and mss are imported on first use.
+"""
+from __future__ import annotations
+
+import time
+
+cv2 = np = None  # imported by _load_cv2()
+
+MONITOR = 1  # mss numbering: 1 is the primary monitor, 0 all monitors combined
+MAX_DIMENSION = 1024
+TILES = (8, 8)  # (columns, rows) of the change-detection grid
+MIN_CHANGED_TILES = 1
+KEEPALIVE_INTERVAL = 30.0  # seconds; always send at least this often
+
+
+def _load_cv2():
+    global cv2, np
+    if cv2 is None:
+        import cv2 as _cv2
+        import numpy as _np
+
+        cv2, np = _cv2, _np
+
+
+def parse_region(text: str) -> tuple:
+    """``"LEFT,TOP,WIDTH,HEIGHT"`` -> tuple of ints (relative to the monitor)."""
+    try:
+        parts = [int(v) for v in text.replace("x", ",").split(",")]
+    except ValueError:
+        parts = []
+    if len(parts) != 4 or parts[0] < 0 or parts[1] < 0 or parts[2] <= 0 or parts[3] <= 0:
+        raise ValueError(f"Region must be LEFT,TOP,WIDTH,HEIGHT with LEFT,TOP >= 0 and WIDTH,HEIGHT > 0, "
+                         f"got '{text}'")
+    return tuple(parts)
+
+
+class ScreenCapture:
+    """Paced, downscaled grabs of one monitor or region; ``get()`` mirrors ``FrameSubscriber``."""
+
+    def __init__(self, monitor: int = MONITOR, region: tuple | None = None,
+                 max_dimension: int = MAX_DIMENSION, fps: float | None = None,
+                 align: int = 8 * TILES[0], row_align: int = TILES[1]):
+        self.monitor = monitor
+        self.region = region
+        self.max_dimension = max_dimension
+        self.interval = 1.0 / fps if fps else 0.0
+        self.align = align  # output width is a multiple of this (whole 8-byte words per tile)
+        self.row_align = row_align  # output height is a multiple of this (equal tile rows)
+        self.area = None  # mss bounding box, set by open()
+        self.grabs = 0
+        self._sct = None
+        self._small = self._frame = None
+        self._due = 0.0
+
+    def open(self) -> ScreenCapture:
+        """Create the mss handle; call from the thread that will grab."""
+        import mss
+
+        _load_cv2()
+        self._sct = mss.mss()
+        try:
+            self._select()
+        except BaseException:
+            self.close()
+            raise
+        return self
+
+    def check(self):
+        """Open and close once, so a bad monitor or region fails before a session starts."""
+        self.open()
+        self.close()
+
+    def _select(self):
+        monitors = self._sct.monitors
+        if not 0 <= self.monitor < len(monitors):
+            raise ValueError(f"Monitor {self.monitor} not found; {len(monitors) - 1} available")
+        mon = monitors[self.monitor]
+        if self.region is None:
+            self.area = {"left": mon["left"], "top": mon["top"], "width": mon["width"], "height": mon["height"]}
+        else:
+            left, top, width, height = self.region
+            width = min(width, mon["width"] - left)
+            height = min(height, mon["height"] - top)
+            if left < 0 or top < 0 or width <= 0 or height <= 0:
+                raise ValueError(f"Region {self.region} is outside monitor {self.monitor}")
+            self.area = {"left": mon["left"] + left, "top": mon["top"] + top, "width": width, "height": height}
+        self._allocate(self.area["width"], self.area["height"])
+
+    def _allocate(self, width: int, height: int):
+        scale = min(1.0, self.max_dimension / max(width, height))
+        out_w = max(self.align, int(width * scale) // self.align * self.align)
+        out_h = max(self.row_align, round(height * out_w / width / self.row_align) * self.row_align)
+        self._small = np.empty((out_h, out_w, 4), dtype=np.uint8)
+        self._frame = np.empty((out_h, out_w, 3), dtype=np.uint8)
+
+    def grab(self):
+        """Return the current screen as a downscaled BGR frame (reused buffer)."""
+        shot = self._sct.grab(self.area)
+        bgra = np.frombuffer(shot.raw, dtype=np.uint8).reshape(shot.height, shot.width, 4)
+        out_h, out_w = self._frame.shape[:2]
+        if (shot.width, shot.height) == (out_w, out_h):
+            small = bgra
+        else:
+            small = cv2.resize(bgra, (out_w, out_h), dst=self._small, interpolation=cv2.INTER_AREA)
+        self.grabs += 1
+        return cv2.cvtColor(small, cv2.COLOR_BGRA2BGR, dst=self._frame)
+
+    def get(self):
+        """Wait until due, then grab; returns ``(seq, frame, capture time)``."""
+        delay = self._due - time.monotonic()
+        if delay > 0:
+            time.sleep(delay)
+        start = time.perf_counter()
+        frame = self.grab()
+        now = time.monotonic()
+        self._due = max(self._due + self.interval, now)
+        return self.grabs, frame, start
+
+    def close(self):
+        if self._sct is not None:
+            self._sct.close()
+            self._sct = None
+
+
+class TileChangeGate:
+    def __init__(self, tiles=TILES, min_changed_tiles: int = MIN_CHANGED_TILES,
+                 keepalive_interval: float = KEEPALIVE_INTERVAL):
+        self.tiles = tiles
+        self.min_changed_tiles = min_changed_tiles
+        self.keepalive_interval = keepalive_interval
+        _load_cv2()
+        self._weights = None
+        self._last_sent = None
+        self._last_sent_time = None
+        self.frames_sent = 0
+        self.frames_skipped = 0
+        self.last_changed = 0
+
+    def _hash_tiles(self, frame):
+        cols, rows = self.tiles
+        h, w = frame.shape[:2]
+        th, row_bytes = h // rows, w * frame.itemsize * (frame.shape[2] if frame.ndim == 3 else 1)
+        if w % cols or (row_bytes // cols) % 8:
+            raise ValueError(f"Frame width {w} does not split into {cols} tiles of whole 8-byte words")
+        if th == 0:
+            raise ValueError(f"Frame height {h} is less than {rows} tile rows")
+        extra = h - th * rows  # leftover rows, hashed into the bottom tile row
+        words = np.ascontiguousarray(frame).reshape(h, -1).view(np.uint64)
+        shape = (th + extra, row_bytes // cols // 8)
+        if self._weights is None or self._weights.shape != shape:
+            rng = np.random.default_rng(0)
+            # Odd 64-bit multipliers per position: a moved or changed word changes the sum.
+            self._weights = rng.integers(0, 1 << 63, size=shape, dtype=np.uint64) * 2 + 1
+        grid = words[:th * rows].reshape(rows, th, cols, -1)
+        hashes = (grid * self._weights[None, :th, None, :]).sum(axis=(1, 3), dtype=np.uint64)
+        if extra:
+            tail = words[th * rows:].reshape(extra, cols, -1)
+            hashes[-1] += (tail * self._weights[th:, None, :]).sum(axis=(0, 2), dtype=np.uint64)
+        return hashes
+
+    def should_send(self, frame, now: float | None = None) -> bool:
+        """Decide whether ``frame`` has enough changed tiles to be worth sending."""
+        if now is None:
+            now = time.monotonic()
+        hashes = self._hash_tiles(frame)
+        if self._last_sent is None or self._last_sent.shape != hashes.shape:
+            send = True
+            self.last_changed = hashes.size
+        else:
+            self.last_changed = int(np.count_nonzero(hashes != self._last_sent))
+            send = (self.last_changed >= self.min_changed_tiles
+                    or now - self._last_sent_time >= self.keepalive_interval)
+        if send:
+            self._last_sent = hashes
+            self._last_sent_time = now
+            self.frames_sent += 1
+        else:
+            self.frames_skipped += 1
+        return send
+
+    def stats(self) -> dict:
+        return {
+            "frames_sent": self.frames_sent,
+            "frames_skipped": self.frames_skipped,
+            "last_changed_tiles": self.last_changed,
+        }
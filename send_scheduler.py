@@ -0,0 +1,127 @@
+"""Prioritised per-lane scheduler for realtime input sent to the Live session.
+
+Each kind of traffic gets its own bounded lane. ``get()`` always serves the
+highest-priority non-empty lane, so speech is never stuck behind a JPEG. What
+happens when a lane is full is a per-lane policy:
+
+    block        the producer waits (backpressure)
+    drop_oldest  the oldest queued item is discarded to make room
+    drop_newest  the new item is discarded
+
+Every lane tracks its depth, drops and how long items waited before being
+sent, so saturation of the uplink is visible. After each ``get()``,
+``last_wait`` is the time that item spent queued and ``last_origin`` the
+timestamp its producer passed to ``put()`` (its enqueue time if none), so
+the consumer can measure capture-to-send latency.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from collections import deque
+
+POLICIES = ("block", "drop_oldest", "drop_newest")
+
+
+class Lane:
+    def __init__(self, name: str, priority: int, maxsize: int, policy: str):
+        if policy not in POLICIES:
+            raise ValueError(f"Unknown lane policy '{policy}'. Allowed: {', '.join(POLICIES)}")
+        self.name = name
+        self.priority = priority
+        self.maxsize = maxsize
+        self.policy = policy
+        self.items = deque()
+        self.not_full = asyncio.Event()
+        self.not_full.set()
+        self.enqueued = 0
+        self.sent = 0
+        self.dropped = 0
+        self.max_depth = 0
+        self.wait_total = 0.0
+        self.wait_max = 0.0
+
+    @property
+    def depth(self) -> int:
+        return len(self.items)
+
+    def stats(self) -> dict:
+        return {
+            "depth": self.depth,
+            "max_depth": self.max_depth,
+            "enqueued": self.enqueued,
+            "sent": self.sent,
+            "dropped": self.dropped,
+            "wait_avg_ms": 1000 * self.wait_total / self.sent if self.sent else 0.0,
+            "wait_max_ms": 1000 * self.wait_max,
+        }
+
+
+# name -> (priority, maxsize, policy); lower priority value is served first.
+# VAD markers (activity start/end, stream end) share the audio lane so they
+# stay in order with the chunks they bracket.
+DEFAULT_LANES = {
+    "audio": (0, 32, "block"),
+    "context": (1, 4, "drop_oldest"),  # short text updates, e.g. who is in view
+    "video": (2, 2, "drop_oldest"),
+}
+
+
+class SendScheduler:
+    def __init__(self, lanes: dict | None = None):
+        lanes = DEFAULT_LANES if lanes is None else lanes
+        self.lanes = {
+            name: Lane(name, priority, maxsize, policy)
+            for name, (priority, maxsize, policy) in lanes.items()
+        }
+        self._order = sorted(self.lanes.values(), key=lambda lane: lane.priority)
+        self._ready = asyncio.Event()
+        self.last_wait = 0.0
+        self.last_origin = None
+
+    async def put(self, lane_name: str, msg, origin: float | None = None) -> bool:
+        """Queue ``msg`` on a lane; returns False if the message was dropped.
+
+        ``origin`` is a ``time.perf_counter()`` timestamp of when the data was
+        captured.
+        """
+        lane = self.lanes[lane_name]
+        while len(lane.items) >= lane.maxsize:
+            if lane.policy == "drop_oldest":
+                lane.items.popleft()
+                lane.dropped += 1
+            elif lane.policy == "drop_newest":
+                lane.dropped += 1
+                return False
+            else:
+                lane.not_full.clear()
+                await lane.not_full.wait()
+        now = time.perf_counter()
+        lane.items.append((now, now if origin is None else origin, msg))
+        lane.enqueued += 1
+        lane.max_depth = max(lane.max_depth, len(lane.items))
+        self._ready.set()
+        return True
+
+    async def get(self):
+        """Return ``(lane_name, msg)`` from the highest-priority non-empty lane."""
+        while True:
+            for lane in self._order:
+                if lane.items:
+                    queued_at, origin, msg = lane.items.popleft()
+                    wait = time.perf_counter() - queued_at
+                    self.last_wait = wait
+                    self.last_origin = origin
+                    lane.sent += 1
+                    lane.wait_total += wait
+                    lane.wait_max = max(lane.wait_max, wait)
+                    lane.not_full.set()
+                    return lane.name, msg
+            self._ready.clear()
+            await self._ready.wait()
+
+    def depth(self) -> int:
+        return sum(len(lane.items) for lane in self._order)
+
+    def stats(self) -> dict:
+        return {name: lane.stats() for name, lane in self.lanes.items()}
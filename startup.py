@@ -0,0 +1,86 @@
+"""Startup timeline for the realtime loop.
+
+Records named milestones relative to a start time and prints them as a
+``[STARTUP]`` timeline. Each milestone is kept only the first time it is
+marked, so per-session events such as "first audio out" measure the cold
+start and are not overwritten by later turns.
+
+``ImportTimer`` is the in-process equivalent of ``python -X importtime``: once
+installed it times every ``import`` statement that actually loads a module,
+including the ones deferred until a code path first needs them.
+"""
+from __future__ import annotations
+
+import builtins
+import sys
+import threading
+import time
+
+
+class StartupTimeline:
+    def __init__(self, label: str = "startup"):
+        self.label = label
+        self.start = time.perf_counter()
+        self.events = {}
+
+    def mark(self, name: str) -> bool:
+        """Record ``name`` now; returns False if it was already recorded."""
+        if name in self.events:
+            return False
+        self.events[name] = time.perf_counter() - self.start
+        return True
+
+    def elapsed(self, name: str) -> float | None:
+        return self.events.get(name)
+
+    def report(self) -> str:
+        lines = [f"[STARTUP] {self.label} timeline:"]
+        for name, t in sorted(self.events.items(), key=lambda item: item[1]):
+            lines.append(f"[STARTUP]   +{t:7.3f}s  {name}")
+        return "\n".join(lines)
+
+
+class ImportTimer:
+    def __init__(self):
+        self.records = []  # (depth, name, self seconds, cumulative seconds), in completion order
+        self._local = threading.local()
+        self._original = None
+
+    def install(self):
+        if self._original is None:
+            self._original = builtins.__import__
+            builtins.__import__ = self._import
+
+    def uninstall(self):
+        if self._original is not None:
+            builtins.__import__ = self._original
+            self._original = None
+
+    def _import(self, name, globals=None, locals=None, fromlist=(), level=0):
+        if level or name in sys.modules:
+            return self._original(name, globals, locals, fromlist, level)
+        stack = getattr(self._local, "stack", None)
+        if stack is None:
+            stack = self._local.stack = []
+        stack.append(0.0)  # time spent in nested imports
+        start = time.perf_counter()
+        try:
+            return self._original(name, globals, locals, fromlist, level)
+        finally:
+            total = time.perf_counter() - start
+            nested = stack.pop()
+            if stack:
+                stack[-1] += total
+            self.records.append((len(stack), name, total - nested, total))
+
+    def total(self) -> float:
+        return sum(total for depth, _, _, total in self.records if depth == 0)
+
+    def report(self, min_ms: float = 1.0) -> str:
+        """``-X importtime``-style table of imports taking at least ``min_ms``."""
+        lines = ["[IMPORT]    self [ms] | cumulative [ms] | module"]
+        for depth, name, own, total in self.records:
+            if total * 1000 >= min_ms:
+                lines.append(f"[IMPORT] {own * 1000:10.1f} | {total * 1000:15.1f} | {'  ' * depth}{name}")
+        lines.append(f"[IMPORT] deferred imports total: {self.total() * 1000:.1f}ms")
+        return "\n".join(lines)
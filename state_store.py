@@ -0,0 +1,134 @@
+"""Write-coalescing store for the robot's facial emotion state.
+
+The model calls ``facial_emotion_update`` on every turn, usually with the
+same values. The store publishes a state to the live sink (the shared-memory
+record the renderer reads) only when it actually changes, and persists it to
+the slow sink (the JSON config on disk) from a background thread: updates
+within ``debounce`` seconds of each other collapse into one write of the
+latest state, and a write is skipped if the file already holds that state.
+A steady stream of changes is still written at least every ``max_wait``
+seconds, and a failed write is retried with a growing delay.
+"""
+from __future__ import annotations
+
+import atexit
+import threading
+import time
+
+DEBOUNCE_SECONDS = 2.0
+MAX_WAIT_SECONDS = 10.0  # longest a changed state stays unpersisted
+RETRY_SECONDS = 1.0  # first retry delay after a failed write, doubled up to MAX_RETRY_SECONDS
+MAX_RETRY_SECONDS = 30.0
+
+
+class EmotionStateStore:
+    def __init__(self, publish=None, persist=None, debounce: float = DEBOUNCE_SECONDS,
+                 max_wait: float = MAX_WAIT_SECONDS):
+        self._publish = publish
+        self._persist = persist
+        self.debounce = debounce
+        self.max_wait = max(max_wait, debounce)
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._current = None  # last state published to the live sink
+        self._persisted = None  # last state written by the persist sink
+        self._pending_since = None  # time of the first unpersisted update
+        self._last_update = 0.0
+        self._retry_at = 0.0  # no write before this after a failure
+        self._retry_delay = RETRY_SECONDS
+        self._writer = None
+        self._closed = False
+        self.last_persist_error = None
+        self.updates = 0
+        self.unchanged = 0  # identical updates, nothing written anywhere
+        self.persist_writes = 0
+        self.persist_coalesced = 0  # changes folded into a later disk write
+
+    def update(self, emotion: str, direction: str) -> bool:
+        """Record a new state; returns False if it matched the current one."""
+        state = {"emotion": emotion, "direction": direction}
+        with self._lock:
+            self.updates += 1
+            if state == self._current:
+                self.unchanged += 1
+                return False
+            if self._publish is not None:
+                self._publish(emotion, direction)
+            self._current = state
+            if self._persist is not None:
+                if self._pending_since is not None:
+                    self.persist_coalesced += 1
+                else:
+                    self._pending_since = time.monotonic()
+                self._last_update = time.monotonic()
+                self._ensure_writer()
+                self._wake.notify()
+        return True
+
+    def _ensure_writer(self):
+        if self._writer is None:
+            self._writer = threading.Thread(target=self._writer_loop, name="state-writer", daemon=True)
+            self._writer.start()
+            atexit.register(self.close)
+
+    def _writer_loop(self):
+        while True:
+            with self._lock:
+                while self._pending_since is None and not self._closed:
+                    self._wake.wait()
+                if self._pending_since is None:
+                    return  # closed with nothing left to write
+                # Wait until updates have been quiet for the debounce window,
+                # but no longer than max_wait after the first pending change.
+                while not self._closed:
+                    due = min(self._last_update + self.debounce, self._pending_since + self.max_wait)
+                    remaining = max(due, self._retry_at) - time.monotonic()
+                    if remaining <= 0:
+                        break
+                    self._wake.wait(remaining)
+                state = self._current
+                pending_since, self._pending_since = self._pending_since, None
+                closed = self._closed
+                if state == self._persisted:
+                    continue
+            try:
+                self._persist(state)
+            except Exception as e:  # noqa: BLE001 reported on the next tool response
+                with self._lock:
+                    self.last_persist_error = f"Failed to write config: {e.__class__.__name__}: {e}"
+                    if closed:
+                        return  # one last attempt on close; don't block exit retrying
+                    if self._pending_since is None:
+                        self._pending_since = pending_since  # retry even if nothing changes
+                    self._retry_at = time.monotonic() + self._retry_delay
+                    self._retry_delay = min(2 * self._retry_delay, MAX_RETRY_SECONDS)
+                continue
+            with self._lock:
+                self._persisted = state
+                self.persist_writes += 1
+                self.last_persist_error = None
+                self._retry_at = 0.0
+                self._retry_delay = RETRY_SECONDS
+
+    def pop_persist_error(self) -> str | None:
+        """Return the last write failure once; None if it was already reported."""
+        with self._lock:
+            error, self.last_persist_error = self.last_persist_error, None
+        return error
+
+    def close(self, timeout: float = 5.0):
+        """Flush any pending state to disk and stop the writer."""
+        with self._lock:
+            self._closed = True
+            self._wake.notify()
+        if self._writer is not None:
+            self._writer.join(timeout)
+
+    def stats(self) -> dict:
+        return {
+            "updates": self.updates,
+            "unchanged": self.unchanged,
+            "persist_writes": self.persist_writes,
+            "persist_coalesced": self.persist_coalesced,
+            "writes_avoided": self.updates - self.persist_writes,
+        }
@@ -1,11 +1,17 @@
 import cv2
-import os
 import numpy as np
+import os
+import argparse
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import threading
 import time
-# Folder for saving faces
-DATASET_DIR = "faces_dataset"
-os.makedirs(DATASET_DIR, exist_ok=True)
+
+from face_model import DATASET_DIR
+from face_index import BACKENDS, create_model, default_threshold
+from face_store import FaceStore, STORE_DIR
+from face_tracker import (FrameRecognizer, TrackedRecognizer, load_cascade,
+                          DETECT_EVERY, DETECT_SCALE, RECOGNIZE_EVERY)
 
 """Simple face dataset & (optional) LBPH recognition demo.
 
@@ -13,103 +19,125 @@ If OpenCV was installed without the contrib modules (opencv-python), the
 cv2.face namespace will be missing and recognition won't work. We degrade
 gracefully and still allow dataset collection so that once the user installs
 opencv-contrib-python, recognition can start immediately without code changes.
-"""
 
-# Try to create recognizer (needs opencv-contrib-python). Fall back gracefully.
-try:
-    recognizer = cv2.face.LBPHFaceRecognizer_create()
-    HAVE_RECOGNIZER = True
-except AttributeError:
-    recognizer = None
-    HAVE_RECOGNIZER = False
-    print("[INFO] OpenCV built without 'face' module. Install 'opencv-contrib-python' to enable LBPH recognition.")
-
-# Load existing dataset
-def train_recognizer():
-    faces, labels = [], []
-    label_map = {}
-    i = 0
-    for filename in os.listdir(DATASET_DIR):
-        if filename.endswith(".jpg"):
-            path = os.path.join(DATASET_DIR, filename)
-            img = cv2.imread(path, cv2.IMREAD_GRAYSCALE)
-            label = filename.split("_")[0]  
-            if label not in label_map:
-                label_map[label] = i
-                i += 1
-            faces.append(img)
-            labels.append(label_map[label])
-    if faces and HAVE_RECOGNIZER:
-        recognizer.train(faces, np.array(labels))
-    return {v: k for k, v in label_map.items()}
-
-label_dict = train_recognizer()
-
-# Start camera
-cap = cv2.VideoCapture(0)
-face_cascade = cv2.CascadeClassifier(cv2.data.haarcascades + "haarcascade_frontalface_default.xml")
+The trained model is cached in faces_model/ together with a manifest of the
+dataset files it contains, so startup only processes new files and captures
+are added with LBPH update() instead of retraining everything.
+--backend embedding swaps LBPH for the embedding index in face_index.py:
+one vector per face, cosine nearest-neighbour matching and O(1) enrollment.
+Search is exact; --coarse-index trades some accuracy for sub-linear search
+over very large galleries (see face_index.py).
+--store keeps crops in the packed, memory-mapped FaceStore (face_store.py)
+instead of one JPEG each; existing JPEGs are imported on first use.
+
+By default faces are detected on a downscaled frame every few frames and
+tracked in between, and each track is only recognised when it is new or its
+label is stale. --detect-every 1 restores per-frame detection and
+recognition; --benchmark compares the two.
+
+Enrollment ('a') samples one face per second from the live preview instead
+of pausing it. --pipeline runs capture and recognition in their own
+processes (see face_pipeline.py) so neither can stall the preview;
+enrollment then samples in the recognizer process.
+"""
 
 SAMPLE_SIZE = 20  # frames to capture per new identity
+SAMPLE_INTERVAL = 1.0  # seconds between enrollment samples
 FACE_SIZE = (200, 200)  # normalization size
-THRESHOLD_CONFIDENCE = 70  # LBPH: lower is better; only show if <= this value
+THRESHOLD_CONFIDENCE = 70  # LBPH: lower is better; only show if <= this value (set per backend)
+THRESHOLD_STEP = 5  # +/- adjustment; finer for the embedding backend
 SHOW_UNKNOWN = False  # If False, skip drawing boxes for low-confidence / unknown faces
+FPS_REPORT_INTERVAL = 10.0  # seconds between [FPS] lines
 
-print("[INFO] Controls: q=quit, a=add person, r=retrain, +/- adjust threshold, u toggle unknown visibility")
-print(f"[INFO] Current confidence threshold: {THRESHOLD_CONFIDENCE}")
-
-def capture_new_person(name: str):
-    """Capture SAMPLE_SIZE face crops for a new person and save to dataset."""
-    count = 0
-    print(f"[CAPTURE] Collecting {SAMPLE_SIZE} samples for '{name}' ... Look at the camera.")
-    while count < SAMPLE_SIZE:
-        time.sleep(1)
-        ret2, frm = cap.read()
-        if not ret2:
-            continue
-        gray2 = cv2.cvtColor(frm, cv2.COLOR_BGR2GRAY)
-        dets = face_cascade.detectMultiScale(gray2, 1.3, 5)
-        if len(dets) == 0:
-            cv2.putText(frm, "No face detected", (10, 30), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0,0,255), 2)
-        else:
-            # Take the largest face
-            x, y, w, h = max(dets, key=lambda b: b[2]*b[3])
-            roi = gray2[y:y+h, x:x+w]
-            roi_resized = cv2.resize(roi, FACE_SIZE)
-            filename = f"{name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jpg"
-            cv2.imwrite(os.path.join(DATASET_DIR, filename), roi_resized)
-            count += 1
-            cv2.rectangle(frm, (x, y), (x+w, y+h), (0,255,0), 2)
-            cv2.putText(frm, f"{name} {count}/{SAMPLE_SIZE}", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0,255,0), 2)
-        cv2.imshow("Face Recognition", frm)
-        if cv2.waitKey(1) & 0xFF == ord('q'):
-            return False  # user aborted
-    print(f"[CAPTURE] Done capturing for '{name}'.")
-    return True
-
-while True:
-    ret, frame = cap.read()
-    if not ret:
-        continue
-    gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-    faces = face_cascade.detectMultiScale(gray, 1.3, 5)
-
-    for idx, (x, y, w, h) in enumerate(faces):
-        face_img = gray[y:y+h, x:x+w]
-        face_norm = cv2.resize(face_img, FACE_SIZE)
-
-        if HAVE_RECOGNIZER and recognizer is not None and len(label_dict) > 0:
-            try:
-                label, confidence = recognizer.predict(face_norm)
-                name = label_dict.get(label, "Unknown")
-                is_high_conf = confidence <= THRESHOLD_CONFIDENCE and name != "Unknown"
-                if is_high_conf:
-                    text = f"{name}:{int(confidence)}"
-                else:
-                    text = "Unknown"
-            except Exception:
-                text = "Unknown"
-        else:
-            text = "Unknown"
+
+def make_processor(cascade, model, detect_every: int, detect_scale: float, recognize_every: int):
+    if detect_every <= 1:
+        return FrameRecognizer(cascade, model, THRESHOLD_CONFIDENCE)
+    return TrackedRecognizer(cascade, model, THRESHOLD_CONFIDENCE, detect_every=detect_every,
+                             detect_scale=detect_scale, recognize_every=recognize_every)
+
+
+def benchmark(frames, model, detect_every: int = DETECT_EVERY, detect_scale: float = DETECT_SCALE,
+              recognize_every: int = RECOGNIZE_EVERY):
+    """Process the same BGR frames per-frame and tracked; prints FPS of each."""
+    cascade = load_cascade()
+    grays = [cv2.cvtColor(f, cv2.COLOR_BGR2GRAY) for f in frames]
+    results = {}
+    for label, every in (("per-frame", 1), (f"tracked (every {detect_every})", detect_every)):
+        processor = make_processor(cascade, model, every, detect_scale, recognize_every)
+        start = time.perf_counter()
+        faces = sum(len(processor.process(gray)) for gray in grays)
+        elapsed = time.perf_counter() - start
+        results[label] = len(grays) / elapsed
+        print(f"[BENCH] {label:<22} {results[label]:7.1f} fps  detections={processor.detections} "
+              f"recognitions={processor.recognitions} faces shown={faces}")
+    return results
+
+
+def open_store(store_dir: str) -> FaceStore:
+    store = FaceStore(store_dir)
+    start = time.perf_counter()
+    imported = store.import_jpegs(DATASET_DIR)
+    if imported:
+        print(f"[INFO] Imported {imported} JPEG crops into {store_dir} in {time.perf_counter() - start:.2f}s.")
+    return store
+
+
+def load_model(backend: str = "lbph", store_dir: str | None = None, coarse: bool = False,
+               nprobe: int | None = None):
+    """Restore the cached model and apply dataset changes since it was saved."""
+    store = open_store(store_dir) if store_dir else None
+    model = create_model(backend, DATASET_DIR, store=store, coarse=coarse, nprobe=nprobe)
+    if not model.available:
+        print("[INFO] OpenCV built without 'face' module. Install 'opencv-contrib-python' to enable LBPH recognition.")
+        return model
+    cached = model.load()
+    result = model.sync()
+    print(f"[INFO] Model ready ({'cache' if cached else 'no cache'}, {result['mode']}, "
+          f"+{result['added']} files) in {result['seconds']:.2f}s: {len(model.label_ids)} identities.")
+    return model
+
+
+class Enrollment:
+    """Collects SAMPLE_SIZE crops of one person from the frames being displayed.
+
+    ``sample()`` is called once per displayed frame and takes the largest
+    face at most every SAMPLE_INTERVAL seconds, so the preview keeps running
+    while a person is added. With ``save_jpegs=False`` nothing is written and
+    ``filenames`` stays empty.
+    """
+
+    def __init__(self, name: str, save_jpegs: bool = True):
+        self.name = name
+        self.save_jpegs = save_jpegs
+        self.crops, self.filenames = [], []
+        self.next_sample = time.monotonic()
+
+    @property
+    def done(self) -> bool:
+        return len(self.crops) >= SAMPLE_SIZE
+
+    def sample(self, gray, faces) -> bool:
+        """Take a crop of the largest face if one is due; returns True if taken."""
+        now = time.monotonic()
+        if now < self.next_sample or not faces:
+            return False
+        self.next_sample = now + SAMPLE_INTERVAL
+        x, y, w, h = max((f.box for f in faces), key=lambda b: b[2] * b[3])
+        crop = cv2.resize(gray[y:y+h, x:x+w], FACE_SIZE)
+        self.crops.append(crop)
+        if self.save_jpegs:
+            filename = f"{self.name}_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.jpg"
+            cv2.imwrite(os.path.join(DATASET_DIR, filename), crop)
+            self.filenames.append(filename)
+        return True
+
+
+def draw_faces(frame, faces):
+    for result in faces:
+        x, y, w, h = result.box
+        idx = result.track_id
+        text = f"{result.name}:{int(result.confidence)}" if result.name is not None else "Unknown"
         # Skip drawing for unknown / low-confidence if configured
         if text == "Unknown" and not SHOW_UNKNOWN:
             continue
@@ -118,35 +146,238 @@ while True:
         cv2.rectangle(frame, (x, y), (x+w, y+h), color, 2)
         cv2.putText(frame, f"{idx}:{text}", (x, y-10), cv2.FONT_HERSHEY_SIMPLEX, 0.6, color, 2)
 
-    cv2.putText(frame, f"a:add r:retrain +/-:thresh({THRESHOLD_CONFIDENCE}) u:unk({int(SHOW_UNKNOWN)}) q:quit", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255,255,255), 2)
-    cv2.imshow("Face Recognition", frame)
-
-    key = cv2.waitKey(1) & 0xFF
-    if key == ord('q'):
-        break
-    elif key == ord('r'):
-        print('[ACTION] Retraining from current dataset...')
-        label_dict = train_recognizer()
-        print(f"[ACTION] Retrain complete: {len(label_dict)} identities.")
-    elif key == ord('a'):
-        if not HAVE_RECOGNIZER:
-            print("[WARN] Recognizer unavailable (install opencv-contrib-python). You can still collect data.")
-        name = input("Enter new person's name: ").strip()
-        if name:
-            if capture_new_person(name):
-                label_dict = train_recognizer()
-                print(f"[INFO] Added '{name}'. Known identities: {len(label_dict)}")
-            else:
-                print("[INFO] Capture aborted.")
-    elif key in (43, ord('=')):  # '+' (some keyboards produce '=' without shift)
-        THRESHOLD_CONFIDENCE += 5
-        print(f"[TUNE] Threshold increased to {THRESHOLD_CONFIDENCE}")
-    elif key == ord('-'):
-        THRESHOLD_CONFIDENCE = max(5, THRESHOLD_CONFIDENCE - 5)
-        print(f"[TUNE] Threshold decreased to {THRESHOLD_CONFIDENCE}")
-    elif key == ord('u'):
-        SHOW_UNKNOWN = not SHOW_UNKNOWN
-        print(f"[TUNE] SHOW_UNKNOWN set to {SHOW_UNKNOWN}")
-
-cap.release()
-cv2.destroyAllWindows()
+
+def run_pipeline(args):
+    """Display loop for the multi-process pipeline; capture and recognition run elsewhere."""
+    global THRESHOLD_CONFIDENCE, SHOW_UNKNOWN
+    from face_pipeline import FacePipeline
+
+    pipeline = FacePipeline(args.video if args.video else 0, DATASET_DIR, backend=args.backend, store_dir=args.store,
+                            coarse=args.coarse_index, nprobe=args.nprobe, threshold=THRESHOLD_CONFIDENCE,
+                            detect_every=args.detect_every, detect_scale=args.detect_scale,
+                            recognize_every=args.recognize_every)
+    pipeline.start()
+    frame = np.empty(pipeline.ring.shape, dtype=np.uint8)
+    shown_seq = -1
+    faces, enroll_text = [], ""
+    processed = skipped = processed_at_start = 0
+    names = []  # filled by the name prompt thread
+    prompt = None
+    fps_frames, fps_start = 0, time.perf_counter()
+    fps = 0.0
+
+    print("[INFO] Controls: q=quit, a=add person, r=retrain, +/- adjust threshold, u toggle unknown visibility")
+    print(f"[INFO] Current confidence threshold: {THRESHOLD_CONFIDENCE}")
+
+    try:
+        while True:
+            for message in pipeline.poll():
+                if message[0] == "faces":
+                    _, _, faces, processed, skipped = message
+                elif message[0] == "enroll":
+                    _, name, count, total = message
+                    enroll_text = f" {name} {count}/{total}" if count < total else ""
+                else:
+                    print(f"[INFO] {message[1]}")
+            while names:
+                name = names.pop()
+                if name:
+                    pipeline.send("enroll", name)
+
+            seq, got = pipeline.ring.read(out=frame)
+            if got is not None and seq != shown_seq:
+                shown_seq = seq
+                draw_faces(frame, faces)
+                fps_frames += 1
+                now = time.perf_counter()
+                if now - fps_start >= FPS_REPORT_INTERVAL:
+                    fps = fps_frames / (now - fps_start)
+                    recognized = (processed - processed_at_start) / (now - fps_start)
+                    print(f"[FPS] display {fps:.1f} fps, recognizer {recognized:.1f} fps "
+                          f"(processed={processed} skipped={skipped})")
+                    fps_frames, fps_start, processed_at_start = 0, now, processed
+                cv2.putText(frame, f"a:add r:retrain +/-:thresh({THRESHOLD_CONFIDENCE}) u:unk({int(SHOW_UNKNOWN)}) q:quit {fps:.0f}fps{enroll_text}", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255,255,255), 2)
+                cv2.imshow("Face Recognition", frame)
+
+            key = cv2.waitKey(1) & 0xFF
+            if key == ord('q'):
+                break
+            elif key == ord('r'):
+                print('[ACTION] Syncing model with current dataset...')
+                pipeline.send("sync")
+            elif key == ord('a') and (prompt is None or not prompt.is_alive()):
+                # Ask for the name off the display thread so the preview keeps running.
+                prompt = threading.Thread(
+                    target=lambda: names.append(input("Enter new person's name: ").strip()), daemon=True)
+                prompt.start()
+            elif key in (43, ord('=')):  # '+' (some keyboards produce '=' without shift)
+                THRESHOLD_CONFIDENCE += THRESHOLD_STEP
+                pipeline.send("threshold", THRESHOLD_CONFIDENCE)
+                print(f"[TUNE] Threshold increased to {THRESHOLD_CONFIDENCE}")
+            elif key == ord('-'):
+                THRESHOLD_CONFIDENCE = max(THRESHOLD_STEP, THRESHOLD_CONFIDENCE - THRESHOLD_STEP)
+                pipeline.send("threshold", THRESHOLD_CONFIDENCE)
+                print(f"[TUNE] Threshold decreased to {THRESHOLD_CONFIDENCE}")
+            elif key == ord('u'):
+                SHOW_UNKNOWN = not SHOW_UNKNOWN
+                print(f"[TUNE] SHOW_UNKNOWN set to {SHOW_UNKNOWN}")
+    finally:
+        cv2.destroyAllWindows()
+        print("[INFO] Stopping pipeline and saving the face model...")
+        pipeline.close()
+
+
+def main():
+    global THRESHOLD_CONFIDENCE, THRESHOLD_STEP, SHOW_UNKNOWN
+    parser = argparse.ArgumentParser(description="Face dataset collection and LBPH recognition demo")
+    parser.add_argument("--backend", choices=BACKENDS, default="lbph",
+                        help="face model: LBPH or the embedding index (cosine nearest neighbour)")
+    parser.add_argument("--coarse-index", action="store_true",
+                        help="embedding backend: approximate k-means search for large galleries; may miss matches")
+    parser.add_argument("--nprobe", type=int, metavar="N",
+                        help="buckets searched per query with --coarse-index (default: 30%% of them)")
+    parser.add_argument("--detect-every", type=int, default=DETECT_EVERY,
+                        help="run face detection every N frames and track in between; 1 = every frame")
+    parser.add_argument("--detect-scale", type=float, default=DETECT_SCALE,
+                        help="downscale factor for the detection frame")
+    parser.add_argument("--recognize-every", type=int, default=RECOGNIZE_EVERY,
+                        help="frames before a tracked face is recognised again")
+    parser.add_argument("--benchmark", type=int, metavar="FRAMES",
+                        help="capture FRAMES frames and compare per-frame vs tracked FPS, then exit")
+    parser.add_argument("--video", help="read frames from this video file instead of the camera")
+    parser.add_argument("--store", nargs="?", const=STORE_DIR, metavar="DIR",
+                        help=f"keep face crops in a packed store (default {STORE_DIR}) instead of JPEGs")
+    parser.add_argument("--pipeline", action="store_true",
+                        help="run capture and recognition in separate processes sharing frames")
+    args = parser.parse_args()
+    os.makedirs(DATASET_DIR, exist_ok=True)
+    THRESHOLD_CONFIDENCE = default_threshold(args.backend)
+    if args.backend != "lbph":
+        THRESHOLD_STEP = 1
+
+    if args.pipeline:
+        run_pipeline(args)
+        return
+
+    # Loading the model and opening the camera overlap; recognition starts
+    # once the model is ready.
+    loader = ThreadPoolExecutor(max_workers=1)
+    model_future = loader.submit(load_model, args.backend, args.store, args.coarse_index,
+                                 args.nprobe)
+    model = None
+
+    # Start camera
+    cap = cv2.VideoCapture(args.video if args.video else 0)
+    face_cascade = load_cascade()
+
+    if args.benchmark:
+        frames = []
+        while len(frames) < args.benchmark:
+            ret, frame = cap.read()
+            if not ret:
+                break
+            frames.append(frame)
+        cap.release()
+        benchmark(frames, model_future.result(), args.detect_every if args.detect_every > 1 else DETECT_EVERY,
+                  args.detect_scale, args.recognize_every)
+        loader.shutdown()
+        return
+
+    processor = make_processor(face_cascade, None, args.detect_every, args.detect_scale, args.recognize_every)
+    fps_frames, fps_start = 0, time.perf_counter()
+    fps = 0.0
+    enrollment = None
+    names = []  # filled by the name prompt thread
+    prompt = None
+
+    print("[INFO] Controls: q=quit (or cancel adding), a=add person, r=retrain, +/- adjust threshold, u toggle unknown visibility")
+    print(f"[INFO] Current confidence threshold: {THRESHOLD_CONFIDENCE}")
+
+    while True:
+        if model is None and model_future.done():
+            model = model_future.result()
+            processor.model = model if model.available else None
+        while names:
+            name = names.pop()
+            if name:
+                enrollment = Enrollment(name, save_jpegs=model.store is None)
+                print(f"[CAPTURE] Collecting {SAMPLE_SIZE} samples for '{name}' ... Look at the camera.")
+        ret, frame = cap.read()
+        if not ret:
+            continue
+        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+
+        faces = processor.process(gray)
+        draw_faces(frame, faces)
+        enroll_text = ""
+        if enrollment is not None:
+            enrollment.sample(gray, faces)
+            enroll_text = f" {enrollment.name} {len(enrollment.crops)}/{SAMPLE_SIZE}"
+            if enrollment.done:
+                start = time.perf_counter()
+                if model.store is not None:
+                    model.store.append(enrollment.name, enrollment.crops)
+                model.add(enrollment.name, enrollment.crops, enrollment.filenames)
+                print(f"[INFO] Added '{enrollment.name}' in {time.perf_counter() - start:.2f}s. "
+                      f"Known identities: {len(model.label_ids)}")
+                enrollment = None
+
+        fps_frames += 1
+        now = time.perf_counter()
+        if now - fps_start >= FPS_REPORT_INTERVAL:
+            fps = fps_frames / (now - fps_start)
+            print(f"[FPS] {fps:.1f} fps (detect every {args.detect_every}, "
+                  f"detections={processor.detections} recognitions={processor.recognitions})")
+            fps_frames, fps_start = 0, now
+        status = "" if model is not None else " (loading model)"
+        cv2.putText(frame, f"a:add r:retrain +/-:thresh({THRESHOLD_CONFIDENCE}) u:unk({int(SHOW_UNKNOWN)}) q:quit {fps:.0f}fps{status}{enroll_text}", (10, 25), cv2.FONT_HERSHEY_SIMPLEX, 0.55, (255,255,255), 2)
+        cv2.imshow("Face Recognition", frame)
+
+        key = cv2.waitKey(1) & 0xFF
+        if key == ord('q') and enrollment is not None:
+            print(f"[INFO] Capture for '{enrollment.name}' aborted.")
+            enrollment = None
+        elif key == ord('q'):
+            break
+        elif key in (ord('r'), ord('a')) and model is None:
+            print("[WAIT] Model is still loading.")
+        elif key == ord('r'):
+            # Picks up files added or removed outside this program; only a
+            # removed or changed file forces a full retrain.
+            print('[ACTION] Syncing model with current dataset...')
+            if model.store is not None:
+                model.store.import_jpegs(DATASET_DIR)
+            result = model.sync()
+            print(f"[ACTION] {result['mode']} (+{result['added']} files) in {result['seconds']:.2f}s: "
+                  f"{len(model.label_ids)} identities.")
+        elif key == ord('a') and enrollment is None and (prompt is None or not prompt.is_alive()):
+            if not model.available:
+                print("[WARN] Recognizer unavailable (install opencv-contrib-python). You can still collect data.")
+            # Ask for the name off the display thread so the preview keeps running.
+            prompt = threading.Thread(
+                target=lambda: names.append(input("Enter new person's name: ").strip()), daemon=True)
+            prompt.start()
+        elif key in (43, ord('=')):  # '+' (some keyboards produce '=' without shift)
+            THRESHOLD_CONFIDENCE += THRESHOLD_STEP
+            processor.threshold = THRESHOLD_CONFIDENCE
+            print(f"[TUNE] Threshold increased to {THRESHOLD_CONFIDENCE}")
+        elif key == ord('-'):
+            THRESHOLD_CONFIDENCE = max(THRESHOLD_STEP, THRESHOLD_CONFIDENCE - THRESHOLD_STEP)
+            processor.threshold = THRESHOLD_CONFIDENCE
+            print(f"[TUNE] Threshold decreased to {THRESHOLD_CONFIDENCE}")
+        elif key == ord('u'):
+            SHOW_UNKNOWN = not SHOW_UNKNOWN
+            print(f"[TUNE] SHOW_UNKNOWN set to {SHOW_UNKNOWN}")
+
+    cap.release()
+    cv2.destroyAllWindows()
+    if model is None:
+        model = model_future.result()
+    if model.dirty:
+        print("[INFO] Saving face model...")
+        model.save()
+    loader.shutdown()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,97 @@
+"""Runs model tool calls off the receive path.
+
+Tool functions are plain blocking callables (file I/O, motor commands), so
+they run on a small thread pool. Each tool has its own concurrency limit and
+timeout; a call that times out yields an error payload for the model (the
+worker thread itself cannot be interrupted and finishes in the background).
+Per-tool latency is recorded for every call.
+"""
+from __future__ import annotations
+
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+MAX_WORKERS = 4
+DEFAULT_TIMEOUT = 10.0  # seconds
+DEFAULT_CONCURRENCY = 2
+
+# Per-tool overrides: name -> (timeout seconds, max concurrent calls).
+# State updates are serialised so they apply in the order the model sent them.
+TOOL_LIMITS = {
+    "facial_emotion_update": (2.0, 1),
+    "robot_leg_movement": (5.0, 1),
+}
+
+
+class ToolStats:
+    def __init__(self):
+        self.calls = 0
+        self.errors = 0
+        self.timeouts = 0
+        self.total = 0.0
+        self.max = 0.0
+
+    def record(self, seconds: float):
+        self.calls += 1
+        self.total += seconds
+        self.max = max(self.max, seconds)
+
+    def as_dict(self) -> dict:
+        return {
+            "calls": self.calls,
+            "errors": self.errors,
+            "timeouts": self.timeouts,
+            "avg_ms": 1000 * self.total / self.calls if self.calls else 0.0,
+            "max_ms": 1000 * self.max,
+        }
+
+
+class ToolExecutor:
+    def __init__(self, dispatch, max_workers: int = MAX_WORKERS, limits: dict | None = None,
+                 default_timeout: float = DEFAULT_TIMEOUT,
+                 default_concurrency: int = DEFAULT_CONCURRENCY):
+        self.dispatch = dispatch
+        self.limits = TOOL_LIMITS if limits is None else limits
+        self.default_timeout = default_timeout
+        self.default_concurrency = default_concurrency
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="tool")
+        self._semaphores = {}
+        self.stats = {}
+
+    def _limits_for(self, name: str):
+        return self.limits.get(name, (self.default_timeout, self.default_concurrency))
+
+    async def run(self, name: str, args: dict):
+        """Run one tool call and return its result payload."""
+        timeout, concurrency = self._limits_for(name)
+        sem = self._semaphores.get(name)
+        if sem is None:
+            sem = self._semaphores[name] = asyncio.Semaphore(concurrency)
+        stats = self.stats.setdefault(name, ToolStats())
+        loop = asyncio.get_running_loop()
+        async with sem:
+            start = time.perf_counter()
+            try:
+                result = await asyncio.wait_for(
+                    loop.run_in_executor(self._pool, self.dispatch, name, args), timeout
+                )
+            except TimeoutError:
+                stats.timeouts += 1
+                result = {"error": f"Tool '{name}' timed out after {timeout:g}s."}
+            except Exception as e:  # dispatch normally catches; keep the session alive regardless
+                result = {"error": f"Tool execution failed: {e.__class__.__name__}: {e}"}
+            stats.record(time.perf_counter() - start)
+        if isinstance(result, dict) and ("error" in result or result.get("ok") is False):
+            stats.errors += 1
+        return result
+
+    async def run_all(self, calls) -> list:
+        """Run ``(name, args)`` pairs concurrently; results keep call order."""
+        return await asyncio.gather(*(self.run(name, args) for name, args in calls))
+
+    def snapshot(self) -> dict:
+        return {name: st.as_dict() for name, st in self.stats.items()}
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -1,10 +1,15 @@
 
 from __future__ import annotations
-from move_function import robot_leg_movement
+from move_function import robot_leg_movement, robot_motion_status
 import json
 import os
+import sys
 import tempfile
 
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "EYE"))
+from eye_state import EyeStateWriter  # noqa: E402
+from state_store import EmotionStateStore  # noqa: E402
+
 ALLOWED_EMOTIONS = {
     "neutral",
     "sleepy",
@@ -39,17 +44,41 @@ def get_tool_to_run(function_name: str, function_args: dict):
                     function_args.get("emotion"), function_args.get("direction")
                 )
             case "robot_leg_movement":
-                return robot_leg_movement(function_args.get("direction"))
+                return robot_leg_movement(
+                    function_args.get("direction"), function_args.get("autonomous", False)
+                )
+            case "robot_motion_status":
+                return robot_motion_status(function_args.get("command_id"))
             case _:
                 return {
                     "error": f"Unknown tool '{function_name}'.",
-                    "available_tools": ["facial_emotion_update"],
+                    "available_tools": ["facial_emotion_update", "robot_leg_movement", "robot_motion_status"],
                 }
     except Exception as e:  # Broad catch to ensure we always return a payload
         return {"error": f"Tool execution failed: {e.__class__.__name__}: {e}"}
 
 
 CONFIG_FILE = os.path.join(os.path.dirname(__file__), "EYE", "config.json")
+# The renderer reads the shared-memory record every frame; the JSON file is
+# only a persistence sink (last state survives restarts) and a fallback for
+# renderers started without access to the shared record.
+PERSIST_CONFIG_JSON = True
+CONFIG_DEBOUNCE_SECONDS = 2.0  # bursts of updates within this window -> one disk write
+
+_state_store = None
+
+
+def get_state_store() -> EmotionStateStore:
+    global _state_store
+    if _state_store is None:
+        persist = None
+        if PERSIST_CONFIG_JSON:
+            def persist(state):
+                _atomic_write_json(CONFIG_FILE, state)
+        _state_store = EmotionStateStore(
+            publish=EyeStateWriter().publish, persist=persist, debounce=CONFIG_DEBOUNCE_SECONDS
+        )
+    return _state_store
 
 
 def _atomic_write_json(path: str, data: dict):
@@ -92,12 +121,15 @@ def facial_emotion_update(emotion: str | None, direction: str | None):
     if errors:
         return {"ok": False, "errors": errors}
 
-    persist_error = None
-    config_payload = {"emotion": emotion, "direction": direction}
+    persist_error = publish_error = None
     try:
-        _atomic_write_json(CONFIG_FILE, config_payload)
+        store = get_state_store()
+        store.update(emotion, direction)
+        # Disk writes happen in the background; report each failure once, as a
+        # warning: the eyes already show the new state.
+        persist_error = store.pop_persist_error()
     except Exception as e:  # noqa: BLE001 keep robust
-        persist_error = f"Failed to write config: {e.__class__.__name__}: {e}"
+        publish_error = f"Failed to publish state: {e.__class__.__name__}: {e}"
 
     print(f"[facial_emotion_update] emotion={emotion} direction={direction}")
 
@@ -107,7 +139,9 @@ def facial_emotion_update(emotion: str | None, direction: str | None):
         "direction": direction,
         "message": "Facial emotion state updated.",
     }
-    if persist_error:
+    if publish_error:
         response["ok"] = False
-        response["persist_error"] = persist_error
+        response["error"] = publish_error
+    if persist_error:
+        response["persist_warning"] = persist_error
     return response
\ No newline at end of file
@@ -0,0 +1,119 @@
+"""Voice-activity gate for the microphone uplink.
+
+Each 16-bit PCM chunk is classified with two cheap NumPy features: RMS energy
+and zero-crossing rate. Speech needs energy above an adaptive threshold
+(a multiple of the tracked noise floor, never below ``min_energy``); quiet
+chunks with a very high zero-crossing rate (hiss, fans) are treated as noise
+unless they are clearly loud.
+
+Modes:
+    off       every chunk is forwarded (previous behaviour)
+    gate      silent chunks are dropped; when a speech segment ends an
+              ``audio_stream_end`` marker is sent so the server-side VAD
+              does not wait for silence that never arrives
+    explicit  like gate, but segments are bracketed with activity start/end
+              signals; the Live session must run with automatic activity
+              detection disabled
+
+``pre-roll`` chunks seen just before the onset are sent ahead of it so word
+onsets are not clipped, and ``hangover`` keeps the segment open for a while
+after the last voiced chunk so pauses between words do not split it.
+"""
+from __future__ import annotations
+
+from collections import deque
+
+import numpy as np
+
+MODES = ("off", "gate", "explicit")
+MIN_ENERGY = 300.0  # RMS floor for speech on int16 samples
+NOISE_RATIO = 3.0  # speech must be this many times louder than the noise floor
+MAX_ZCR = 0.35  # zero crossings per sample above which quiet audio is noise
+NOISE_ADAPT = 0.05  # EMA rate of the noise floor on non-speech chunks
+HANGOVER_MS = 400
+PREROLL_MS = 200
+
+AUDIO_MIME = "audio/pcm"
+
+
+class VoiceActivityGate:
+    def __init__(self, mode: str = "gate", sample_rate: int = 16000, chunk_size: int = 1024,
+                 hangover_ms: int = HANGOVER_MS, preroll_ms: int = PREROLL_MS,
+                 min_energy: float = MIN_ENERGY, noise_ratio: float = NOISE_RATIO,
+                 max_zcr: float = MAX_ZCR):
+        if mode not in MODES:
+            raise ValueError(f"Unknown VAD mode '{mode}'. Allowed: {', '.join(MODES)}")
+        self.mode = mode
+        chunk_ms = 1000.0 * chunk_size / sample_rate
+        self.hangover_chunks = max(0, round(hangover_ms / chunk_ms))
+        self.min_energy = min_energy
+        self.noise_ratio = noise_ratio
+        self.max_zcr = max_zcr
+        self.noise_floor = min_energy / noise_ratio
+        self._preroll = deque(maxlen=max(0, round(preroll_ms / chunk_ms)))
+        self._active = False
+        self._silent_run = 0
+        self.chunks_sent = 0
+        self.chunks_suppressed = 0
+        self.segments = 0
+
+    @property
+    def active(self) -> bool:
+        return self._active
+
+    def is_speech(self, chunk: bytes) -> bool:
+        samples = np.frombuffer(chunk, dtype=np.int16)
+        if samples.size == 0:
+            return False
+        x = samples.astype(np.float32)
+        rms = float(np.sqrt(np.dot(x, x) / x.size))
+        zcr = float(np.count_nonzero(np.signbit(samples[1:]) != np.signbit(samples[:-1]))) / x.size
+        threshold = max(self.min_energy, self.noise_floor * self.noise_ratio)
+        speech = rms >= threshold and (zcr <= self.max_zcr or rms >= 2 * threshold)
+        if not speech:
+            self.noise_floor += NOISE_ADAPT * (rms - self.noise_floor)
+        return speech
+
+    def _audio(self, chunk: bytes) -> dict:
+        self.chunks_sent += 1
+        return {"data": chunk, "mime_type": AUDIO_MIME}
+
+    def process(self, chunk: bytes) -> list[dict]:
+        """Return the realtime-input messages to send for one PCM chunk.
+
+        Audio messages use the ``{"data", "mime_type"}`` shape; segment
+        boundaries are ``{"activity": "start" | "end" | "stream_end"}``.
+        """
+        if self.mode == "off":
+            return [self._audio(chunk)]
+
+        out = []
+        if self.is_speech(chunk):
+            self._silent_run = 0
+            if not self._active:
+                self._active = True
+                self.segments += 1
+                if self.mode == "explicit":
+                    out.append({"activity": "start"})
+                out.extend(self._audio(c) for c in self._preroll)
+                self._preroll.clear()
+            out.append(self._audio(chunk))
+        elif self._active:
+            self._silent_run += 1
+            out.append(self._audio(chunk))
+            if self._silent_run > self.hangover_chunks:
+                self._active = False
+                out.append({"activity": "end" if self.mode == "explicit" else "stream_end"})
+        else:
+            if len(self._preroll) == self._preroll.maxlen:
+                self.chunks_suppressed += 1  # oldest pre-roll chunk is discarded
+            self._preroll.append(chunk)
+        return out
+
+    def stats(self) -> dict:
+        return {
+            "chunks_sent": self.chunks_sent,
+            "chunks_suppressed": self.chunks_suppressed,
+            "segments": self.segments,
+            "noise_floor": self.noise_floor,
+        }
@@ -0,0 +1,172 @@
+"""Adaptive frame interval, resolution and JPEG quality for the video uplink.
+
+``send_realtime`` reports every message it sends to
+``VideoController.observe()``: how long it waited in its lane, how long
+``session.send`` took and how many messages are still queued behind it. The
+uplink counts as saturated when speech waits in the audio lanes (a frame is
+being pushed through the socket ahead of it), when a single send takes longer
+than a healthy link needs, when the backlog grows, or when frames are
+replaced in the video lane before they go out. Then the controller steps one
+level down its ladder. After ``recover_after`` seconds without any of that,
+it steps one level back up.
+
+Level 0 is the configured best setting (shortest interval, largest frame,
+highest quality) and the last level the configured floor. In between, each
+value moves geometrically, so every step cuts the video bitrate by a similar
+factor. Decisions are made at most every ``adjust_interval`` seconds from the
+worst values seen since the previous decision: one slow send alone does not
+trigger a step, and a step has time to take effect before the next one.
+"""
+from __future__ import annotations
+
+import time
+from typing import NamedTuple
+
+from frame_encoder import JPEG_QUALITY, MAX_DIMENSION
+
+MIN_INTERVAL = 1.0  # seconds between frames at full rate (core.FRAME_INTERVAL)
+MAX_INTERVAL = 5.0
+MIN_DIMENSION = 320
+MIN_QUALITY = 35
+LEVELS = 6
+ADJUST_INTERVAL = 2.0  # seconds between decisions
+RECOVER_AFTER = 10.0  # seconds of a clear uplink before stepping back up
+AUDIO_WAIT_HIGH = 0.15  # seconds speech may wait in its lane
+SEND_HIGH = 0.3  # seconds one session.send may take
+BACKLOG_HIGH = 8  # messages queued across all lanes
+SPEECH_LANES = ("audio",)  # audio chunks and VAD markers
+
+
+class VideoSetting(NamedTuple):
+    level: int
+    interval: float  # seconds between frames
+    max_dimension: int  # longest side in pixels
+    quality: int  # JPEG quality
+
+
+def _geometric(best: float, worst: float, fraction: float) -> float:
+    return best * (worst / best) ** fraction
+
+
+class VideoController:
+    def __init__(self, min_interval: float = MIN_INTERVAL, max_interval: float = MAX_INTERVAL,
+                 max_dimension: int = MAX_DIMENSION, min_dimension: int = MIN_DIMENSION,
+                 max_quality: int = JPEG_QUALITY, min_quality: int = MIN_QUALITY, levels: int = LEVELS,
+                 adjust_interval: float = ADJUST_INTERVAL, recover_after: float = RECOVER_AFTER,
+                 audio_wait_high: float = AUDIO_WAIT_HIGH, send_high: float = SEND_HIGH,
+                 backlog_high: int = BACKLOG_HIGH, metrics=None):
+        if not 0 < min_interval <= max_interval:
+            raise ValueError(f"Need 0 < min_interval <= max_interval, got {min_interval}, {max_interval}")
+        if not 0 < min_dimension <= max_dimension:
+            raise ValueError(f"Need 0 < min_dimension <= max_dimension, got {min_dimension}, {max_dimension}")
+        if not 1 <= min_quality <= max_quality <= 100:
+            raise ValueError(f"Need 1 <= min_quality <= max_quality <= 100, got {min_quality}, {max_quality}")
+        if levels < 1:
+            raise ValueError(f"Need at least one level, got {levels}")
+        self.ladder = []
+        for level in range(levels):
+            fraction = level / (levels - 1) if levels > 1 else 0.0
+            self.ladder.append(VideoSetting(
+                level,
+                round(_geometric(min_interval, max_interval, fraction), 2),
+                # Multiples of 16 keep JPEG blocks whole.
+                max(min_dimension, int(_geometric(max_dimension, min_dimension, fraction)) // 16 * 16),
+                round(_geometric(max_quality, min_quality, fraction)),
+            ))
+        self.adjust_interval = adjust_interval
+        self.recover_after = recover_after
+        self.audio_wait_high = audio_wait_high
+        self.send_high = send_high
+        self.backlog_high = backlog_high
+        self.metrics = metrics  # PipelineMetrics; gets video.* gauges
+        self.level = 0
+        self.steps_down = 0
+        self.steps_up = 0
+        self.last_reason = None
+        self._video_dropped = 0
+        self._next_adjust = None
+        self._clear_since = None
+        self._reset_window()
+        self.publish()
+
+    @property
+    def setting(self) -> VideoSetting:
+        return self.ladder[self.level]
+
+    def _reset_window(self):
+        self._audio_wait = 0.0
+        self._send = 0.0
+        self._backlog = 0
+        self._dropped = 0
+
+    def observe(self, lane: str, queue_wait: float, send_seconds: float, backlog: int,
+                video_dropped: int = 0, now: float | None = None) -> VideoSetting | None:
+        """Account one sent message; returns the new setting if the level changed.
+
+        ``backlog`` is the scheduler depth after the send and
+        ``video_dropped`` the video lane's cumulative drop count.
+        """
+        if now is None:
+            now = time.monotonic()
+        if self._next_adjust is None:
+            self._next_adjust = now + self.adjust_interval
+            self._clear_since = now
+        if lane in SPEECH_LANES:
+            self._audio_wait = max(self._audio_wait, queue_wait)
+        self._send = max(self._send, send_seconds)
+        self._backlog = max(self._backlog, backlog)
+        self._dropped += max(0, video_dropped - self._video_dropped)
+        self._video_dropped = video_dropped
+        if now < self._next_adjust:
+            return None
+        return self._adjust(now)
+
+    def _congestion(self) -> str | None:
+        if self._audio_wait > self.audio_wait_high:
+            return f"speech waited {1000 * self._audio_wait:.0f}ms"
+        if self._send > self.send_high:
+            return f"a send took {1000 * self._send:.0f}ms"
+        if self._backlog > self.backlog_high:
+            return f"{self._backlog} messages queued"
+        if self._dropped:
+            return f"{self._dropped} frames dropped"
+        return None
+
+    def _adjust(self, now: float) -> VideoSetting | None:
+        reason = self._congestion()
+        self._reset_window()
+        self._next_adjust = now + self.adjust_interval
+        level = self.level
+        if reason is not None:
+            self._clear_since = now
+            if self.level < len(self.ladder) - 1:
+                self.level += 1
+                self.steps_down += 1
+                self.last_reason = reason
+        elif self.level > 0 and now - self._clear_since >= self.recover_after:
+            self._clear_since = now  # each further step up needs another clear period
+            self.level -= 1
+            self.steps_up += 1
+            self.last_reason = "uplink clear"
+        if self.level == level:
+            return None
+        self.publish()
+        return self.setting
+
+    def publish(self):
+        """Set the ``video.*`` gauges of ``metrics`` to the current setting."""
+        if self.metrics is not None:
+            setting = self.setting
+            self.metrics.gauge("video.level", setting.level)
+            self.metrics.gauge("video.interval_seconds", setting.interval)
+            self.metrics.gauge("video.max_dimension", setting.max_dimension)
+            self.metrics.gauge("video.jpeg_quality", setting.quality)
+
+    def stats(self) -> dict:
+        return {
+            **self.setting._asdict(),
+            "levels": len(self.ladder),
+            "steps_down": self.steps_down,
+            "steps_up": self.steps_up,
+            "last_reason": self.last_reason,
+        }